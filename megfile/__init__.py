@@ -1,7 +1,16 @@
 import megfile.config  # noqa: F401  # make sure env config is loaded
 from megfile.fs_path import FSPath, fs_copy, is_fs
 from megfile.hdfs_path import HdfsPath, is_hdfs
-from megfile.http_path import HttpPath, HttpsPath, is_http
+from megfile.http_path import HttpPath, HttpsPath, http_download, is_http
+from megfile.lib.metrics import (
+    add_request_hook,
+    disable_metrics,
+    enable_metrics,
+    export_openmetrics,
+    remove_request_hook,
+    reset_stats,
+    stats,
+)
 from megfile.s3_path import (
     S3Path,
     is_s3,
@@ -130,6 +139,7 @@ __all__ = [
     "fs_copy",
     "is_hdfs",
     "is_http",
+    "http_download",
     "is_s3",
     "s3_buffered_open",
     "s3_cached_open",
@@ -153,6 +163,13 @@ __all__ = [
     "is_stdio",
     "stdio_open",
     "is_webdav",
+    "stats",
+    "reset_stats",
+    "export_openmetrics",
+    "enable_metrics",
+    "disable_metrics",
+    "add_request_hook",
+    "remove_request_hook",
     "FSPath",
     "HdfsPath",
     "HttpPath",
@@ -9,6 +9,7 @@ from concurrent.futures import ThreadPoolExecutor
 from functools import partial
 from itertools import islice
 from queue import Queue
+from typing import Tuple
 
 import click
 from click import ParamType
@@ -19,12 +20,16 @@ from megfile.config import (
     CONFIG_PATH,
     READER_BLOCK_SIZE,
     SFTP_HOST_KEY_POLICY,
+    WRITER_BLOCK_SIZE,
     CaseSensitiveConfigParser,
+    parse_quantity,
     set_log_level,
 )
+from megfile.errors import S3InvalidRangeError
 from megfile.hdfs_path import DEFAULT_HDFS_TIMEOUT
 from megfile.interfaces import FileEntry
 from megfile.lib.glob import get_non_glob_dir, has_magic
+from megfile.lib.hashing import HASH_ALGORITHMS, calculate_hashes
 from megfile.s3_path import get_s3_session
 from megfile.sftp_path import sftp_add_host_key
 from megfile.smart import (
@@ -38,6 +43,7 @@ from megfile.smart import (
     smart_glob_stat,
     smart_isdir,
     smart_isfile,
+    smart_load_content,
     smart_makedirs,
     smart_move,
     smart_open,
@@ -60,6 +66,8 @@ from megfile.version import VERSION
 
 options = {}
 max_file_object_catch_count = 1024 * 128
+# initial range size of head / tail, which is doubled until enough lines are read
+LINES_BLOCK_SIZE = 64 * 2**10
 
 
 @click.group()
@@ -613,20 +621,42 @@ def cat(path: str):
 def head(path: str, lines: int):
     _sftp_prompt_host_key(path)
 
-    with smart_open(path, "rb") as f:
-        for _ in range(lines):
-            content = f.readline()
-            if not content:
-                break
-            click.echo(content.strip(b"\n"))
+    if lines <= 0:
+        return
+
+    # read ranges from the start, twice as large each time, until enough lines;
+    # no size is requested first, a short read means the end of file is reached
+    offset, block_size = 0, min(LINES_BLOCK_SIZE, READER_BLOCK_SIZE)
+    blocks, newline_count = [], 0
+    while newline_count < lines:
+        try:
+            block = smart_load_content(path, offset, offset + block_size)
+        except S3InvalidRangeError:
+            # range starts at the end of file, e.g. an empty object
+            break
+        blocks.append(block)
+        newline_count += block.count(b"\n")
+        if len(block) < block_size:
+            break
+        offset += block_size
+        block_size = min(block_size * 2, max(READER_BLOCK_SIZE, LINES_BLOCK_SIZE))
+
+    line_list = b"".join(blocks).split(b"\n")
+    if not line_list[-1]:
+        line_list.pop()
+    for line in line_list[:lines]:
+        click.echo(line)
 
 
 def _tail_follow_content(path, offset):
-    with smart_open(path, "rb") as f:
-        f.seek(offset)
-        for line in f.readlines():
-            click.echo(line, nl=False)
-        offset = f.tell()
+    file_size = smart_getsize(path)
+    if file_size < offset:
+        # file is truncated, follow from the start
+        offset = 0
+    while offset < file_size:
+        stop = min(file_size, offset + READER_BLOCK_SIZE)
+        click.echo(smart_load_content(path, offset, stop), nl=False)
+        offset = stop
     return offset
 
 
@@ -643,26 +673,22 @@ def _tail_follow_content(path, offset):
 def tail(path: str, lines: int, follow: bool):
     _sftp_prompt_host_key(path)
 
-    line_list = []
-    with smart_open(path, "rb") as f:
-        f.seek(0, os.SEEK_END)
-        file_size = f.tell()
-        f.seek(0, os.SEEK_SET)
-
-        for current_offset in range(
-            file_size - READER_BLOCK_SIZE, 0 - READER_BLOCK_SIZE, -READER_BLOCK_SIZE
-        ):
-            current_offset = max(0, current_offset)
-            f.seek(current_offset)
-            block_lines = f.read(READER_BLOCK_SIZE).split(b"\n")
-            if len(line_list) > 0:
-                block_lines[-1] += line_list[0]
-                block_lines.extend(line_list[1:])
-            if len(block_lines) > lines:
-                line_list = block_lines[-lines:]
-                break
-            else:
-                line_list = block_lines
+    # read ranges backwards from the end, twice as large each time,
+    # until enough lines
+    file_size = smart_getsize(path)
+    offset, block_size = file_size, min(LINES_BLOCK_SIZE, READER_BLOCK_SIZE)
+    blocks, newline_count = [], 0
+    while offset > 0 and newline_count < lines:
+        start = max(0, offset - block_size)
+        block = smart_load_content(path, start, offset)
+        blocks.append(block)
+        newline_count += block.count(b"\n")
+        offset = start
+        block_size = min(block_size * 2, max(READER_BLOCK_SIZE, LINES_BLOCK_SIZE))
+
+    line_list = b"".join(reversed(blocks)).split(b"\n")
+    if newline_count >= lines:
+        line_list = line_list[-lines:] if lines > 0 else []
 
     for line in line_list[:-1]:
         click.echo(line)
@@ -702,10 +728,34 @@ def to(path: str, append: bool, stdout: bool):
 
 @cli.command(short_help="Produce an md5sum file for all the objects in the path.")
 @click.argument("path", type=PathType())
-def md5sum(path: str):
+@click.option(
+    "-a",
+    "--algorithm",
+    "algorithms",
+    type=click.Choice(HASH_ALGORITHMS),
+    multiple=True,
+    help="Digest algorithm, can be given several times to calculate them in one "
+    "pass, md5 by default. Only md5 is supported for directory.",
+)
+@click.option(
+    "--part-size",
+    type=str,
+    default=str(WRITER_BLOCK_SIZE),
+    help="Part size of multipart upload for etag algorithm, e.g. 8Mi.",
+)
+def md5sum(path: str, algorithms: Tuple[str, ...], part_size: str):
     _sftp_prompt_host_key(path)
 
-    click.echo(smart_getmd5(path, recalculate=True))
+    if not algorithms or algorithms == ("md5",):
+        click.echo(smart_getmd5(path, recalculate=True))
+        return
+
+    if smart_isdir(path):
+        raise click.UsageError("Only md5 is supported for directory: %s" % path)
+    with smart_open(path, "rb") as f:
+        digests = calculate_hashes(f, algorithms, part_size=parse_quantity(part_size))
+    for algorithm, digest in digests.items():
+        click.echo("%s: %s" % (algorithm, digest))
 
 
 @cli.command(short_help="Return the total size and number of objects in remote:path.")
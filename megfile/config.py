@@ -109,6 +109,11 @@ READER_MAX_BUFFER_SIZE = parse_quantity(
     os.getenv("MEGFILE_READER_MAX_BUFFER_SIZE") or 128 * 2**20
 )
 READER_LAZY_PREFETCH = parse_boolean(os.getenv("MEGFILE_READER_LAZY_PREFETCH"), False)
+# Send a duplicated request for a block fetched longer than this percentile of
+# latencies, e.g. 0.95, 0 disables hedged requests
+READER_HEDGE_PERCENTILE = float(os.getenv("MEGFILE_READER_HEDGE_PERCENTILE") or 0)
+# Max ratio of hedged requests to all requests
+READER_HEDGE_MAX_RATIO = float(os.getenv("MEGFILE_READER_HEDGE_MAX_RATIO") or 0.05)
 
 # Multi-upload in aws s3 has a maximum of 10,000 parts,
 # so the maximum supported file size is MEGFILE_WRITE_BLOCK_SIZE * 10,000,
@@ -126,14 +131,37 @@ if os.getenv("MEGFILE_WRITER_BLOCK_AUTOSCALE"):
     DEFAULT_WRITER_BLOCK_AUTOSCALE = parse_boolean(
         os.environ["MEGFILE_WRITER_BLOCK_AUTOSCALE"]
     )
+# Digests calculated while writing, e.g. "md5,sha256,crc32c", disabled by default
+WRITER_CHECKSUMS = tuple(
+    algorithm.strip().lower()
+    for algorithm in (os.getenv("MEGFILE_WRITER_CHECKSUMS") or "").split(",")
+    if algorithm.strip()
+)
+
+# Collect statistics of every reader and writer, and log them when closed
+IO_PROFILE = parse_boolean(os.getenv("MEGFILE_IO_PROFILE"), False)
+
+# Record every request, see megfile.lib.metrics
+METRICS = parse_boolean(os.getenv("MEGFILE_METRICS"), False)
 
 GLOBAL_MAX_WORKERS = int(os.getenv("MEGFILE_MAX_WORKERS") or 8)
 
 NEWLINE = ord("\n")
 
+# Cache files of smart_cache in read mode in SMART_CACHE_DIR shared by processes,
+# keyed by path and version, and evict least recently used ones when total size
+# exceeds SMART_CACHE_MAX_SIZE
+SMART_CACHE_SHARED = parse_boolean(os.getenv("MEGFILE_SMART_CACHE_SHARED"), False)
+SMART_CACHE_DIR = os.path.expanduser(
+    os.getenv("MEGFILE_SMART_CACHE_DIR") or "~/.cache/megfile"
+)
+SMART_CACHE_MAX_SIZE = parse_quantity(
+    os.getenv("MEGFILE_SMART_CACHE_MAX_SIZE") or 10 * 2**30
+)
+
 # Default buffer sizes for various operations
 DEFAULT_COPY_BUFFER_SIZE = 16 * 1024  # 16KB, same as shutil.copyfileobj
-DEFAULT_HASH_BUFFER_SIZE = 4 * 1024  # 4KB for hash calculations
+DEFAULT_HASH_BUFFER_SIZE = 2**20  # 1MB for hash calculations
 
 S3_CLIENT_CACHE_MODE = os.getenv("MEGFILE_S3_CLIENT_CACHE_MODE") or "thread_local"
 
@@ -154,9 +182,54 @@ WEBDAV_MAX_RETRY_TIMES = int(
     os.getenv("MEGFILE_WEBDAV_MAX_RETRY_TIMES") or DEFAULT_MAX_RETRY_TIMES
 )
 
+# Retry interval grows by decorrelated jitter from RETRY_BASE_INTERVAL, in seconds
+RETRY_BASE_INTERVAL = float(os.getenv("MEGFILE_RETRY_BASE_INTERVAL") or 0.1)
+RETRY_MAX_INTERVAL = float(os.getenv("MEGFILE_RETRY_MAX_INTERVAL") or 30)
+# Max number of retries of every endpoint in a burst, 0 means unlimited
+RETRY_BUDGET = int(os.getenv("MEGFILE_RETRY_BUDGET") or 0)
+# Retries added to the budget of every endpoint per second
+RETRY_BUDGET_REFILL_RATE = float(os.getenv("MEGFILE_RETRY_BUDGET_REFILL_RATE") or 1)
+# Fail fast after this number of consecutive failures of an endpoint, 0 disables
+CIRCUIT_BREAKER_THRESHOLD = int(os.getenv("MEGFILE_CIRCUIT_BREAKER_THRESHOLD") or 0)
+# Seconds to fail fast before trying the endpoint again
+CIRCUIT_BREAKER_COOLDOWN = float(os.getenv("MEGFILE_CIRCUIT_BREAKER_COOLDOWN") or 30)
+
 SFTP_HOST_KEY_POLICY = os.getenv("MEGFILE_SFTP_HOST_KEY_POLICY")
 
 S3_FAST_LIST = parse_boolean(os.getenv("MEGFILE_S3_FAST_LIST"), False)
+# symlinks created by megfile are empty objects, skip checking non-empty objects
+S3_SYMLINK_EMPTY_ONLY = parse_boolean(os.getenv("MEGFILE_S3_SYMLINK_EMPTY_ONLY"), False)
+# Blocks of s3 objects not smaller than this are read from a single streaming
+# GET until the first seek, which saves a request per block of sequential reads,
+# 0 disables streaming
+S3_READER_STREAM_MIN_SIZE = parse_quantity(
+    os.getenv("MEGFILE_S3_READER_STREAM_MIN_SIZE") or 4 * READER_BLOCK_SIZE
+)
+# s3 objects of known size not larger than this are opened for reading by a
+# single GET into memory
+S3_SMALL_FILE_SIZE = parse_quantity(os.getenv("MEGFILE_S3_SMALL_FILE_SIZE") or 2**20)
+# Content of S3MemoryHandler larger than this is spilled to a temporary file
+S3_MEMORY_HANDLER_SPILL_SIZE = parse_quantity(
+    os.getenv("MEGFILE_S3_MEMORY_HANDLER_SPILL_SIZE") or 64 * 2**20
+)
+# Block size of s3 files opened with access="random"
+S3_RANDOM_READ_BLOCK_SIZE = parse_quantity(
+    os.getenv("MEGFILE_S3_RANDOM_READ_BLOCK_SIZE") or 2**20
+)
+# Client side rate limits of s3 requests, 0 means unlimited
+S3_MAX_REQUESTS_PER_SECOND = float(os.getenv("MEGFILE_S3_MAX_REQUESTS_PER_SECOND") or 0)
+S3_MAX_BYTES_PER_SECOND = parse_quantity(
+    os.getenv("MEGFILE_S3_MAX_BYTES_PER_SECOND") or 0
+)
+# Rate limits are shared by requests to the same "endpoint", "bucket" or "profile"
+S3_RATE_LIMIT_SCOPE = os.getenv("MEGFILE_S3_RATE_LIMIT_SCOPE") or "bucket"
+if S3_RATE_LIMIT_SCOPE not in ("endpoint", "bucket", "profile"):
+    raise ValueError(
+        "'MEGFILE_S3_RATE_LIMIT_SCOPE' must be one of endpoint, bucket and profile, "
+        f"got {S3_RATE_LIMIT_SCOPE}"
+    )
+# Share rate limits between processes on this host
+S3_RATE_LIMIT_SHARED = parse_boolean(os.getenv("MEGFILE_S3_RATE_LIMIT_SHARED"), False)
 
 HTTP_AUTH_HEADERS = (
     "Authorization",
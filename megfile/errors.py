@@ -5,7 +5,7 @@ from contextlib import contextmanager
 from functools import wraps
 from logging import getLogger
 from shutil import SameFileError
-from typing import Callable, Optional
+from typing import Callable, Optional, Union
 
 import botocore.exceptions
 import requests.exceptions
@@ -18,6 +18,8 @@ from botocore.exceptions import ClientError, NoCredentialsError, ParamValidation
 from requests.exceptions import HTTPError
 
 from megfile.interfaces import PathLike
+from megfile.lib.metrics import count_retry
+from megfile.lib.retry_policy import get_retry_interval, get_retry_policy
 
 __all__ = [
     "S3FileNotFoundError",
@@ -32,12 +34,14 @@ __all__ = [
     "HttpPermissionError",
     "HttpFileNotFoundError",
     "HttpBodyIncompleteError",
+    "HttpFileChangedError",
     "HttpUnknownError",
     "HttpException",
     "ProtocolExistsError",
     "ProtocolNotFoundError",
     "S3UnknownError",
     "SameFileError",
+    "CircuitOpenError",
     "translate_http_error",
     "translate_s3_error",
     "patch_method",
@@ -288,23 +292,45 @@ def patch_method(
     before_callback: Optional[Callable] = None,
     after_callback: Optional[Callable] = None,
     retry_callback: Optional[Callable] = None,
+    endpoint: Union[str, Callable[..., str], None] = None,
 ):
+    """Retry func when should_retry(error) is True, sleeping with decorrelated
+    jitter and at least the Retry-After of response between tries.
+
+    If endpoint is given, retries are limited by the retry budget of endpoint, and
+    requests fail fast when the circuit breaker of endpoint is open, see
+    megfile.lib.retry_policy. endpoint could be a function accepting arguments of
+    func.
+    """
+
     @wraps(func)
     def wrapper(*args, **kwargs):
         if before_callback is not None:
             before_callback(*args, **kwargs)
 
+        policy, endpoint_name = None, None
+        if endpoint is not None:
+            endpoint_name = endpoint
+            if callable(endpoint):
+                endpoint_name = endpoint(*args, **kwargs)
+            policy = get_retry_policy(endpoint_name)
+
+        retry_interval = 0.0
         for retries in range(1, max_retries + 1):
+            if policy is not None and not policy.allow_request():
+                raise CircuitOpenError(endpoint_name)
             try:
                 result = func(*args, **kwargs)
                 if after_callback is not None:
                     result = after_callback(result, *args, **kwargs)
-                if retries > 1:
-                    _logger.info(f"Error already fixed by retry {retries - 1} times")
-                return result
             except Exception as error:
                 if not should_retry(error):
+                    if policy is not None:
+                        # endpoint is available, though the request is wrong
+                        policy.record_success()
                     raise
+                if policy is not None:
+                    policy.record_failure()
                 if retry_callback is not None:
                     retry_callback(error, *args, **kwargs)
                 if retries == max_retries:
@@ -313,12 +339,25 @@ def patch_method(
                         f"after {retries} tries"
                     )
                     raise MaxRetriesExceededError(error, retries=retries)
-                retry_interval = min(0.1 * 2**retries, 30)
+                if policy is not None and not policy.allow_retry():
+                    _logger.warning(
+                        f"Retry budget of {endpoint_name} exhausted, cannot handle "
+                        f"error {full_error_message(error)} after {retries} tries"
+                    )
+                    raise MaxRetriesExceededError(error, retries=retries)
+                count_retry()
+                retry_interval = get_retry_interval(error, retry_interval)
                 _logger.info(
                     f"unknown error encountered: {full_error_message(error)}, "
                     f"retry in {retry_interval:.1f}s after {retries} tries"
                 )
                 time.sleep(retry_interval)
+            else:
+                if policy is not None:
+                    policy.record_success()
+                if retries > 1:
+                    _logger.info(f"Error already fixed by retry {retries - 1} times")
+                return result
 
     return wrapper
 
@@ -339,6 +378,17 @@ def _create_missing_ok_generator(generator, missing_ok: bool, error: Exception):
     return create_generator()
 
 
+class CircuitOpenError(Exception):
+    """Request is rejected, because the endpoint failed continuously"""
+
+    def __init__(self, endpoint: str):
+        super().__init__("Circuit breaker is open: %s" % endpoint)
+        self.endpoint = endpoint
+
+    def __reduce__(self):
+        return (self.__class__, (self.endpoint,))
+
+
 class MaxRetriesExceededError(Exception):
     def __init__(self, error: Exception, retries: int = 1):
         while isinstance(error, MaxRetriesExceededError):
@@ -470,6 +520,10 @@ class HttpBodyIncompleteError(HttpException):
     pass
 
 
+class HttpFileChangedError(HttpException):
+    pass
+
+
 http_retry_exceptions = (
     requests.exceptions.ReadTimeout,
     requests.exceptions.ConnectionError,
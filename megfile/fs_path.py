@@ -1,17 +1,28 @@
-import hashlib
 import io
 import os
 import pathlib
 import shutil
-from functools import cached_property
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from functools import cached_property, partial
 from stat import S_ISBLK as stat_isblk
 from stat import S_ISCHR as stat_ischr
 from stat import S_ISDIR as stat_isdir
 from stat import S_ISFIFO as stat_isfifo
 from stat import S_ISLNK as stat_islnk
 from stat import S_ISSOCK as stat_issock
-from typing import IO, BinaryIO, Callable, Iterator, List, Optional, Tuple, Union
+from typing import (
+    IO,
+    BinaryIO,
+    Callable,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Tuple,
+    Union,
+)
 
+from megfile.config import GLOBAL_MAX_WORKERS
 from megfile.errors import _create_missing_ok_generator
 from megfile.interfaces import (
     Access,
@@ -23,19 +34,35 @@ from megfile.interfaces import (
 )
 from megfile.lib.compare import is_same_file
 from megfile.lib.compat import fspath
+from megfile.lib.fs_walk import parallel_walk
 from megfile.lib.glob import iglob
+from megfile.lib.hashing import HashingWriter, calculate_dir_md5
 from megfile.lib.joinpath import path_join
 from megfile.lib.url import get_url_scheme
 from megfile.smart_path import SmartPath
-from megfile.utils import calculate_md5, copyfd
+from megfile.utils import calculate_md5
 from megfile.utils.atomic import FSFuncForAtomic, WrapAtomic
 
+try:
+    import fcntl
+except ImportError:  # pragma: no cover
+    fcntl = None
+
 __all__ = [
     "FSPath",
     "is_fs",
     "fs_copy",
+    "fs_concat",
 ]
 
+# max size of a single copy_file_range / sendfile call, same as shutil
+MAX_ZERO_COPY_SIZE = 2**30
+# buffer size of copy by read / write, when zero copy is not supported
+COPY_BUFFER_SIZE = 2**20
+O_BINARY = getattr(os, "O_BINARY", 0)
+# ioctl request of reflink on linux, see `man ioctl_ficlone`
+FICLONE = getattr(fcntl, "FICLONE", 0x40049409)
+
 
 def _make_stat(stat: os.stat_result) -> StatResult:
     return StatResult(
@@ -96,6 +123,216 @@ def fs_copy(
     )
 
 
+def _zero_copy_fd(
+    copy_func: Callable[[int, int, int], int],
+    src_fd: int,
+    dst_fd: int,
+    callback: Optional[Callable[[int], None]] = None,
+) -> bool:
+    """Copy from current offset of src_fd to current offset of dst_fd in kernel
+
+    :returns: False if copy_func is not supported or copies nothing, and
+        nothing is copied
+    """
+    try:
+        block_size = max(os.fstat(src_fd).st_size, 2**23)
+    except OSError:
+        block_size = 2**23
+    block_size = min(block_size, MAX_ZERO_COPY_SIZE)
+    copied = 0
+    while True:
+        try:
+            size = copy_func(src_fd, dst_fd, block_size)
+        except OSError:
+            # e.g. not supported by file system / kernel, or across file systems
+            if copied == 0:
+                return False
+            raise
+        if size == 0:
+            # e.g. files of procfs / sysfs, or across file systems on some
+            # kernels, fall back to read / write as shutil does
+            return copied > 0
+        copied += size
+        if callback:
+            callback(size)
+
+
+def _copy_file_range(src_fd: int, dst_fd: int, size: int) -> int:
+    return os.copy_file_range(src_fd, dst_fd, size)  # pyre-ignore[16]
+
+
+def _sendfile(src_fd: int, dst_fd: int, size: int) -> int:
+    return os.sendfile(dst_fd, src_fd, None, size)
+
+
+def copy_fd(
+    src_fd: int, dst_fd: int, callback: Optional[Callable[[int], None]] = None
+) -> None:
+    """Copy from current offset of src_fd to current offset of dst_fd
+
+    Content is copied in kernel without passing through user space by
+    copy_file_range or sendfile if possible, otherwise copied by read / write.
+    """
+    # follow the switches of shutil, which are turned off on unsupported platforms
+    use_sendfile = _use_zero_copy()
+    use_copy_file_range = getattr(shutil, "_USE_CP_COPY_FILE_RANGE", use_sendfile)
+    if (
+        use_copy_file_range
+        and hasattr(os, "copy_file_range")
+        and _zero_copy_fd(_copy_file_range, src_fd, dst_fd, callback)
+    ):
+        return
+    if use_sendfile and _zero_copy_fd(_sendfile, src_fd, dst_fd, callback):
+        return
+    while True:
+        data = os.read(src_fd, COPY_BUFFER_SIZE)
+        if not data:
+            break
+        view = memoryview(data)
+        while view:
+            view = view[os.write(dst_fd, view) :]
+        if callback:
+            callback(len(data))
+
+
+def _use_zero_copy() -> bool:
+    # sendfile is supported on linux, shutil turns it off on other platforms
+    return getattr(shutil, "_USE_CP_SENDFILE", False)
+
+
+def _clone_fd(
+    src_fd: int, dst_fd: int, callback: Optional[Callable[[int], None]] = None
+) -> bool:
+    """Clone whole content of src_fd to dst_fd by reflink, blocks are shared by
+    both files until modified, supported by btrfs / xfs and so on
+
+    :returns: False if reflink is not supported
+    """
+    if fcntl is None or not _use_zero_copy():
+        return False
+    try:
+        fcntl.ioctl(dst_fd, FICLONE, src_fd)
+    except OSError:
+        return False
+    if callback:
+        callback(os.fstat(src_fd).st_size)
+    return True
+
+
+def _copy_file(
+    src_path: str, dst_path: str, callback: Optional[Callable[[int], None]] = None
+) -> None:
+    """Copy content and metadata of file like shutil.copy2
+
+    Content is copied by reflink, copy_file_range, sendfile, or read / write with
+    large buffer, the first one supported.
+    """
+    if os.path.exists(dst_path) and os.path.samefile(src_path, dst_path):
+        raise shutil.SameFileError(
+            "{!r} and {!r} are the same file".format(src_path, dst_path)
+        )
+    src_fd = os.open(src_path, os.O_RDONLY | O_BINARY)
+    try:
+        if stat_isdir(os.fstat(src_fd).st_mode):
+            raise IsADirectoryError("Is a directory: %r" % src_path)
+        _copy_fd_to_path(src_fd, dst_path, callback, clone=True)
+    finally:
+        os.close(src_fd)
+    shutil.copystat(src_path, dst_path)
+
+
+def _copy_fd_to_path(
+    src_fd: int,
+    dst_path: str,
+    callback: Optional[Callable[[int], None]] = None,
+    clone: bool = False,
+) -> None:
+    dst_fd = os.open(dst_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC | O_BINARY, 0o666)
+    try:
+        if not (clone and _clone_fd(src_fd, dst_fd, callback)):
+            copy_fd(src_fd, dst_fd, callback)
+    finally:
+        os.close(dst_fd)
+
+
+def _fs_sync_dir(
+    src_dir: str,
+    dst_dir: str,
+    force: bool = False,
+    overwrite: bool = True,
+    callback: Optional[Callable[[str, int], None]] = None,
+    max_workers: Optional[int] = None,
+) -> None:
+    """Copy files in src_dir to dst_dir concurrently, like shutil.copytree"""
+    dirs = []
+
+    def iter_files(src_dir: str, dst_dir: str) -> Iterator[Tuple[str, str]]:
+        os.makedirs(dst_dir, exist_ok=True)
+        dirs.append((src_dir, dst_dir))
+        with os.scandir(src_dir) as entries:
+            entries = sorted(entries, key=lambda entry: entry.name)
+        for entry in entries:
+            dst_path = os.path.join(dst_dir, entry.name)
+            if entry.is_dir():
+                yield from iter_files(entry.path, dst_path)
+            else:
+                yield entry.path, dst_path
+
+    def sync_file(src_path: str, dst_path: str):
+        if not force:
+            try:
+                dst_stat = os.stat(dst_path)
+            except FileNotFoundError:
+                dst_stat = None
+            if dst_stat is not None:
+                src_stat = os.stat(src_path)
+                if not overwrite or is_same_file(src_stat, dst_stat, "copy"):
+                    if callback:
+                        callback(src_path, src_stat.st_size)
+                    return
+        _copy_file(
+            src_path,
+            dst_path,
+            callback=partial(callback, src_path) if callback else None,
+        )
+
+    max_workers = max_workers or GLOBAL_MAX_WORKERS
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = set()
+        for src_path, dst_path in iter_files(src_dir, dst_dir):
+            futures.add(executor.submit(sync_file, src_path, dst_path))
+            # limit pending tasks, files may be too many to be listed in memory
+            if len(futures) >= max_workers * 2:
+                done, futures = wait(futures, return_when=FIRST_COMPLETED)
+                for future in done:
+                    future.result()
+        for future in futures:
+            future.result()
+
+    # copy stat of directories after their content copied, like shutil.copytree
+    for src_dir, dst_dir in reversed(dirs):
+        shutil.copystat(src_dir, dst_dir)
+
+
+def fs_concat(src_paths: List[PathLike], dst_path: PathLike) -> None:
+    """Concatenate files on file system to one file
+
+    Content is copied in kernel by copy_file_range or sendfile if possible.
+
+    :param src_paths: Given source paths
+    :param dst_path: Given destination path
+    """
+    dst_path = FSPath(dst_path).path_without_protocol
+    dst_dir = os.path.dirname(dst_path)  # pyre-ignore[6]
+    if dst_dir and dst_dir != ".":
+        os.makedirs(dst_dir, exist_ok=True)
+    with open(dst_path, "wb") as fdst:
+        for src_path in src_paths:
+            src_path = FSPath(src_path).path_without_protocol
+            with open(src_path, "rb") as fsrc:
+                copy_fd(fsrc.fileno(), fdst.fileno())
+
+
 def _fs_rename_file(
     src_path: PathLike, dst_path: PathLike, overwrite: bool = True
 ) -> None:
@@ -559,20 +796,48 @@ class FSPath(URIPath):
         else:
             os.remove(self.path_without_protocol)  # pyre-ignore[6]
 
-    def _scan(
-        self, missing_ok: bool = True, followlinks: bool = False
-    ) -> Iterator[str]:
+    def _scan_entries(
+        self,
+        followlinks: bool = False,
+        ordered: bool = True,
+        max_workers: Optional[int] = None,
+        stat: bool = False,
+    ) -> Iterator[Union[str, os.DirEntry]]:
+        """Yield the path itself if it is a file, then DirEntry of files in it"""
         self._check_int_path()
 
         if self.is_file(followlinks=followlinks):
             path = fspath(self.path_without_protocol)
             yield path
 
-        for root, _, files in self.walk(followlinks=followlinks):
-            for filename in files:
-                yield os.path.join(root, filename)
+        for _, _, files in self._walk_entries(
+            followlinks=followlinks,
+            ordered=ordered,
+            max_workers=max_workers,
+            stat=stat,
+        ):
+            yield from files
+
+    def _scan(
+        self,
+        missing_ok: bool = True,
+        followlinks: bool = False,
+        ordered: bool = True,
+        max_workers: Optional[int] = None,
+    ) -> Iterator[str]:
+        for entry in self._scan_entries(
+            followlinks=followlinks, ordered=ordered, max_workers=max_workers
+        ):
+            yield entry if isinstance(entry, str) else entry.path
 
-    def scan(self, missing_ok: bool = True, followlinks: bool = False) -> Iterator[str]:
+    def scan(
+        self,
+        missing_ok: bool = True,
+        followlinks: bool = False,
+        *,
+        ordered: bool = True,
+        max_workers: Optional[int] = None,
+    ) -> Iterator[str]:
         """
         Iteratively traverse only files in given directory, in alphabetical order.
         Every iteration on generator yields a path string.
@@ -581,30 +846,63 @@ class FSPath(URIPath):
         If path is a non-existent path, return an empty generator
         If path is a bucket path, return all file paths in the bucket
 
+        Directories are listed concurrently.
+
         :param missing_ok: If False and there's no file in the directory,
             raise FileNotFoundError
+        :param ordered: If False, files are yielded as soon as their directory is
+            listed, not in alphabetical order
+        :param max_workers: Max listing thread number, `None` by default,
+            will use global thread pool with 8 threads.
         :returns: A file path generator
         """
         return _create_missing_ok_generator(
-            self._scan(followlinks=followlinks),
+            self._scan(
+                followlinks=followlinks, ordered=ordered, max_workers=max_workers
+            ),
             missing_ok=missing_ok,
             error=FileNotFoundError("No match any file in: %r" % self.path),
         )
 
     def scan_stat(
-        self, missing_ok: bool = True, followlinks: bool = False
+        self,
+        missing_ok: bool = True,
+        followlinks: bool = False,
+        *,
+        ordered: bool = True,
+        max_workers: Optional[int] = None,
     ) -> Iterator[FileEntry]:
         """
         Iteratively traverse only files in given directory, in alphabetical order.
         Every iteration on generator yields a tuple of path string and file stat
 
+        Directories are listed and files are stated concurrently.
+
         :param missing_ok: If False and there's no file in the directory,
             raise FileNotFoundError
+        :param ordered: If False, files are yielded as soon as their directory is
+            listed, not in alphabetical order
+        :param max_workers: Max listing thread number, `None` by default,
+            will use global thread pool with 8 threads.
         :returns: A file path generator
         """
         file_not_found = True
-        for path in self._scan(followlinks=followlinks):
-            yield FileEntry(os.path.basename(path), path, _make_stat(os.lstat(path)))
+        for entry in self._scan_entries(
+            followlinks=followlinks,
+            ordered=ordered,
+            max_workers=max_workers,
+            stat=True,
+        ):
+            if isinstance(entry, str):
+                yield FileEntry(
+                    os.path.basename(entry), entry, _make_stat(os.lstat(entry))
+                )
+            else:
+                yield FileEntry(
+                    entry.name,
+                    entry.path,
+                    _make_stat(entry.stat(follow_symlinks=False)),
+                )
             file_not_found = False
         if file_not_found:
             if missing_ok:
@@ -676,8 +974,36 @@ class FSPath(URIPath):
             if not missing_ok:
                 raise
 
+    def _walk_entries(
+        self,
+        followlinks: bool = False,
+        ordered: bool = True,
+        max_workers: Optional[int] = None,
+        stat: bool = False,
+    ) -> Iterator[Tuple[str, List[os.DirEntry], List[os.DirEntry]]]:
+        self._check_int_path()
+
+        if not self.exists(followlinks=followlinks):
+            return
+
+        if self.is_file(followlinks=followlinks):
+            return
+
+        path = os.path.normpath(self.path_without_protocol)  # pyre-ignore[6]
+        yield from parallel_walk(
+            path,
+            followlinks=followlinks,
+            ordered=ordered,
+            stat=stat,
+            max_workers=max_workers,
+        )
+
     def walk(
-        self, followlinks: bool = False
+        self,
+        followlinks: bool = False,
+        *,
+        ordered: bool = True,
+        max_workers: Optional[int] = None,
     ) -> Iterator[Tuple[str, List[str], List[str]]]:
         """
         Generate the file names in a directory tree by walking the tree top-down.
@@ -693,6 +1019,10 @@ class FSPath(URIPath):
         If path not exists, or path is a file (link is regarded as file),
         return an empty generator
 
+        Like os.walk, 'dirs' can be modified in place to prune the walk.
+
+        Directories are listed concurrently.
+
         .. note::
 
             Be aware that setting ``followlinks`` to True can lead to infinite recursion
@@ -700,40 +1030,21 @@ class FSPath(URIPath):
             track of the directories it visited already.
 
         :param followlinks: False if regard symlink as file, else True
+        :param ordered: If False, directories are yielded as soon as they are listed,
+            not in top-down order
+        :param max_workers: Max listing thread number, `None` by default,
+            will use global thread pool with 8 threads.
 
         :returns: A 3-tuple generator
         """
-        self._check_int_path()
-
-        if not self.exists(followlinks=followlinks):
-            return
-
-        if self.is_file(followlinks=followlinks):
-            return
-
-        path = fspath(self.path_without_protocol)
-        path = os.path.normpath(self.path_without_protocol)  # pyre-ignore[6]
-
-        stack = [path]
-        while stack:
-            root = stack.pop()
-            dirs, files = [], []
-            for entry in os.scandir(root):
-                name = fspath(entry.name)
-                path = entry.path
-                if FSPath(path).is_file(followlinks=followlinks):
-                    files.append(name)
-                elif FSPath(path).is_dir(followlinks=followlinks):
-                    dirs.append(name)
-
-            dirs = sorted(dirs)
-            files = sorted(files)
-
-            yield root, dirs, files
-
-            stack.extend(
-                (os.path.join(root, directory) for directory in reversed(dirs))
-            )
+        for root, dirs, files in self._walk_entries(
+            followlinks=followlinks, ordered=ordered, max_workers=max_workers
+        ):
+            dir_names = [entry.name for entry in dirs]
+            yield root, dir_names, [entry.name for entry in files]
+            # walk only directories left in dir_names, which may be pruned in place
+            entries = {entry.name: entry for entry in dirs}
+            dirs[:] = [entries[name] for name in dir_names if name in entries]
 
     def resolve(self, strict=False) -> "FSPath":
         """Equal to fs_realpath
@@ -761,15 +1072,12 @@ class FSPath(URIPath):
         returns: md5 of file
         """
         if self.is_dir():
-            hash_md5 = hashlib.md5()  # nosec
-            for file_name in self.listdir():
-                chunk = (
-                    self.joinpath(file_name)
-                    .md5(recalculate=recalculate, followlinks=followlinks)
-                    .encode()
-                )
-                hash_md5.update(chunk)
-            return hash_md5.hexdigest()
+            return calculate_dir_md5(
+                self,
+                is_dir=lambda path: path.is_dir(),
+                recalculate=recalculate,
+                followlinks=followlinks,
+            )
         with open(self.path_without_protocol, "rb") as src:
             md5 = calculate_md5(src)
         return md5
@@ -781,19 +1089,24 @@ class FSPath(URIPath):
         followlinks: bool = False,
     ):
         if isinstance(self.path_without_protocol, int):
-            with open(fspath(dst_path), "wb") as fdst:
-                copyfd(self.path_without_protocol, fdst, callback)
-        else:
+            _copy_fd_to_path(self.path_without_protocol, fspath(dst_path), callback)
+        elif not followlinks and os.path.islink(
+            self.path_without_protocol  # pyre-ignore[6]
+        ):
+            # copy symlink itself
             shutil.copy2(
                 self.path_without_protocol,  # pyre-ignore[6]
                 fspath(dst_path),
-                follow_symlinks=followlinks,
+                follow_symlinks=False,
             )
-
-            # After python3.8, patch `shutil.copyfile` is not a good way,
-            # because `shutil.copy2` will not call it in some cases.
             if callback:
-                callback(self.stat(follow_symlinks=followlinks).size)
+                callback(self.stat(follow_symlinks=False).size)
+        else:
+            _copy_file(
+                self.path_without_protocol,  # pyre-ignore[6]
+                fspath(dst_path),
+                callback=callback,
+            )
 
     def copy(
         self,
@@ -850,39 +1163,42 @@ class FSPath(URIPath):
         followlinks: bool = False,
         force: bool = False,
         overwrite: bool = True,
+        *,
+        callback: Optional[Callable[[str, int], None]] = None,
+        max_workers: Optional[int] = None,
     ) -> None:
         """Force write of everything to disk.
 
+        Files in directory are copied concurrently.
+
         :param dst_path: Target file path
         :param followlinks: False if regard symlink as file, else True
         :param force: Sync file forcible, do not ignore same files,
             priority is higher than 'overwrite', default is False
         :param overwrite: whether or not overwrite file when exists, default is True
+        :param callback: Called periodically during copy, and the input parameter is
+            the source file path and the data size (in bytes) of copy since the last
+            call
+        :param max_workers: Max copy thread number, `MEGFILE_MAX_WORKERS` by default
         """
         self._check_int_path()
 
         if self.is_dir(followlinks=followlinks):
-
-            def ignore_same_file(src: str, names: List[str]) -> List[str]:
-                ignore_files = []
-                for name in names:
-                    dst_obj = self.from_path(dst_path).joinpath(name)
-                    if not overwrite and dst_obj.exists():
-                        ignore_files.append(name)
-                    elif dst_obj.exists() and is_same_file(
-                        self.joinpath(name).stat(), dst_obj.stat(), "copy"
-                    ):
-                        ignore_files.append(name)
-                return ignore_files
-
-            shutil.copytree(
+            _fs_sync_dir(
                 self.path_without_protocol,  # pyre-ignore[6]
-                dst_path,
-                ignore=None if force else ignore_same_file,
-                dirs_exist_ok=True,
+                fspath(dst_path),
+                force=force,
+                overwrite=overwrite,
+                callback=callback,
+                max_workers=max_workers,
             )
         else:
-            self.copy(dst_path, followlinks=followlinks, overwrite=force or overwrite)
+            self.copy(
+                dst_path,
+                callback=partial(callback, self.path) if callback else None,
+                followlinks=followlinks,
+                overwrite=force or overwrite,
+            )
 
     def symlink(self, dst_path: PathLike) -> None:
         """
@@ -968,8 +1284,22 @@ class FSPath(URIPath):
         newline: Optional[str] = None,
         closefd: bool = True,
         atomic: bool = False,
+        checksums: Optional[Iterable[str]] = None,
         **kwargs,
     ) -> IO:
+        if checksums:
+            if mode not in ("wb", "xb"):
+                raise ValueError("checksums is only supported in mode 'wb' or 'xb'")
+            return HashingWriter(
+                self.open(
+                    mode,
+                    buffering=buffering,
+                    closefd=closefd,
+                    atomic=atomic,
+                ),
+                checksums,
+            )
+
         if not isinstance(self.path_without_protocol, int) and (
             "w" in mode or "x" in mode or "a" in mode
         ):
@@ -6,9 +6,11 @@ import sys
 from functools import cached_property, lru_cache
 from logging import getLogger
 from typing import IO, BinaryIO, Iterator, List, Optional, Tuple
+from urllib.parse import urlsplit
 
 from megfile.config import (
     HDFS_MAX_RETRY_TIMES,
+    IO_PROFILE,
     READER_BLOCK_SIZE,
     READER_MAX_BUFFER_SIZE,
 )
@@ -18,6 +20,11 @@ from megfile.lib.compat import fspath
 from megfile.lib.glob import FSFunc, iglob
 from megfile.lib.hdfs_prefetch_reader import HdfsPrefetchReader
 from megfile.lib.hdfs_tools import hdfs_api
+from megfile.lib.metrics import (
+    count_session_connections,
+    get_body_size,
+    instrument_request,
+)
 from megfile.lib.url import get_url_scheme
 from megfile.smart_path import SmartPath
 from megfile.utils import _is_pickle
@@ -96,9 +103,18 @@ def get_hdfs_client(profile_name: Optional[str] = None):
     config = get_hdfs_config(profile_name)
     if config["token"]:
         config.pop("user", None)
-        return hdfs_api.TokenClient(**config)
-    config.pop("token", None)
-    return hdfs_api.InsecureClient(**config)
+        client = hdfs_api.TokenClient(**config)
+    else:
+        config.pop("token", None)
+        client = hdfs_api.InsecureClient(**config)
+
+    def describe_request(method, url, data=None, params=None, **kwargs):
+        operation = (params or {}).get("op", method)
+        return operation, urlsplit(url).hostname or "", get_body_size(data)
+
+    client._request = instrument_request(client._request, "hdfs", describe_request)
+    count_session_connections(getattr(client, "_session", None))
+    return client
 
 
 @SmartPath.register
@@ -601,6 +617,7 @@ class HdfsPath(URIPath):
         block_forward: Optional[int] = None,
         block_size: int = READER_BLOCK_SIZE,
         atomic: bool = False,
+        io_profile: bool = IO_PROFILE,
         **kwargs,
     ) -> IO:
         """
@@ -619,6 +636,8 @@ class HdfsPath(URIPath):
         :param block_forward: Number of blocks of data for reader cached from the
             offset position.
         :param block_size: Size of a single block for reader, default is 8MB.
+        :param io_profile: Collect statistics of the reader in read mode, which
+            are logged when closed, `MEGFILE_IO_PROFILE` by default.
         :returns: A file-like object.
         :raises ValueError: If an unacceptable mode is provided.
         """
@@ -653,6 +672,7 @@ class HdfsPath(URIPath):
                     max_retries=HDFS_MAX_RETRY_TIMES,
                     max_workers=max_workers,
                     content_stat=stat,
+                    io_profile=io_profile,
                 )
                 if _is_pickle(file_obj):
                     file_obj = io.BufferedReader(file_obj)  # type: ignore
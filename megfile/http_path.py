@@ -4,29 +4,49 @@ from functools import partial
 from io import BufferedReader, BytesIO
 from logging import getLogger as get_logger
 from threading import Lock
-from typing import Dict, Iterable, Iterator, Optional, Tuple, Union
+from typing import Callable, Dict, Iterable, Iterator, Optional, Tuple, Union
+from urllib.parse import urlsplit
 
 import requests
+from requests.adapters import HTTPAdapter
 from urllib3 import HTTPResponse
 
 from megfile.config import (
+    GLOBAL_MAX_WORKERS,
     HTTP_MAX_RETRY_TIMES,
+    IO_PROFILE,
     READER_BLOCK_SIZE,
     READER_MAX_BUFFER_SIZE,
 )
-from megfile.errors import http_should_retry, patch_method, translate_http_error
+from megfile.errors import (
+    http_should_retry,
+    patch_method,
+    translate_fs_error,
+    translate_http_error,
+)
 from megfile.interfaces import PathLike, Readable, StatResult, URIPath
 from megfile.lib.compat import fspath
-from megfile.lib.http_prefetch_reader import DEFAULT_TIMEOUT, HttpPrefetchReader
+from megfile.lib.http_downloader import HttpDownloader
+from megfile.lib.http_prefetch_reader import (
+    DEFAULT_TIMEOUT,
+    HttpPrefetchReader,
+    get_first_index_response,
+)
+from megfile.lib.metrics import (
+    count_session_connections,
+    get_body_size,
+    instrument_request,
+)
 from megfile.lib.url import get_url_scheme
 from megfile.smart_path import SmartPath
-from megfile.utils import _is_pickle, binary_open, cached_property
+from megfile.utils import _is_pickle, binary_open, cached_property, process_local
 
 __all__ = [
     "HttpPath",
     "HttpsPath",
     "get_http_session",
     "is_http",
+    "http_download",
 ]
 
 _logger = get_logger(__name__)
@@ -50,6 +70,13 @@ def get_http_session(
     session.headers.update(headers or {})
     session.cookies.update(cookies or {})
     session.trust_env = trust_env
+    # keep enough alive connections for concurrent ranged requests
+    adapter = HTTPAdapter(
+        pool_connections=GLOBAL_MAX_WORKERS, pool_maxsize=GLOBAL_MAX_WORKERS
+    )
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    count_session_connections(session)
     retry_status_codes = set(status_forcelist)
 
     def after_callback(response, *args, **kwargs):
@@ -101,13 +128,24 @@ def get_http_session(
                     file_info[1] = seek_or_reopen(file_info[1])
                     files[key] = file_info
 
-    session.request = patch_method(
-        partial(session.request, timeout=timeout, **kwargs),
-        max_retries=HTTP_MAX_RETRY_TIMES,
-        should_retry=http_should_retry,
-        before_callback=before_callback,
-        after_callback=after_callback,
-        retry_callback=retry_callback,
+    def describe_request(method, url, data=None, **kwargs):
+        return method.upper(), urlsplit(url).hostname or "", get_body_size(data)
+
+    def get_endpoint(method, url, *args, **kwargs):
+        return urlsplit(url).netloc
+
+    session.request = instrument_request(
+        patch_method(
+            partial(session.request, timeout=timeout, **kwargs),
+            max_retries=HTTP_MAX_RETRY_TIMES,
+            should_retry=http_should_retry,
+            before_callback=before_callback,
+            after_callback=after_callback,
+            retry_callback=retry_callback,
+            endpoint=get_endpoint,
+        ),
+        "http",
+        describe_request,
     )
     return session
 
@@ -166,7 +204,13 @@ class HttpPath(URIPath):
 
     @cached_property
     def session(self):
-        return get_http_session(status_forcelist=(), **self.request_kwargs)
+        # share keep-alive connections between paths with the same request kwargs
+        return process_local(
+            "http_session:%r" % sorted(self.request_kwargs.items()),
+            get_http_session,
+            status_forcelist=(),
+            **self.request_kwargs,
+        )
 
     @binary_open
     def open(
@@ -177,6 +221,7 @@ class HttpPath(URIPath):
         max_buffer_size: int = READER_MAX_BUFFER_SIZE,
         block_forward: Optional[int] = None,
         block_size: int = READER_BLOCK_SIZE,
+        io_profile: bool = IO_PROFILE,
         **kwargs,
     ) -> Union[BufferedReader, HttpPrefetchReader]:
         """Open a BytesIO to read binary data of given http(s) url
@@ -198,6 +243,8 @@ class HttpPath(URIPath):
         :param block_forward: How many blocks of data cached from offset position
         :param block_size: Size of single block, 8MB by default. Each block will
             be uploaded or downloaded by single thread.
+        :param io_profile: Collect statistics of the reader, which are logged
+            when closed, `MEGFILE_IO_PROFILE` by default.
         :return: A file-like object with http(s) data
         """
         if mode not in ("rb",):
@@ -205,33 +252,43 @@ class HttpPath(URIPath):
 
         response = None
         try:
-            response = self.session.get(self.path_with_protocol, stream=True)
+            # Ask for the first block only, if server supports Range, the response
+            # tells the content size and serves as the first block of the reader
+            response = self.session.get(
+                self.path_with_protocol,
+                headers={"Range": f"bytes=0-{block_size - 1}"},
+                stream=True,
+            )
+            first_index_response = get_first_index_response(response)
+            if first_index_response is None and response.status_code in (206, 416):
+                # empty file, or range of encoded content which can't be a block
+                response.close()
+                response = None
+                response = self.session.get(self.path_with_protocol, stream=True)
             response.raise_for_status()
         except Exception as error:
             if response:
                 response.close()
             raise translate_http_error(error, self.path_with_protocol)
 
-        headers = response.headers
-        content_stat = _make_stat(headers)
-        content_size = content_stat.size
-        if (
-            headers.get("Accept-Ranges") == "bytes"
-            and content_size >= block_size * 2
-            and not headers.get("Content-Encoding")
-        ):
+        if first_index_response is not None:
             response.close()
 
+            content_stat = _make_stat(response.headers)._replace(
+                size=first_index_response["ContentSize"]
+            )
             reader = HttpPrefetchReader(
                 self,
                 session=self.session,
-                content_size=content_size,
+                content_size=content_stat.size,
                 content_stat=content_stat,
                 block_size=block_size,
                 max_buffer_size=max_buffer_size,
                 block_forward=block_forward,
                 max_retries=HTTP_MAX_RETRY_TIMES,
                 max_workers=max_workers,
+                first_index_response=first_index_response,
+                io_profile=io_profile,
             )
             if _is_pickle(reader):
                 reader = BufferedReader(reader)  # type: ignore
@@ -311,6 +368,74 @@ class HttpsPath(HttpPath):
     protocol = "https"
 
 
+def http_download(
+    src_url: PathLike,
+    dst_url: PathLike,
+    callback: Optional[Callable[[int], None]] = None,
+    followlinks: bool = False,
+    overwrite: bool = True,
+    *,
+    max_workers: Optional[int] = None,
+    block_size: int = READER_BLOCK_SIZE,
+) -> None:
+    """
+    Downloads a file from http(s) to local filesystem.
+
+    If server supports Range, file is downloaded with multiple connections,
+    and an interrupted download will be resumed from the partial file.
+
+    :param src_url: source http(s) path
+    :param dst_url: target fs path
+    :param callback: Called periodically during copy, and the input parameter is
+        the data size (in bytes) of copy since the last call
+    :param followlinks: ignore this parameter, just for compatibility
+    :param overwrite: whether or not overwrite file when exists, default is True
+    :param max_workers: Max download connection number, `None` by default,
+        will use `GLOBAL_MAX_WORKERS` connections.
+    :param block_size: Min size of range downloaded by single connection,
+        8MB by default.
+    """
+    from megfile.fs_path import FSPath, is_fs
+
+    if not is_fs(dst_url):
+        raise OSError(f"dst_url is not fs path: {dst_url}")
+    if str(dst_url).endswith("/"):
+        raise IsADirectoryError("Is a directory: %r" % dst_url)
+
+    dst_path = FSPath(dst_url)
+    if not overwrite and dst_path.exists():
+        return
+
+    if isinstance(src_url, HttpPath):
+        src_path: HttpPath = src_url
+    else:
+        src_path: HttpPath = HttpPath(src_url)
+
+    dst_path.parent.makedirs(exist_ok=True)
+
+    downloader = HttpDownloader(
+        src_path.path_with_protocol,
+        dst_path.path_without_protocol,  # pyre-ignore[6]
+        session=src_path.session,
+        block_size=block_size,
+        max_workers=max_workers or GLOBAL_MAX_WORKERS,
+        max_retries=HTTP_MAX_RETRY_TIMES,
+        callback=callback,
+    )
+    try:
+        headers = downloader.download()
+    except Exception as error:
+        if isinstance(error, OSError) and not isinstance(
+            error, requests.exceptions.RequestException
+        ):
+            raise translate_fs_error(error, dst_url)
+        raise translate_http_error(error, src_path.path_with_protocol)
+
+    src_stat = _make_stat(headers)
+    if src_stat.mtime:
+        dst_path.utime(src_stat.mtime, src_stat.mtime)
+
+
 class Response(Readable[bytes]):
     def __init__(self, raw: HTTPResponse) -> None:
         super().__init__()
@@ -21,7 +21,7 @@ class BaseMemoryHandler(Readable[bytes], Seekable, Writable[bytes], ABC):
         if mode not in ("rb", "wb", "ab", "rb+", "wb+", "ab+"):
             raise ValueError("unacceptable mode: %r" % mode)
 
-        self._fileobj = BytesIO()
+        self._fileobj = self._create_fileobj()
         self._download_fileobj()
 
         if atomic:
@@ -84,6 +84,9 @@ class BaseMemoryHandler(Readable[bytes], Seekable, Writable[bytes], ABC):
             self.seek(0, os.SEEK_END)
         self._fileobj.writelines(lines)
 
+    def _create_fileobj(self):
+        return BytesIO()
+
     @abstractmethod
     def _download_fileobj(self):
         pass
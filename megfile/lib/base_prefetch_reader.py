@@ -1,20 +1,29 @@
 import os
 from abc import ABC, abstractmethod
+from bisect import bisect_right
 from collections import OrderedDict
 from concurrent.futures import Future, ThreadPoolExecutor
-from io import BytesIO
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from io import BytesIO, StringIO
+from itertools import accumulate
 from logging import getLogger as get_logger
 from math import ceil
-from typing import Optional
+from time import perf_counter
+from typing import Iterator, List, Optional, Union
 
 from megfile.config import (
     DEFAULT_MAX_RETRY_TIMES,
     GLOBAL_MAX_WORKERS,
+    IO_PROFILE,
     NEWLINE,
     READER_BLOCK_SIZE,
+    READER_HEDGE_MAX_RATIO,
+    READER_HEDGE_PERCENTILE,
     READER_MAX_BUFFER_SIZE,
 )
 from megfile.interfaces import Readable, Seekable
+from megfile.lib.hedge_policy import HedgePolicy, first_successful
+from megfile.lib.io_stats import ReaderIOStats
 from megfile.pathlike import UNKNOWN_STAT, StatResult
 from megfile.utils import ProcessLocal, process_local
 
@@ -38,9 +47,23 @@ class BasePrefetchReader(Readable[bytes], Seekable, ABC):
         max_retries: int = DEFAULT_MAX_RETRY_TIMES,
         max_workers: Optional[int] = None,
         content_stat=UNKNOWN_STAT,
+        io_profile: bool = IO_PROFILE,
+        hedge_percentile: float = READER_HEDGE_PERCENTILE,
         **kwargs,
     ):
         self._content_stat = content_stat
+        self._io_stats = ReaderIOStats() if io_profile else None
+
+        # latencies are shared by readers of the same class in this process
+        self._hedge_policy = None
+        self._fetch_start_times = {}
+        if hedge_percentile > 0:
+            self._hedge_policy = process_local(
+                f"{self.__class__.__name__}.hedge_policy:{hedge_percentile}",
+                HedgePolicy,
+                percentile=hedge_percentile,
+                max_ratio=READER_HEDGE_MAX_RATIO,
+            )
         self._is_global_executor = False
         if max_workers is None:
             self._executor = process_local(
@@ -82,6 +105,9 @@ class BasePrefetchReader(Readable[bytes], Seekable, ABC):
 
         self._content_size = self._get_content_size()
         self._block_stop = ceil(self._content_size / block_size)
+        if self._io_stats is not None and self._future_key(0) in self._futures:
+            # the first block may be fetched when getting content size
+            self._io_stats.add_fetched(self._get_block_size(0))
 
         self._offset = 0
         self._cached_buffer = None
@@ -119,6 +145,13 @@ class BasePrefetchReader(Readable[bytes], Seekable, ABC):
     def mode(self) -> str:
         return "rb"
 
+    @property
+    def io_stats(self) -> Optional[ReaderIOStats]:
+        """Live statistics of this reader, None if io_profile is disabled"""
+        if self._io_stats is not None:
+            self._io_stats.block_forward = self._block_forward
+        return self._io_stats
+
     def tell(self) -> int:
         return self._offset
 
@@ -148,6 +181,11 @@ class BasePrefetchReader(Readable[bytes], Seekable, ABC):
         if target_offset == self._offset:
             return target_offset
 
+        if self._io_stats is not None:
+            self._io_stats.add_seek(self._offset, target_offset)
+        return self._seek_offset(target_offset)
+
+    def _seek_offset(self, target_offset: int) -> int:
         self._offset = max(min(target_offset, self._content_size), 0)
         block_index = self._offset // self._block_size
         block_offset = self._offset % self._block_size
@@ -199,6 +237,7 @@ class BasePrefetchReader(Readable[bytes], Seekable, ABC):
         data = self._buffer.readline(size)
         if len(data) == size or (len(data) > 0 and data[-1] == NEWLINE):
             self._offset += len(data)
+            self._count_consumed(len(data))
             return data
 
         buffer = BytesIO()
@@ -211,15 +250,176 @@ class BasePrefetchReader(Readable[bytes], Seekable, ABC):
                 break
 
         self._offset += buffer.tell()
+        self._count_consumed(buffer.tell())
         return buffer.getvalue()
 
+    def iter_lines(
+        self, encoding: Optional[str] = None, errors: Optional[str] = None
+    ) -> Union[Iterator[bytes], Iterator[str]]:
+        """Iterate lines from the current position, retaining newline.
+
+        Faster than readline, since every block buffer is split into lines at once.
+        If encoding is given, lines are decoded block by block, and newlines are
+        translated like text mode; the position is then moved to the end of the
+        decoded block, like the read-ahead of TextIOWrapper.
+
+        :param encoding: Encoding of lines, which should be ASCII compatible,
+            e.g. utf-8. Lines are bytes if None
+        :param errors: Error handling scheme of decoding, `strict` by default
+        :returns: A line generator
+        """
+        if encoding is None:
+            return self._iter_lines()
+        if "\n".encode(encoding) != b"\n":
+            raise ValueError("encoding is not ASCII compatible: %r" % encoding)
+        return self._iter_text_lines(encoding, errors or "strict")
+
+    def iter_lines_batched(
+        self, max_lines: int = 65536, max_bytes: Optional[int] = None
+    ) -> Iterator[List[bytes]]:
+        """Iterate batches of lines from the current position, retaining newline.
+
+        Every batch has at most max_lines lines, and at most max_bytes bytes unless
+        it is a single line longer than max_bytes. Batches are sliced from lines of
+        block buffers, without work for every line in Python.
+
+        :param max_lines: Max number of lines in a batch
+        :param max_bytes: Max total size of lines in a batch, no limit if None
+        :returns: A generator of line lists
+        """
+        if max_lines <= 0:
+            raise ValueError("max_lines should be positive: %r" % max_lines)
+        if max_bytes is not None and max_bytes <= 0:
+            raise ValueError("max_bytes should be positive: %r" % max_bytes)
+        return self._iter_lines_batched(max_lines, max_bytes)
+
+    def _iter_lines_batched(
+        self, max_lines: int, max_bytes: Optional[int]
+    ) -> Iterator[List[bytes]]:
+        batch, batch_size = [], 0
+        start_offset = self._offset
+        try:
+            for lines in self._iter_line_blocks():
+                ends = list(accumulate(map(len, lines)))
+                start = 0
+                while start < len(lines):
+                    base = ends[start - 1] if start > 0 else 0
+                    stop = min(len(lines), start + max_lines - len(batch))
+                    if max_bytes is not None:
+                        stop = bisect_right(
+                            ends, base + max_bytes - batch_size, start, stop
+                        )
+                        if stop == start and not batch:
+                            stop = start + 1
+                    if stop > start:
+                        batch.extend(lines[start:stop])
+                        batch_size += ends[stop - 1] - base
+                        start = stop
+                    if (
+                        start < len(lines)
+                        or len(batch) >= max_lines
+                        or (max_bytes is not None and batch_size >= max_bytes)
+                    ):
+                        self._offset += batch_size
+                        yield batch
+                        batch, batch_size = [], 0
+            if batch:
+                self._offset += batch_size
+                yield batch
+        finally:
+            self._sync_buffer(start_offset)
+
+    def _iter_lines(self) -> Iterator[bytes]:
+        start_offset = self._offset
+        try:
+            for lines in self._iter_line_blocks():
+                for line in lines:
+                    self._offset += len(line)
+                    yield line
+        finally:
+            self._sync_buffer(start_offset)
+
+    def _iter_text_lines(self, encoding: str, errors: str) -> Iterator[str]:
+        carry = []
+        start_offset = self._offset
+        try:
+            for data in self._iter_blocks():
+                index = data.rfind(b"\n") + 1
+                if index == 0:
+                    carry.append(data)
+                    continue
+                carry.append(data[:index])
+                content = b"".join(carry)
+                carry = [data[index:]]
+                self._offset += len(content)
+                yield from StringIO(content.decode(encoding, errors), newline=None)
+            content = b"".join(carry)
+            if content:
+                self._offset += len(content)
+                yield from StringIO(content.decode(encoding, errors), newline=None)
+        finally:
+            self._sync_buffer(start_offset)
+
+    def _iter_line_blocks(self) -> Iterator[List[bytes]]:
+        """Yield lines of every block, the line across blocks is yielded with the
+        lines of the block it ends in. Caller should update the offset."""
+        carry = []
+        for data in self._iter_blocks():
+            if data.rfind(b"\n") < 0:
+                carry.append(data)
+                continue
+            lines = BytesIO(data).readlines()
+            if carry:
+                carry.append(lines[0])
+                lines[0] = b"".join(carry)
+                carry = []
+            if lines[-1][-1] != NEWLINE:
+                carry.append(lines.pop())
+            yield lines
+        if carry:
+            yield [b"".join(carry)]
+
+    def _iter_blocks(self) -> Iterator[bytes]:
+        """Yield the rest of the current block, and the following blocks"""
+        if self.closed:
+            raise IOError("file already closed: %r" % self.name)
+
+        if len(self._seek_history) > 0:
+            self._seek_history[-1].read_count += 1
+        offset = self._offset
+        if offset >= self._content_size:
+            return
+
+        buffer = self._buffer
+        while True:
+            data = buffer.read()
+            offset += len(data)
+            yield data
+            if offset >= self._content_size:
+                return
+            buffer = self._next_buffer
+
+    def _sync_buffer(self, start_offset: int):
+        # Buffers are consumed ahead of lines, make the current block buffer
+        # located at self._offset again
+        self._block_index = self._offset // self._block_size
+        self._cached_offset = self._offset % self._block_size
+        self._count_consumed(self._offset - start_offset)
+
+    def _count_consumed(self, size: int):
+        if self._io_stats is not None:
+            self._io_stats.bytes_consumed += size
+
     def _read(self, size: int) -> bytes:
         if size == 0 or self._offset >= self._content_size:
             return b""
 
         resp = self._fetch_response(start=self._offset, end=self._offset + size - 1)
         data = resp["Body"].read()
-        self.seek(size, os.SEEK_CUR)
+        if self._io_stats is not None:
+            self._io_stats.add_fetched(len(data))
+            self._io_stats.bytes_consumed += len(data)
+        self._seek_offset(self._offset + size)
         return data
 
     def readinto(self, buffer: bytearray) -> int:
@@ -254,6 +454,7 @@ class BasePrefetchReader(Readable[bytes], Seekable, ABC):
         buffer[: len(data)] = data
         if len(data) == size:
             self._offset += len(data)
+            self._count_consumed(size)
             return size
 
         offset = len(data)
@@ -264,6 +465,7 @@ class BasePrefetchReader(Readable[bytes], Seekable, ABC):
             offset += len(data)
 
         self._offset += offset
+        self._count_consumed(size)
         return size
 
     @property
@@ -281,7 +483,12 @@ class BasePrefetchReader(Readable[bytes], Seekable, ABC):
     @property
     def _buffer(self) -> BytesIO:
         if self._block_capacity == 0:
-            buffer = self._fetch_buffer(index=self._block_index)
+            if self._io_stats is not None:
+                self._io_stats.misses += 1
+            start_time = perf_counter()
+            buffer = self._fetch_block(self._block_index)
+            if self._io_stats is not None:
+                self._io_stats.blocked_time += perf_counter() - start_time
             if self._cached_offset is not None:
                 offset = self._cached_offset
             else:
@@ -291,6 +498,8 @@ class BasePrefetchReader(Readable[bytes], Seekable, ABC):
             return buffer
 
         if self._cached_offset is not None:
+            if self._io_stats is not None:
+                self._count_cache(self._io_stats, self._block_index)
             if self._block_forward > 0:  # pyre-ignore[58]
                 start = self._block_index
                 stop = min(start + self._block_forward, self._block_stop)
@@ -302,7 +511,10 @@ class BasePrefetchReader(Readable[bytes], Seekable, ABC):
                 self._submit_future(self._block_index)
             self._cleanup_futures()
 
+            start_time = perf_counter()
             self._cached_buffer = self._fetch_future_result(self._block_index)
+            if self._io_stats is not None:
+                self._io_stats.blocked_time += perf_counter() - start_time
             self._cached_buffer.seek(self._cached_offset)
             self._cached_offset = None
 
@@ -357,17 +569,51 @@ class BasePrefetchReader(Readable[bytes], Seekable, ABC):
         response = self._fetch_response(start=start, end=end)
         return response["Body"]
 
+    def _get_block_size(self, index: int) -> int:
+        start = index * self._block_size
+        return max(min(self._block_size, self._content_size - start), 0)
+
+    def _fetch_block(self, index: int) -> BytesIO:
+        if self._hedge_policy is None:
+            buffer = self._fetch_buffer(index)
+        else:
+            start_time = self._fetch_start_times[index] = perf_counter()
+            try:
+                buffer = self._fetch_buffer(index)
+            finally:
+                self._fetch_start_times.pop(index, None)
+            self._hedge_policy.record(perf_counter() - start_time)
+        if self._io_stats is not None:
+            self._io_stats.add_fetched(self._get_block_size(index))
+        return buffer
+
+    def _count_cache(self, stats: ReaderIOStats, index: int):
+        future = self._futures.get(self._future_key(index))
+        if future is None:
+            stats.misses += 1
+        elif future.done():
+            stats.hits += 1
+        else:
+            stats.waits += 1
+
+    def _future_key(self, index: int):
+        return index
+
     def _submit_future(self, index: int):
         if index < 0 or index >= self._block_stop:
             return
-        self._futures.submit(self._executor, index, self._fetch_buffer, index)
+        self._futures.submit(
+            self._executor, self._future_key(index), self._fetch_block, index
+        )
 
     def _insert_futures(self, index: int, future: Future):
-        self._futures[index] = future
+        self._futures[self._future_key(index)] = future
 
     def _fetch_future_result(self, index: int):
         try:
-            return self._futures.result(index)
+            if self._hedge_policy is not None:
+                return self._hedged_future_result(index)
+            return self._futures.result(self._future_key(index))
         except KeyError:
             # The current block may have been evicted from the LRU future cache before
             # we consume it. Bypass the future manager and fetch this block directly
@@ -382,13 +628,53 @@ class BasePrefetchReader(Readable[bytes], Seekable, ABC):
                 self.name,
                 index,
             )
-            return self._fetch_buffer(index)
+            return self._fetch_block(index)
+
+    def _hedged_future_result(self, index: int):
+        # Send a duplicated request if the block is fetched longer than usual, and
+        # take whichever finishes first
+        key = self._future_key(index)
+        future = self._futures[key]
+        self._futures.move_to_end(key, last=True)
+        threshold = self._hedge_policy.threshold()  # pyre-ignore[16]
+        if future.done() or threshold is None:
+            return future.result()
+
+        start_time = self._fetch_start_times.get(index, perf_counter())
+        try:
+            return future.result(timeout=start_time + threshold - perf_counter())
+        except FutureTimeoutError:
+            pass
+        if not future.running() or not self._hedge_policy.try_hedge():
+            return future.result()
+
+        _logger.debug("hedge slow request: %r, key: %r" % (self.name, index))
+        if self._io_stats is not None:
+            self._io_stats.hedges += 1
+        hedge = process_local(
+            "BasePrefetchReader.hedge_executor",
+            ThreadPoolExecutor,
+            max_workers=GLOBAL_MAX_WORKERS,
+        ).submit(self._fetch_block, index)
+        future = first_successful(future, hedge)
+        if key in self._futures:
+            self._futures[key] = future
+        return future.result()
 
     def _cleanup_futures(self):
-        self._futures.cleanup(self._block_capacity)
+        self._count_evictions(self._futures.cleanup(self._block_capacity))
+
+    def _count_evictions(self, keys: list):
+        if self._io_stats is not None:
+            self._io_stats.evictions += len(keys)
+
+    def _log_io_stats(self):
+        if self._io_stats is not None:
+            _logger.info("io stats of %r: %s" % (self.name, self.io_stats))
 
     def _close(self):
         _logger.debug("close file: %r" % self.name)
+        self._log_io_stats()
 
         if not self._is_global_executor:
             self._executor.shutdown()
@@ -1,42 +1,163 @@
 import os
+from bisect import bisect_right
+from concurrent.futures import Future, ThreadPoolExecutor
 from io import BytesIO, StringIO
-from typing import IO, AnyStr, List, Optional, Union
+from typing import IO, AnyStr, Callable, Dict, List, Optional, Union
 
+from megfile.config import GLOBAL_MAX_WORKERS
 from megfile.interfaces import Readable, Seekable
-from megfile.utils import get_content_size, get_mode, get_name, is_readable
+from megfile.utils import (
+    get_content_size,
+    get_mode,
+    get_name,
+    is_readable,
+    process_local,
+)
 
 NEWLINE = ord("\n")
 
 
 class CombineReader(Readable, Seekable):
-    def __init__(self, file_objects: List[IO], name: str):
+    """
+    Reader of concatenated content of file objects.
+
+    If sizes of file objects are given, file objects could be functions which open
+    the file, and files are opened lazily when they are read. The next
+    block_forward files are opened in background while the current one is being
+    read, and files which have been read are closed.
+    """
+
+    def __init__(
+        self,
+        file_objects: List[Union[IO, Callable[[], IO]]],
+        name: str,
+        *,
+        sizes: Optional[List[int]] = None,
+        mode: str = "rb",
+        block_forward: int = 0,
+        max_workers: Optional[int] = None,
+    ):
         self._file_objects = file_objects
         self._blocks_sizes = []
         self._content_size = 0
         self._offset = 0
         self._name = name
         self._mode = None
-        for file_object in self._file_objects:
-            if not is_readable(file_object):
-                raise IOError("not readable: %r" % get_name(file_object))
-            mode = get_mode(file_object)
-            if self._mode is None:
-                self._mode = mode
-            if self._mode != mode:
-                raise IOError(
-                    "inconsistent mode: %r, expected: %r, got: %r"
-                    % (get_name(file_object), self._mode, mode)
+        self._block_forward = block_forward
+        self._opened: Dict[int, IO] = {}
+        self._opening: Dict[int, Future] = {}
+        self._current_index: Optional[int] = None
+
+        if sizes is None:
+            for index, file_object in enumerate(self._file_objects):
+                self._check_file_object(file_object)  # pyre-ignore[6]
+                self._opened[index] = file_object  # pyre-ignore[6]
+                self._blocks_sizes.append(self._content_size)
+                self._content_size += get_content_size(file_object)  # pyre-ignore[6]
+        else:
+            if len(sizes) != len(self._file_objects):
+                raise ValueError(
+                    "sizes and file_objects have different length: %d != %d"
+                    % (len(sizes), len(self._file_objects))
                 )
-            self._blocks_sizes.append(self._content_size)
-            self._content_size += get_content_size(file_object)
+            self._mode = mode
+            for index, (file_object, size) in enumerate(zip(file_objects, sizes)):
+                if not callable(file_object):
+                    self._check_file_object(file_object)
+                    self._opened[index] = file_object
+                self._blocks_sizes.append(self._content_size)
+                self._content_size += size
         self._blocks_sizes.append(self._content_size)
 
+        self._is_global_executor = False
+        if max_workers is None:
+            self._executor = process_local(
+                "CombineReader.executor",
+                ThreadPoolExecutor,
+                max_workers=GLOBAL_MAX_WORKERS,
+            )
+            self._is_global_executor = True
+        else:
+            self._executor = ThreadPoolExecutor(max_workers=max_workers)
+
+    def _check_file_object(self, file_object: IO):
+        if not is_readable(file_object):
+            raise IOError("not readable: %r" % get_name(file_object))
+        mode = get_mode(file_object)
+        if self._mode is None:
+            self._mode = mode
+        if self._mode != mode:
+            raise IOError(
+                "inconsistent mode: %r, expected: %r, got: %r"
+                % (get_name(file_object), self._mode, mode)
+            )
+
+    def _is_lazy(self, index: int) -> bool:
+        return callable(self._file_objects[index])
+
+    def _open(self, index: int) -> IO:
+        file_object = self._file_objects[index]()  # pyre-ignore[29]
+        try:
+            self._check_file_object(file_object)
+        except Exception:
+            file_object.close()
+            raise
+        return file_object
+
+    def _get_file_object(self, index: int) -> IO:
+        file_object = self._opened.get(index)
+        if file_object is None:
+            future = self._opening.pop(index, None)
+            if future is not None:
+                file_object = future.result()
+            else:
+                file_object = self._open(index)
+            self._opened[index] = file_object
+        if index != self._current_index:
+            self._current_index = index
+            self._forward(index)
+        return file_object
+
+    def _forward(self, index: int):
+        """Close files not needed, and open the following block_forward non-empty
+        files in background"""
+        forward_indexes = []
+        next_index = index + 1
+        while len(forward_indexes) < self._block_forward and next_index < len(
+            self._file_objects
+        ):
+            if self._blocks_sizes[next_index + 1] > self._blocks_sizes[next_index]:
+                forward_indexes.append(next_index)
+            next_index += 1
+        needed_indexes = set(forward_indexes)
+        needed_indexes.add(index)
+
+        for other_index in list(self._opened):
+            if other_index not in needed_indexes and self._is_lazy(other_index):
+                self._opened.pop(other_index).close()
+        for other_index in list(self._opening):
+            if other_index not in needed_indexes:
+                self._release_future(self._opening.pop(other_index))
+        for next_index in forward_indexes:
+            if next_index in self._opened or next_index in self._opening:
+                continue
+            self._opening[next_index] = self._executor.submit(self._open, next_index)
+
+    def _release_future(self, future: Future):
+        def close_file_object(future: Future):
+            if not future.cancelled() and future.exception() is None:
+                future.result().close()
+
+        if not future.cancel():
+            future.add_done_callback(close_file_object)
+
     @property
     def _block_index_and_offset(self):
-        for index, size in enumerate(self._blocks_sizes):
-            if self._offset < size:
-                return index - 1, self._offset - self._blocks_sizes[index - 1]
-        raise IOError("offset out of range: %d" % self._offset)  # pragma: no cover
+        if self._offset >= self._content_size:
+            raise IOError("offset out of range: %d" % self._offset)  # pragma: no cover
+        # skip empty files, whose offset equals to the offset of next file
+        index = bisect_right(self._blocks_sizes, self._offset) - 1
+        return index, self._offset - self._blocks_sizes[index]
 
     @property
     def name(self) -> str:
@@ -44,21 +165,34 @@ class CombineReader(Readable, Seekable):
 
     @property
     def mode(self) -> str:
-        return self._mode
+        return self._mode  # pyre-ignore[7]
 
     def tell(self) -> int:
         return self._offset
 
     def _empty_bytes(self) -> AnyStr:  # pyre-ignore[34]
-        if "b" in self._mode:
+        if "b" in self._mode:  # pyre-ignore[58]
             return b""  # pyre-ignore[7]
         return ""  # pyre-ignore[7]
 
     def _empty_buffer(self) -> Union[BytesIO, StringIO]:
-        if "b" in self._mode:
+        if "b" in self._mode:  # pyre-ignore[58]
             return BytesIO()
         return StringIO()
 
+    def _read_block(self, method: str, size: int) -> AnyStr:  # pyre-ignore[34]
+        block_index, block_offset = self._block_index_and_offset
+        file_object = self._get_file_object(block_index)
+        if file_object.tell() != block_offset:
+            file_object.seek(block_offset)
+        data = getattr(file_object, method)(size)
+        if not data:
+            raise IOError(
+                "unexpected end of file: %r, offset: %d"
+                % (get_name(file_object), block_offset)
+            )
+        return data
+
     def read(self, size: Optional[int] = None) -> AnyStr:  # pyre-ignore[34]
         if self._offset >= self._content_size:
             return self._empty_bytes()
@@ -66,9 +200,7 @@ class CombineReader(Readable, Seekable):
             size = self._content_size - self._offset
         buffer = self._empty_buffer()
         while size > 0 and self._offset < self._content_size:
-            block_index, block_offset = self._block_index_and_offset
-            self._file_objects[block_index].seek(block_offset)
-            data = self._file_objects[block_index].read(size)
+            data = self._read_block("read", size)
             buffer.write(data)
             size -= len(data)
             self._offset += len(data)
@@ -79,19 +211,15 @@ class CombineReader(Readable, Seekable):
             return self._empty_bytes()
         if size is None or size < 0:
             size = self._content_size - self._offset
-        block_index, block_offset = self._block_index_and_offset
-        self._file_objects[block_index].seek(block_offset)
-        data = self._file_objects[block_index].readline(size)
+        data = self._read_block("readline", size)
         self._offset += len(data)
         if len(data) == size or (len(data) > 0 and data[-1] == NEWLINE):
             return data
         buffer = self._empty_buffer()
         buffer.write(data)
-        while True:
+        while self._offset < self._content_size:
             remain_size = size - buffer.tell()
-            block_index, block_offset = self._block_index_and_offset
-            self._file_objects[block_index].seek(block_offset)
-            data = self._file_objects[block_index].readline(remain_size)
+            data = self._read_block("readline", remain_size)
             buffer.write(data)
             self._offset += len(data)
             if buffer.tell() == size or data[-1] == NEWLINE:
@@ -116,8 +244,15 @@ class CombineReader(Readable, Seekable):
         return self._offset
 
     def _close(self):
-        for file_object in self._file_objects:
+        for future in self._opening.values():
+            self._release_future(future)
+        self._opening = {}
+        for file_object in self._opened.values():
             file_object.close()
+        self._opened = {}
+        self._current_index = None
+        if not self._is_global_executor:
+            self._executor.shutdown()
 
     def __del__(self) -> None:
         # CombineReader not close files in __del__
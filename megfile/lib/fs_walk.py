@@ -0,0 +1,145 @@
+import os
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from megfile.config import GLOBAL_MAX_WORKERS
+from megfile.utils import process_local
+
+__all__ = [
+    "parallel_walk",
+]
+
+WalkResult = Tuple[str, List[os.DirEntry], List[os.DirEntry]]
+
+
+def _list_dir(
+    root: str, followlinks: bool, stat: bool
+) -> Tuple[List[os.DirEntry], List[os.DirEntry]]:
+    """List directory, and split entries into directories and files.
+
+    Link is regarded as file if not followlinks, and entries which are neither
+    file nor directory (e.g. socket, broken link) are skipped.
+    """
+    dirs, files = [], []
+    with os.scandir(root) as entries:
+        for entry in entries:
+            if entry.is_symlink() and not followlinks:
+                files.append(entry)
+            elif entry.is_file():
+                files.append(entry)
+            elif entry.is_dir():
+                dirs.append(entry)
+    if stat:
+        # stat is cached in DirEntry, call it in worker thread
+        for entry in files:
+            entry.stat(follow_symlinks=False)
+    dirs.sort(key=lambda entry: entry.name)
+    files.sort(key=lambda entry: entry.name)
+    return dirs, files
+
+
+def _ordered_walk(
+    executor: ThreadPoolExecutor,
+    top: str,
+    followlinks: bool,
+    stat: bool,
+    max_pending: int,
+) -> Iterator[WalkResult]:
+    # directories are listed in advance, and yielded in the order of os.walk
+    futures: Dict[str, Future] = {}
+    stack = [top]
+    try:
+        while stack:
+            root = stack.pop()
+            future = futures.pop(root, None)
+            if future is not None:
+                dirs, files = future.result()
+            else:
+                dirs, files = _list_dir(root, followlinks, stat)
+            for entry in dirs:
+                if len(futures) >= max_pending:
+                    break
+                futures[entry.path] = executor.submit(
+                    _list_dir, entry.path, followlinks, stat
+                )
+            listed_dirs = list(dirs)
+            yield root, dirs, files
+            # dirs may be pruned in place by caller, like os.walk
+            walked_paths = {entry.path for entry in dirs}
+            for entry in listed_dirs:
+                if entry.path not in walked_paths:
+                    future = futures.pop(entry.path, None)
+                    if future is not None:
+                        future.cancel()
+            stack.extend(entry.path for entry in reversed(dirs))
+    finally:
+        for future in futures.values():
+            future.cancel()
+
+
+def _unordered_walk(
+    executor: ThreadPoolExecutor,
+    top: str,
+    followlinks: bool,
+    stat: bool,
+    max_pending: int,
+) -> Iterator[WalkResult]:
+    # directories are yielded as soon as they are listed
+    roots = deque([top])
+    futures: Dict[Future, str] = {}
+    try:
+        while roots or futures:
+            while roots and len(futures) < max_pending:
+                root = roots.popleft()
+                futures[executor.submit(_list_dir, root, followlinks, stat)] = root
+            done, _ = wait(futures, return_when=FIRST_COMPLETED)
+            for future in done:
+                root = futures.pop(future)
+                dirs, files = future.result()
+                yield root, dirs, files
+                roots.extend(entry.path for entry in dirs)
+    finally:
+        for future in futures:
+            future.cancel()
+
+
+def parallel_walk(
+    top: str,
+    followlinks: bool = False,
+    *,
+    ordered: bool = True,
+    stat: bool = False,
+    max_workers: Optional[int] = None,
+) -> Iterator[WalkResult]:
+    """Walk directory tree like os.walk, but directories are listed concurrently
+
+    :param top: Root directory
+    :param followlinks: False if regard symlink as file, else True
+    :param ordered: If True, yield in the same order as os.walk top-down with
+        sorted names; otherwise yield in the order listing finished
+    :param stat: If True, `DirEntry.stat(follow_symlinks=False)` of files is called
+        in worker thread, and cached in DirEntry
+    :param max_workers: Max thread number, `None` by default, will use global
+        thread pool with 8 threads.
+    :returns: A generator of (root, dirs, files), dirs and files are lists of
+        os.DirEntry sorted by name, and dirs can be modified in place to prune
+        the walk like os.walk
+    """
+    if max_workers is None:
+        executor = process_local(
+            "parallel_walk.executor",
+            ThreadPoolExecutor,
+            max_workers=GLOBAL_MAX_WORKERS,
+        )
+        max_pending = GLOBAL_MAX_WORKERS * 2
+    else:
+        executor = ThreadPoolExecutor(max_workers=max_workers)
+        max_pending = max_workers * 2
+
+    walk = _ordered_walk if ordered else _unordered_walk
+    try:
+        yield from walk(executor, top, followlinks, stat, max_pending)
+    finally:
+        if max_workers is not None:
+            executor.shutdown(wait=False)
@@ -5,9 +5,12 @@
 import os
 import re
 from collections import OrderedDict
-from typing import Callable, Iterator, List, NamedTuple, Tuple
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Dict, Iterator, List, NamedTuple, Tuple
 
+from megfile.config import GLOBAL_MAX_WORKERS
 from megfile.lib import fnmatch
+from megfile.utils import process_local
 
 
 class FSFunc(NamedTuple):
@@ -25,7 +28,10 @@ def _isdir(path: str) -> bool:
 
 
 def _scandir(dirname: str) -> Iterator[Tuple[str, bool]]:
-    for entry in sorted(list(os.scandir(dirname)), key=lambda t: t.name):
+    # sorted, since glob returns paths in ascending alphabetical order
+    with os.scandir(dirname) as it:
+        entries = sorted(it, key=lambda t: t.name)
+    for entry in entries:
         yield entry.name, entry.is_dir()
 
 
@@ -160,18 +166,68 @@ def _iterdir(dirname: str, dironly: bool, fs: FSFunc) -> Iterator[str]:
         return
 
 
+# Lists names and whether they are directories, empty if dirname can't be listed
+def _listdir(dirname: str, dironly: bool, fs: FSFunc) -> List[Tuple[str, bool]]:
+    if not dirname:
+        dirname = os.curdir
+    try:
+        return [
+            (name, isdir) for name, isdir in fs.scandir(dirname) if not dironly or isdir
+        ]
+    except OSError:
+        return []
+
+
 # Recursively yields relative pathnames inside a literal directory.
 def _rlistdir(dirname: str, dironly: bool, fs: FSFunc) -> Iterator[str]:
+    if fs.scandir is not _scandir:
+        yield from _rlistdir_with(dirname, lambda path: _listdir(path, dironly, fs))
+        return
+
+    # local subdirectories are listed concurrently before they are walked, which
+    # hides latency of listing on network file systems
+    executor = process_local(
+        "glob.executor", ThreadPoolExecutor, max_workers=GLOBAL_MAX_WORKERS
+    )
+    max_pending = GLOBAL_MAX_WORKERS * 2
+    futures: Dict[str, Future] = {}
+
+    def listdir(path: str) -> List[Tuple[str, bool]]:
+        future = futures.pop(path, None)
+        if future is None:
+            names = _listdir(path, dironly, fs)
+        else:
+            names = future.result()
+        for name, isdir in names:
+            if len(futures) >= max_pending:
+                break
+            if isdir and not _ishidden(name):
+                subdir = os.path.join(path, name) if path else name
+                futures[subdir] = executor.submit(_listdir, subdir, dironly, fs)
+        return names
+
+    try:
+        yield from _rlistdir_with(dirname, listdir)
+    finally:
+        for future in futures.values():
+            future.cancel()
+
+
+def _rlistdir_with(
+    dirname: str, listdir: Callable[[str], List[Tuple[str, bool]]]
+) -> Iterator[str]:
     names = OrderedDict()
-    for name in _iterdir(dirname, dironly, fs):
-        names.setdefault(name, 0)
-        names[name] += 1
-    for x, c in names.items():
+    for name, isdir in listdir(dirname):
+        count, is_any_dir = names.get(name, (0, False))
+        names[name] = (count + 1, is_any_dir or isdir)
+    for x, (c, isdir) in names.items():
         if not _ishidden(x):
             for _ in range(c):
                 yield x
+            if not isdir:
+                continue
             path = os.path.join(dirname, x) if dirname else x
-            for y in _rlistdir(path, dironly, fs):
+            for y in _rlistdir_with(path, listdir):
                 yield os.path.join(x, y)
 
 
@@ -0,0 +1,333 @@
+import hashlib
+import struct
+import zlib
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import IO, Callable, Dict, Iterable, List, Optional, Tuple
+
+from megfile.config import (
+    DEFAULT_HASH_BUFFER_SIZE,
+    GLOBAL_MAX_WORKERS,
+    WRITER_BLOCK_SIZE,
+)
+from megfile.interfaces import BasePath, Writable
+
+__all__ = [
+    "HASH_ALGORITHMS",
+    "new_hash",
+    "calculate_hashes",
+    "calculate_dir_md5",
+    "MultiHash",
+    "HashingWriter",
+    "Crc32Hash",
+    "Crc32cHash",
+    "MultipartEtagHash",
+]
+
+try:
+    from crc32c import crc32c as _crc32c  # pyre-ignore[21]
+except ImportError:  # pragma: no cover
+    _crc32c = None
+    try:
+        import google_crc32c  # pyre-ignore[21]
+
+        # google-crc32c falls back to a slow pure python implementation
+        if google_crc32c.implementation == "c":
+
+            def _crc32c(data, value=0):
+                return google_crc32c.extend(value, bytes(data))
+
+    except ImportError:
+        pass
+
+
+class Crc32Hash:
+    """hashlib-like wrapper of zlib.crc32"""
+
+    name = "crc32"
+    digest_size = 4
+
+    def __init__(self, data: bytes = b""):
+        self._value = 0
+        self.update(data)
+
+    def _extend(self, data, value: int) -> int:
+        return zlib.crc32(data, value)
+
+    def update(self, data) -> None:
+        self._value = self._extend(data, self._value)
+
+    def digest(self) -> bytes:
+        return struct.pack(">I", self._value)
+
+    def hexdigest(self) -> str:
+        return self.digest().hex()
+
+
+class Crc32cHash(Crc32Hash):
+    """hashlib-like crc32c (Castagnoli), the checksum used by S3 and GCS"""
+
+    name = "crc32c"
+
+    def __init__(self, data: bytes = b""):
+        if _crc32c is None:
+            raise ImportError(
+                "crc32c not found, please `pip install 'megfile[crc32c]'`"
+            )
+        super().__init__(data)
+
+    def _extend(self, data, value: int) -> int:
+        return _crc32c(data, value)  # pyre-ignore[29]
+
+
+class MultipartEtagHash:
+    """
+    hashlib-like digest compatible with S3 ETag of object uploaded in parts.
+
+    Content is split into parts of part_size. If there is only one part, the digest
+    is md5 of content, same as ETag of object uploaded by a single PUT; otherwise
+    it is md5 of concatenated md5 digests of parts, followed by "-<number of parts>".
+    """
+
+    name = "etag"
+
+    def __init__(self, data: bytes = b"", part_size: int = WRITER_BLOCK_SIZE):
+        self._part_size = int(part_size)
+        self._part_hash = hashlib.md5()  # nosec
+        self._part_offset = 0
+        self._part_digests = []
+        self.update(data)
+
+    def update(self, data) -> None:
+        data = memoryview(data)
+        while len(data) > 0:
+            if self._part_offset == self._part_size:
+                self._part_digests.append(self._part_hash.digest())
+                self._part_hash = hashlib.md5()  # nosec
+                self._part_offset = 0
+            size = min(len(data), self._part_size - self._part_offset)
+            self._part_hash.update(data[:size])
+            self._part_offset += size
+            data = data[size:]
+
+    def hexdigest(self) -> str:
+        if not self._part_digests:
+            return self._part_hash.hexdigest()
+        part_digests = self._part_digests + [self._part_hash.digest()]
+        return "%s-%d" % (
+            hashlib.md5(b"".join(part_digests)).hexdigest(),  # nosec
+            len(part_digests),
+        )
+
+
+HASH_ALGORITHMS = ("md5", "sha1", "sha256", "sha512", "crc32", "crc32c", "etag")
+
+
+def new_hash(algorithm: str, part_size: int = WRITER_BLOCK_SIZE):
+    """Create a hashlib-like object
+
+    :param algorithm: One of HASH_ALGORITHMS, or any algorithm supported by hashlib
+    :param part_size: Part size of multipart upload, only used by "etag"
+    """
+    if algorithm == "crc32":
+        return Crc32Hash()
+    if algorithm == "crc32c":
+        return Crc32cHash()
+    if algorithm == "etag":
+        return MultipartEtagHash(part_size=part_size)
+    return hashlib.new(algorithm)
+
+
+class MultiHash:
+    """Update several hashlib-like objects at once"""
+
+    def __init__(
+        self, algorithms: Iterable[str], part_size: int = WRITER_BLOCK_SIZE
+    ) -> None:
+        self._hashes = {
+            algorithm: new_hash(algorithm, part_size=part_size)
+            for algorithm in algorithms
+        }
+
+    def update(self, data) -> None:
+        for hash_object in self._hashes.values():
+            hash_object.update(data)
+
+    def hexdigests(self) -> Dict[str, str]:
+        return {
+            algorithm: hash_object.hexdigest()
+            for algorithm, hash_object in self._hashes.items()
+        }
+
+
+class HashingWriter(Writable[bytes]):
+    """
+    Wrapper of a binary writer, which calculates digests of content while it is
+    being written. Digests are available as `digests` after closed.
+    """
+
+    def __init__(self, file_object: IO[bytes], algorithms: Iterable[str]) -> None:
+        self._file_object = file_object
+        self._hasher = MultiHash(algorithms)
+        self._digests: Dict[str, str] = {}
+        self.__atomic__ = getattr(file_object, "atomic", False)
+
+    @property
+    def name(self) -> str:
+        return self._file_object.name
+
+    @property
+    def mode(self) -> str:
+        return self._file_object.mode
+
+    @property
+    def digests(self) -> Dict[str, str]:
+        """Hex digests keyed by algorithm name, empty before closed"""
+        return self._digests
+
+    def fileno(self) -> int:
+        return self._file_object.fileno()
+
+    def tell(self) -> int:
+        return self._file_object.tell()
+
+    def write(self, data: bytes) -> int:
+        result = self._file_object.write(data)
+        self._hasher.update(memoryview(data)[:result])
+        return result
+
+    def flush(self) -> None:
+        self._file_object.flush()
+
+    def _abort(self) -> None:
+        if hasattr(self._file_object, "abort"):
+            self._file_object.abort()  # pyre-ignore[16]
+        else:
+            self._file_object.close()
+
+    def _close(self) -> None:
+        self._file_object.close()
+        self._digests = self._hasher.hexdigests()
+
+
+def _read_chunks(file_object, buffer_size: int) -> Iterable[bytes]:
+    readinto = getattr(file_object, "readinto", None)
+    if readinto is None:
+        for chunk in iter(lambda: file_object.read(buffer_size), b""):
+            yield chunk
+        return
+    # two buffers, one is being hashed while the other is being read
+    buffers = [bytearray(buffer_size), bytearray(buffer_size)]
+    index = 0
+    while True:
+        buffer = buffers[index]
+        size = readinto(buffer)
+        if not size:
+            return
+        yield memoryview(buffer)[:size]
+        index = 1 - index
+
+
+def calculate_hashes(
+    file_object,
+    algorithms: Iterable[str] = ("md5",),
+    *,
+    part_size: int = WRITER_BLOCK_SIZE,
+    buffer_size: int = DEFAULT_HASH_BUFFER_SIZE,
+) -> Dict[str, str]:
+    """Calculate several digests of file content in one pass
+
+    Content is read in large chunks, and hashed in another thread while the next
+    chunk is being read. hashlib releases the GIL on large data, so reading and
+    hashing run in parallel.
+
+    :param file_object: Binary file-like object to read from
+    :param algorithms: Names of algorithms, see new_hash
+    :param part_size: Part size of multipart upload, only used by "etag"
+    :param buffer_size: Size of chunk read at one time
+    :returns: Hex digests keyed by algorithm name
+    """
+    hasher = MultiHash(algorithms, part_size=part_size)
+
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        future = None
+        for chunk in _read_chunks(file_object, buffer_size):
+            if future is not None:
+                future.result()
+            future = executor.submit(hasher.update, chunk)
+        if future is not None:
+            future.result()
+
+    return hasher.hexdigests()
+
+
+def calculate_dir_md5(
+    path: BasePath,
+    is_dir: Optional[Callable[[BasePath], bool]] = None,
+    recalculate: bool = False,
+    followlinks: bool = False,
+    max_workers: Optional[int] = None,
+) -> str:
+    """Calculate md5 of directory, which is md5 of md5 of its members in
+    alphabetical order.
+
+    Directories are listed and members are hashed concurrently on a worker pool.
+
+    :param path: Directory path
+    :param is_dir: Function to tell whether a member is a directory, if None,
+        members are listed by scandir() and told by their entries without
+        requests for every member
+    :param recalculate: Passed to md5() of members
+    :param followlinks: Passed to md5() of members
+    :param max_workers: Max worker number, `GLOBAL_MAX_WORKERS` by default
+    :returns: md5 of directory
+    """
+
+    def list_members(directory: BasePath) -> List[Tuple[BasePath, Optional[bool]]]:
+        if is_dir is None:
+            with directory.scandir() as entries:
+                members = [(entry.name, entry.is_dir()) for entry in entries]
+            return [
+                (directory.joinpath(name), member_is_dir)
+                for name, member_is_dir in sorted(members)
+            ]
+        members = [directory.joinpath(name) for name in directory.listdir()]
+        return [(member, None) for member in members]
+
+    def visit(member: BasePath, member_is_dir: Optional[bool]):
+        if member_is_dir is None:
+            member_is_dir = is_dir(member)  # pyre-ignore[29]
+        if member_is_dir:
+            return list_members(member)
+        return member.md5(recalculate=recalculate, followlinks=followlinks)
+
+    def fold(node) -> str:
+        if isinstance(node, str):
+            return node
+        hash_md5 = hashlib.md5()  # nosec
+        for child in node:
+            hash_md5.update(fold(child).encode())
+        return hash_md5.hexdigest()
+
+    # tree of results: a str is md5 of file, a list holds results of members
+    root: List = []
+    with ThreadPoolExecutor(max_workers=max_workers or GLOBAL_MAX_WORKERS) as executor:
+        pending: Dict[Future, tuple] = {}
+
+        def submit(members: List[Tuple[BasePath, Optional[bool]]], node: List):
+            node.extend([None] * len(members))
+            for index, (member, member_is_dir) in enumerate(members):
+                pending[executor.submit(visit, member, member_is_dir)] = (node, index)
+
+        submit(list_members(path), root)
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                node, index = pending.pop(future)
+                result = future.result()
+                if isinstance(result, str):
+                    node[index] = result
+                else:
+                    node[index] = []
+                    submit(result, node[index])
+
+    return fold(root)
@@ -3,6 +3,7 @@ from typing import Optional
 
 from megfile.config import (
     HDFS_MAX_RETRY_TIMES,
+    IO_PROFILE,
     READER_BLOCK_SIZE,
     READER_MAX_BUFFER_SIZE,
 )
@@ -34,6 +35,7 @@ class HdfsPrefetchReader(BasePrefetchReader):
         max_workers: Optional[int] = None,
         profile_name: Optional[str] = None,
         content_stat=UNKNOWN_STAT,
+        io_profile: bool = IO_PROFILE,
     ):
         self._path = hdfs_path
         self._client = client
@@ -46,6 +48,7 @@ class HdfsPrefetchReader(BasePrefetchReader):
             max_retries=max_retries,
             max_workers=max_workers,
             content_stat=content_stat,
+            io_profile=io_profile,
         )
 
     def _get_content_size_from_remote(self):
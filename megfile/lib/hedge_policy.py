@@ -0,0 +1,77 @@
+import threading
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, wait
+from typing import Optional
+
+__all__ = [
+    "HedgePolicy",
+    "first_successful",
+]
+
+
+class HedgePolicy:
+    """Decide when to send a duplicated request for a slow one
+
+    A request is hedged when it runs longer than the percentile of latencies of
+    recent requests, and hedges are at most max_ratio of all requests.
+
+    :param percentile: Percentile of latencies, e.g. 0.95
+    :param max_ratio: Max ratio of hedged requests to all requests
+    :param window: Number of recent latencies kept
+    :param min_samples: No request is hedged before this number of latencies known
+    """
+
+    def __init__(
+        self,
+        percentile: float,
+        max_ratio: float,
+        window: int = 256,
+        min_samples: int = 16,
+    ):
+        if not 0 < percentile < 1:
+            raise ValueError("percentile should be in (0, 1): %r" % percentile)
+        self._percentile = percentile
+        self._max_ratio = max_ratio
+        self._min_samples = min_samples
+        self._latencies = deque(maxlen=window)
+        self._requests = 0
+        self._hedges = 0
+        self._lock = threading.Lock()
+
+    def record(self, latency: float):
+        """Record latency of a finished request"""
+        with self._lock:
+            self._latencies.append(latency)
+            self._requests += 1
+
+    def threshold(self) -> Optional[float]:
+        """Seconds after which a running request should be hedged, None if there
+        are not enough latencies"""
+        with self._lock:
+            if len(self._latencies) < self._min_samples:
+                return None
+            latencies = sorted(self._latencies)
+        return latencies[
+            min(int(len(latencies) * self._percentile), len(latencies) - 1)
+        ]
+
+    def try_hedge(self) -> bool:
+        """Take a chance to hedge, return False if too many requests are hedged"""
+        with self._lock:
+            if self._hedges + 1 > self._requests * self._max_ratio:
+                return False
+            self._hedges += 1
+            return True
+
+
+def first_successful(*futures: Future) -> Future:
+    """Wait for the first future finished without error, or the last finished
+    future if all of them failed"""
+    pending = set(futures)
+    while True:
+        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+        for future in done:
+            if future.exception() is None:
+                return future
+        if not pending:
+            return done.pop()
@@ -0,0 +1,304 @@
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+from logging import getLogger as get_logger
+from threading import Lock
+from typing import Callable, List, Mapping, Optional
+
+import requests
+
+from megfile.config import GLOBAL_MAX_WORKERS, HTTP_MAX_RETRY_TIMES, READER_BLOCK_SIZE
+from megfile.errors import (
+    HttpBodyIncompleteError,
+    HttpFileChangedError,
+    http_should_retry,
+    patch_method,
+)
+from megfile.lib.http_prefetch_reader import get_content_size_from_content_range
+
+_logger = get_logger(__name__)
+
+PARTIAL_SUFFIX = ".megfile-part"
+STATE_SUFFIX = ".megfile-part.json"
+
+# size of data read from response at one time
+CHUNK_SIZE = 2**20
+
+
+class _Segment:
+    """Range [offset, end) of content, which is downloaded by one connection"""
+
+    def __init__(self, offset: int, end: int):
+        self.offset = offset
+        self.end = end
+        self.lock = Lock()
+
+    @property
+    def remaining(self) -> int:
+        return self.end - self.offset
+
+
+class HttpDownloader:
+    """
+    Download http content to a local file with multiple connections.
+
+    Content is split into ranges downloaded concurrently and written with pwrite.
+    When a connection finished its range, it takes over half of the largest
+    remaining range. Progress is saved in a state file beside the partial file,
+    so that an interrupted download resumes from where it stopped, as long as
+    ETag / Last-Modified / Content-Length of the content doesn't change.
+
+    If server doesn't support Range, or content is small, content is downloaded
+    with a single connection.
+    """
+
+    def __init__(
+        self,
+        url: str,
+        path: str,
+        *,
+        session: Optional[requests.Session] = None,
+        block_size: int = READER_BLOCK_SIZE,
+        max_workers: int = GLOBAL_MAX_WORKERS,
+        max_retries: int = HTTP_MAX_RETRY_TIMES,
+        callback: Optional[Callable[[int], None]] = None,
+    ):
+        self._url = url
+        self._path = path
+        self._partial_path = path + PARTIAL_SUFFIX
+        self._state_path = path + STATE_SUFFIX
+        self._session = session or requests.Session()
+        # user maybe put block_size with 'numpy.uint64' type
+        self._block_size = int(block_size)
+        self._max_workers = max_workers
+        self._max_retries = max_retries
+        self._callback = callback
+
+        self._content_size = 0
+        self._validator = {}
+        self._segments: List[_Segment] = []
+        self._segments_lock = Lock()
+        self._state_lock = Lock()
+        self._aborted = False
+
+    @property
+    def _if_range(self) -> Optional[str]:
+        return self._validator.get("ETag") or self._validator.get("Last-Modified")
+
+    def _check_unchanged(self, response: requests.Response):
+        if response.status_code != 206:
+            raise HttpFileChangedError(
+                "File changed during downloading: %r, status code: %d"
+                % (self._url, response.status_code)
+            )
+        for key, value in self._validator.items():
+            if value and response.headers.get(key) not in (None, value):
+                raise HttpFileChangedError(
+                    "File changed during downloading: %r, %s: %r != %r"
+                    % (self._url, key, response.headers.get(key), value)
+                )
+        content_size = get_content_size_from_content_range(response.headers)
+        if content_size is not None and content_size != self._content_size:
+            raise HttpFileChangedError(
+                "File changed during downloading: %r, size: %d != %d"
+                % (self._url, content_size, self._content_size)
+            )
+
+    def _load_state(self) -> Optional[List[_Segment]]:
+        try:
+            with open(self._state_path, "r") as f:
+                state = json.load(f)
+            partial_size = os.path.getsize(self._partial_path)
+        except (OSError, ValueError):
+            return None
+        if (
+            state.get("url") != self._url
+            or state.get("size") != self._content_size
+            or state.get("validator") != self._validator
+            or not any(self._validator.values())
+            or partial_size != self._content_size
+        ):
+            return None
+        return [_Segment(offset, end) for offset, end in state["segments"]]
+
+    def _save_state(self):
+        with self._segments_lock:
+            segments = [
+                [segment.offset, segment.end]
+                for segment in self._segments
+                if segment.remaining > 0
+            ]
+        state = {
+            "url": self._url,
+            "size": self._content_size,
+            "validator": self._validator,
+            "segments": segments,
+        }
+        with self._state_lock:
+            temp_path = self._state_path + ".tmp"
+            with open(temp_path, "w") as f:
+                json.dump(state, f)
+            os.replace(temp_path, self._state_path)
+
+    def _split_segments(self, segments: List[_Segment]) -> List[_Segment]:
+        total = sum(segment.remaining for segment in segments)
+        segment_size = max(-(-total // self._max_workers), self._block_size)
+        result = []
+        for segment in segments:
+            for offset in range(segment.offset, segment.end, segment_size):
+                result.append(_Segment(offset, min(offset + segment_size, segment.end)))
+        return result
+
+    def _steal_segment(self) -> Optional[_Segment]:
+        """Split the largest remaining range, and take over its second half"""
+        with self._segments_lock:
+            if self._aborted or not self._segments:
+                return None
+            victim = max(self._segments, key=lambda segment: segment.remaining)
+            with victim.lock:
+                if victim.remaining < self._block_size * 2:
+                    return None
+                middle = victim.offset + victim.remaining // 2
+                segment = _Segment(middle, victim.end)
+                victim.end = middle
+            self._segments.append(segment)
+            return segment
+
+    def _download_segment(self, fd: int, segment: _Segment):
+        def download():
+            if segment.remaining <= 0:
+                return
+            headers = {"Range": "bytes=%d-%d" % (segment.offset, segment.end - 1)}
+            if self._if_range:
+                headers["If-Range"] = self._if_range  # pyre-ignore[6]
+            with self._session.get(self._url, headers=headers, stream=True) as resp:
+                resp.raise_for_status()
+                self._check_unchanged(resp)
+                saved_offset = segment.offset
+                for chunk in resp.iter_content(chunk_size=CHUNK_SIZE):
+                    if self._aborted:
+                        return
+                    with segment.lock:
+                        chunk = chunk[: segment.remaining]
+                        os.pwrite(fd, chunk, segment.offset)
+                        segment.offset += len(chunk)
+                        remaining = segment.remaining
+                    if self._callback:
+                        self._callback(len(chunk))
+                    if remaining <= 0:
+                        break
+                    if segment.offset - saved_offset >= self._block_size:
+                        saved_offset = segment.offset
+                        self._save_state()
+                if segment.remaining > 0:
+                    raise HttpBodyIncompleteError(
+                        "The downloaded content is incomplete: %r, range: %s"
+                        % (self._url, headers["Range"])
+                    )
+
+        patch_method(
+            download,
+            max_retries=self._max_retries,
+            should_retry=http_should_retry,
+        )()
+
+    def _worker(self, fd: int, segment: Optional[_Segment]):
+        try:
+            while segment is not None:
+                self._download_segment(fd, segment)
+                segment = self._steal_segment()
+        except Exception:
+            # stop other connections as soon as possible
+            self._aborted = True
+            raise
+
+    def _download_in_parallel(self):
+        segments = self._load_state()
+        if segments is None:
+            with open(self._partial_path, "wb") as f:
+                f.truncate(self._content_size)
+            segments = [_Segment(0, self._content_size)]
+        else:
+            _logger.info("resume downloading: %r" % self._url)
+            if self._callback:
+                self._callback(
+                    self._content_size - sum(segment.remaining for segment in segments)
+                )
+        self._segments = self._split_segments(segments)
+        self._save_state()
+
+        fd = os.open(self._partial_path, os.O_WRONLY)
+        try:
+            with ThreadPoolExecutor(max_workers=self._max_workers) as executor:
+                futures = [
+                    executor.submit(self._worker, fd, segment)
+                    for segment in list(self._segments)
+                ]
+                for future in futures:
+                    future.result()
+        finally:
+            os.close(fd)
+            self._save_state()
+
+        if os.path.getsize(self._partial_path) != self._content_size:
+            raise HttpBodyIncompleteError(  # pragma: no cover
+                "The downloaded content is incomplete: %r" % self._url
+            )
+
+    def _download_in_single(self, response: requests.Response):
+        with open(self._partial_path, "wb") as f:
+            for chunk in response.iter_content(chunk_size=CHUNK_SIZE):
+                f.write(chunk)
+                if self._callback:
+                    self._callback(len(chunk))
+            size = f.tell()
+        if (
+            "Content-Length" in response.headers
+            and not response.headers.get("Content-Encoding")
+            and size != int(response.headers["Content-Length"])
+        ):
+            raise HttpBodyIncompleteError(
+                "The downloaded content is incomplete, "
+                "expected size: %s, actual size: %d"
+                % (response.headers["Content-Length"], size)
+            )
+
+    def download(self) -> Mapping[str, str]:
+        """Download content to path
+
+        :returns: Headers of the content
+        """
+        with self._session.get(
+            self._url, headers={"Range": "bytes=0-0"}, stream=True
+        ) as response:
+            if response.status_code != 416:
+                response.raise_for_status()
+            headers = response.headers
+            content_size = get_content_size_from_content_range(headers)
+            if (
+                response.status_code == 206
+                and content_size is not None
+                and content_size >= self._block_size * 2
+                and self._max_workers > 1
+                and not headers.get("Content-Encoding")
+            ):
+                self._content_size = content_size
+                self._validator = {
+                    "ETag": headers.get("ETag"),
+                    "Last-Modified": headers.get("Last-Modified"),
+                }
+                response.content  # release the connection
+                self._download_in_parallel()
+            else:
+                if response.status_code != 200:
+                    response.close()
+                    response = self._session.get(self._url, stream=True)
+                    response.raise_for_status()
+                    headers = response.headers
+                with response:
+                    self._download_in_single(response)
+
+        os.replace(self._partial_path, self._path)
+        if os.path.exists(self._state_path):
+            os.unlink(self._state_path)
+        return headers
@@ -1,11 +1,14 @@
+from concurrent.futures import Future
 from io import BytesIO
-from typing import Optional
+from typing import Mapping, Optional
 
 import requests
 
 from megfile.config import (
     HTTP_MAX_RETRY_TIMES,
+    IO_PROFILE,
     READER_BLOCK_SIZE,
+    READER_HEDGE_PERCENTILE,
     READER_MAX_BUFFER_SIZE,
 )
 from megfile.errors import (
@@ -21,6 +24,63 @@ from megfile.pathlike import UNKNOWN_STAT, PathLike
 DEFAULT_TIMEOUT = (60, 60 * 60 * 24)
 
 
+def get_content_size_from_content_range(headers: Mapping) -> Optional[int]:
+    """Get complete length from header like "Content-Range: bytes 0-99/1234"
+
+    :returns: complete length, or None if header is missing or length is unknown
+    """
+    content_range = headers.get("Content-Range")
+    if not content_range:
+        return None
+    complete_length = content_range.rpartition("/")[2].strip()
+    if not complete_length.isdigit():
+        return None
+    return int(complete_length)
+
+
+def check_content_complete(response) -> bytes:
+    """Read whole body of response, and make sure it matches Content-Length"""
+    content = response.content
+    headers = response.headers
+    if (
+        "Content-Length" in headers
+        and len(content) != int(headers["Content-Length"])
+        and not headers.get("Content-Encoding")
+    ):
+        raise HttpBodyIncompleteError(
+            "The downloaded content is incomplete, "
+            "expected size: %s, actual size: %d"
+            % (
+                headers["Content-Length"],
+                len(content),
+            )
+        )
+    return content
+
+
+def get_first_index_response(response) -> Optional[dict]:
+    """Read response of a ranged request for the first block
+
+    :returns: Response of the first block, or None if server doesn't answer with
+        partial content, or the content is encoded (range of encoded content can't
+        be used as a block)
+    """
+    content_size = get_content_size_from_content_range(response.headers)
+    if (
+        response.status_code != 206
+        or content_size is None
+        or response.headers.get("Content-Encoding")
+    ):
+        return None
+    return {
+        "Body": BytesIO(check_content_complete(response)),
+        "ContentSize": content_size,
+        "Headers": response.headers,
+        "Cookies": response.cookies,
+        "StatusCode": response.status_code,
+    }
+
+
 class HttpPrefetchReader(BasePrefetchReader):
     """
     Reader to fast read the http content, service must support Accept-Ranges.
@@ -32,6 +92,10 @@ class HttpPrefetchReader(BasePrefetchReader):
 
     The prefetch will cached block_forward blocks of data from offset position
     (the position after reading if the called function is read).
+
+    If first_index_response (a ranged response of the first block, with
+    "ContentSize") is given, its content is used as the first block without
+    requesting again.
     """
 
     def __init__(
@@ -46,10 +110,14 @@ class HttpPrefetchReader(BasePrefetchReader):
         block_forward: Optional[int] = None,
         max_retries: int = HTTP_MAX_RETRY_TIMES,
         max_workers: Optional[int] = None,
+        first_index_response: Optional[dict] = None,
+        hedge_percentile: float = READER_HEDGE_PERCENTILE,
+        io_profile: bool = IO_PROFILE,
     ):
         self._url = url
         self._content_size = content_size
         self._session = session or requests.Session()
+        self._first_index_response = first_index_response
 
         super().__init__(
             block_size=block_size,
@@ -58,12 +126,28 @@ class HttpPrefetchReader(BasePrefetchReader):
             max_retries=max_retries,
             max_workers=max_workers,
             content_stat=content_stat,
+            hedge_percentile=hedge_percentile,
+            io_profile=io_profile,
         )
 
+    def _get_content_size(self) -> int:
+        if self._first_index_response is not None:
+            first_index_response, self._first_index_response = (
+                self._first_index_response,
+                None,
+            )
+            return self._insert_first_block(first_index_response)
+        return super()._get_content_size()
+
     def _get_content_size_from_remote(self) -> int:
         if self._content_size is not None:
             return self._content_size
 
+        if self._block_capacity > 0:
+            first_index_response = self._fetch_first_block()
+            if first_index_response is not None:
+                return self._insert_first_block(first_index_response)
+
         first_index_response = self._fetch_response()
         if first_index_response["Headers"].get("Accept-Ranges") != "bytes":
             raise UnsupportedError(
@@ -72,10 +156,40 @@ class HttpPrefetchReader(BasePrefetchReader):
             )
         return first_index_response["Headers"]["Content-Length"]
 
+    def _insert_first_block(self, first_index_response: dict) -> int:
+        if self._block_capacity > 0:
+            first_future = Future()
+            first_future.set_result(first_index_response["Body"])
+            self._insert_futures(index=0, future=first_future)
+        return first_index_response["ContentSize"]
+
     @property
     def name(self) -> str:
         return fspath(self._url)
 
+    def _fetch_first_block(self) -> Optional[dict]:
+        """Fetch the first block by a ranged request, which also tells the content
+        size and whether server supports Range.
+
+        :returns: Response of the first block, or None if server doesn't answer
+            with partial content
+        """
+
+        def fetch_first_block() -> Optional[dict]:
+            headers = {"Range": f"bytes=0-{self._block_size - 1}"}
+            with self._session.get(
+                fspath(self._url), headers=headers, stream=True
+            ) as response:
+                return get_first_index_response(response)
+
+        fetch_first_block = patch_method(
+            fetch_first_block,
+            max_retries=self._max_retries,
+            should_retry=http_should_retry,
+        )
+
+        return fetch_first_block()
+
     def _fetch_response(
         self, start: Optional[int] = None, end: Optional[int] = None
     ) -> dict:
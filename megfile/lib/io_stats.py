@@ -0,0 +1,129 @@
+from threading import Lock
+
+__all__ = [
+    "ReaderIOStats",
+    "WriterIOStats",
+]
+
+
+class _IOStats:
+    _fields = ()
+
+    def __init__(self):
+        # some counters are updated in worker threads
+        self._lock = Lock()
+
+    def to_dict(self) -> dict:
+        return {field: getattr(self, field) for field in self._fields}
+
+    def __str__(self) -> str:
+        return ", ".join(
+            "%s=%s" % (field, "%.3f" % value if isinstance(value, float) else value)
+            for field, value in self.to_dict().items()
+        )
+
+    def __repr__(self) -> str:
+        return "%s(%s)" % (self.__class__.__name__, self)
+
+
+class ReaderIOStats(_IOStats):
+    """Statistics of a prefetch reader
+
+    - hits: blocks which have been downloaded when they are needed
+    - waits: blocks which have been prefetched, but are still downloading when
+      they are needed
+    - misses: blocks which have not been prefetched when they are needed
+    - evictions: blocks evicted from the LRU cache
+    - blocked_time: seconds spent waiting for blocks
+    - hedges: duplicated requests sent for slow blocks
+    - bytes_fetched: bytes downloaded
+    - bytes_consumed: bytes returned to caller
+    - wasted_bytes: bytes downloaded but not returned, e.g. useless readahead
+    - seeks, backward_seeks, seek_distance: seek pattern, seek_distance is the
+      sum of absolute distances of seeks in bytes
+    - block_forward: current number of blocks prefetched, which is scaled by
+      the seek pattern
+    """
+
+    _fields = (
+        "hits",
+        "waits",
+        "misses",
+        "evictions",
+        "blocked_time",
+        "hedges",
+        "bytes_fetched",
+        "bytes_consumed",
+        "wasted_bytes",
+        "seeks",
+        "backward_seeks",
+        "seek_distance",
+        "block_forward",
+    )
+
+    def __init__(self):
+        super().__init__()
+        self.hits = 0
+        self.waits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.blocked_time = 0.0
+        self.hedges = 0
+        self.bytes_fetched = 0
+        self.bytes_consumed = 0
+        self.seeks = 0
+        self.backward_seeks = 0
+        self.seek_distance = 0
+        self.block_forward = 0
+
+    @property
+    def wasted_bytes(self) -> int:
+        return max(self.bytes_fetched - self.bytes_consumed, 0)
+
+    def add_fetched(self, size: int):
+        with self._lock:
+            self.bytes_fetched += size
+
+    def add_seek(self, offset: int, target_offset: int):
+        self.seeks += 1
+        if target_offset < offset:
+            self.backward_seeks += 1
+        self.seek_distance += abs(target_offset - offset)
+
+
+class WriterIOStats(_IOStats):
+    """Statistics of a buffered writer
+
+    - parts: parts submitted to upload
+    - bytes_uploaded: bytes of uploaded parts
+    - queue_depth: number of parts being uploaded now
+    - max_queue_depth: max number of parts being uploaded at the same time
+    - waits: times of waiting for uploads, because the buffer is full
+    - wait_time: seconds spent waiting for uploads
+    """
+
+    _fields = (
+        "parts",
+        "bytes_uploaded",
+        "queue_depth",
+        "max_queue_depth",
+        "waits",
+        "wait_time",
+    )
+
+    def __init__(self):
+        super().__init__()
+        self.parts = 0
+        self.bytes_uploaded = 0
+        self.queue_depth = 0
+        self.max_queue_depth = 0
+        self.waits = 0
+        self.wait_time = 0.0
+
+    def add_uploaded(self, size: int):
+        with self._lock:
+            self.bytes_uploaded += size
+
+    def set_queue_depth(self, depth: int):
+        self.queue_depth = depth
+        self.max_queue_depth = max(self.max_queue_depth, depth)
@@ -0,0 +1,456 @@
+import os
+import threading
+import time
+from bisect import bisect_left
+from functools import lru_cache, wraps
+from logging import getLogger as get_logger
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Tuple
+
+from megfile.config import METRICS
+
+_logger = get_logger(__name__)
+
+__all__ = [
+    "RequestEvent",
+    "OpenTelemetryHook",
+    "enable_metrics",
+    "disable_metrics",
+    "is_metrics_enabled",
+    "add_request_hook",
+    "remove_request_hook",
+    "instrument_request",
+    "stats",
+    "reset_stats",
+    "export_openmetrics",
+]
+
+# Same as the default buckets of prometheus client, in seconds
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class RequestEvent(NamedTuple):
+    """A finished request, including all its retries"""
+
+    protocol: str
+    operation: str
+    # bucket of s3, host of other protocols
+    target: str
+    start_time: float
+    latency: float
+    bytes_in: int = 0
+    bytes_out: int = 0
+    retries: int = 0
+    # error code, or error class name, None if succeeded
+    error: Optional[str] = None
+    # None if the transport does not tell
+    connection_reused: Optional[bool] = None
+
+
+class _OperationStats:
+    def __init__(self):
+        self.count = 0
+        self.retries = 0
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self.latency_sum = 0.0
+        self.latency_buckets = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.errors: Dict[str, int] = {}
+        self.connections_reused = 0
+
+    def add(self, event: RequestEvent):
+        self.count += 1
+        self.retries += event.retries
+        self.bytes_in += event.bytes_in
+        self.bytes_out += event.bytes_out
+        self.latency_sum += event.latency
+        self.latency_buckets[bisect_left(LATENCY_BUCKETS, event.latency)] += 1
+        if event.error is not None:
+            self.errors[event.error] = self.errors.get(event.error, 0) + 1
+        if event.connection_reused:
+            self.connections_reused += 1
+
+    def to_dict(self) -> dict:
+        buckets, count = {}, 0
+        for bound, bucket_count in zip(
+            LATENCY_BUCKETS + (float("inf"),), self.latency_buckets
+        ):
+            count += bucket_count
+            buckets[bound] = count
+        return {
+            "count": self.count,
+            "retries": self.retries,
+            "bytes_in": self.bytes_in,
+            "bytes_out": self.bytes_out,
+            "latency_sum": self.latency_sum,
+            "latency_buckets": buckets,
+            "errors": dict(self.errors),
+            "connections_reused": self.connections_reused,
+        }
+
+
+_stats: Dict[Tuple[str, str, str], _OperationStats] = {}
+_stats_lock = threading.Lock()
+_hooks: List[Callable[[RequestEvent], None]] = []
+_local = threading.local()
+_enabled = METRICS
+
+
+def enable_metrics() -> None:
+    """Record requests of every protocol, which is disabled by default unless
+    `MEGFILE_METRICS` is set"""
+    global _enabled
+    _enabled = True
+
+
+def disable_metrics() -> None:
+    """Stop recording requests, recorded statistics are kept"""
+    global _enabled
+    _enabled = False
+
+
+def is_metrics_enabled() -> bool:
+    return _enabled
+
+
+def add_request_hook(hook: Callable[[RequestEvent], None]) -> None:
+    """Call hook with a RequestEvent after every request of every protocol,
+    which enables metrics
+
+    :param hook: Function accepting a RequestEvent, which should be fast and
+        thread-safe, since it is called in the thread sending the request
+    """
+    _hooks.append(hook)
+    enable_metrics()
+
+
+def remove_request_hook(hook: Callable[[RequestEvent], None]) -> None:
+    """Remove hook added by add_request_hook"""
+    _hooks.remove(hook)
+
+
+def record_request(event: RequestEvent) -> None:
+    key = (event.protocol, event.target, event.operation)
+    with _stats_lock:
+        operation_stats = _stats.get(key)
+        if operation_stats is None:
+            operation_stats = _stats[key] = _OperationStats()
+        operation_stats.add(event)
+    for hook in list(_hooks):
+        try:
+            hook(event)
+        except Exception as error:
+            _logger.warning("request hook failed: %r, error: %r", hook, error)
+
+
+def stats() -> Dict[str, Dict[str, Dict[str, dict]]]:
+    """Snapshot of request statistics in this process since start or reset_stats
+
+    :returns: Statistics like {protocol: {target: {operation: {...}}}}, including
+        count, retries, bytes_in, bytes_out, latency_sum, cumulative
+        latency_buckets, error counts by code, and connections_reused
+    """
+    result = {}
+    with _stats_lock:
+        for (protocol, target, operation), operation_stats in _stats.items():
+            result.setdefault(protocol, {}).setdefault(target, {})[operation] = (
+                operation_stats.to_dict()
+            )
+    return result
+
+
+def reset_stats() -> None:
+    """Clear request statistics"""
+    with _stats_lock:
+        _stats.clear()
+
+
+def _escape_label(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_bound(bound: float) -> str:
+    return "+Inf" if bound == float("inf") else repr(bound)
+
+
+def export_openmetrics() -> str:
+    """Export request statistics in OpenMetrics text format, which could be
+    served to Prometheus"""
+    counters = {
+        "requests": [],
+        "request_retries": [],
+        "request_errors": [],
+        "request_bytes_in": [],
+        "request_bytes_out": [],
+        "request_connections_reused": [],
+    }
+    histogram = []
+    for protocol, targets in sorted(stats().items()):
+        for target, operations in sorted(targets.items()):
+            for operation, item in sorted(operations.items()):
+                labels = 'protocol="%s",target="%s",operation="%s"' % (
+                    _escape_label(protocol),
+                    _escape_label(target),
+                    _escape_label(operation),
+                )
+                counters["requests"].append((labels, item["count"]))
+                counters["request_retries"].append((labels, item["retries"]))
+                counters["request_bytes_in"].append((labels, item["bytes_in"]))
+                counters["request_bytes_out"].append((labels, item["bytes_out"]))
+                counters["request_connections_reused"].append(
+                    (labels, item["connections_reused"])
+                )
+                for code, count in sorted(item["errors"].items()):
+                    counters["request_errors"].append(
+                        ('%s,code="%s"' % (labels, _escape_label(code)), count)
+                    )
+                for bound, count in item["latency_buckets"].items():
+                    histogram.append(
+                        (
+                            "_bucket",
+                            '%s,le="%s"' % (labels, _format_bound(bound)),
+                            count,
+                        )
+                    )
+                histogram.append(("_count", labels, item["count"]))
+                histogram.append(("_sum", labels, item["latency_sum"]))
+
+    lines = []
+    for name, samples in counters.items():
+        lines.append("# TYPE megfile_%s counter" % name)
+        for labels, value in samples:
+            lines.append("megfile_%s_total{%s} %s" % (name, labels, value))
+    lines.append("# TYPE megfile_request_duration_seconds histogram")
+    lines.append("# UNIT megfile_request_duration_seconds seconds")
+    for suffix, labels, value in histogram:
+        lines.append(
+            "megfile_request_duration_seconds%s{%s} %s" % (suffix, labels, value)
+        )
+    lines.append("# EOF")
+    return "\n".join(lines) + "\n"
+
+
+class OpenTelemetryHook:
+    """Request hook creating an OpenTelemetry span for every request
+
+    Usage: `add_request_hook(OpenTelemetryHook())`, spans are children of the
+    current span of the thread sending the request.
+    """
+
+    def __init__(self, tracer=None):
+        if tracer is None:
+            try:
+                from opentelemetry import trace
+            except ImportError:
+                raise ImportError(
+                    "opentelemetry not found, please `pip install opentelemetry-api`"
+                )
+            tracer = trace.get_tracer("megfile")
+        self._tracer = tracer
+
+    def __call__(self, event: RequestEvent):
+        attributes = {
+            "megfile.protocol": event.protocol,
+            "megfile.operation": event.operation,
+            "megfile.target": event.target,
+            "megfile.bytes_in": event.bytes_in,
+            "megfile.bytes_out": event.bytes_out,
+            "megfile.retries": event.retries,
+        }
+        if event.error is not None:
+            attributes["error.type"] = event.error
+        if event.connection_reused is not None:
+            attributes["megfile.connection_reused"] = event.connection_reused
+        span = self._tracer.start_span(
+            "%s %s" % (event.protocol, event.operation),
+            start_time=int(event.start_time * 1e9),
+            attributes=attributes,
+        )
+        span.end(end_time=int((event.start_time + event.latency) * 1e9))
+
+
+class _RequestState:
+    __slots__ = ("retries", "new_connections", "pooled")
+
+    def __init__(self):
+        self.retries = 0
+        self.new_connections = 0
+        # whether the request is sent by a pool counting new connections
+        self.pooled = False
+
+
+def _get_request_states() -> List[_RequestState]:
+    states = getattr(_local, "states", None)
+    if states is None:
+        states = _local.states = []
+    return states
+
+
+def count_retry() -> None:
+    """Count a retry of the innermost instrumented request of current thread"""
+    states = _get_request_states()
+    if states:
+        states[-1].retries += 1
+
+
+@lru_cache(maxsize=None)
+def _get_counting_pool_class(pool_class: type) -> type:
+    if getattr(pool_class, "_megfile_counting", False):
+        return pool_class
+
+    class CountingConnectionPool(pool_class):
+        _megfile_counting = True
+
+        def _new_conn(self, *args, **kwargs):
+            states = _get_request_states()
+            if states:
+                states[-1].new_connections += 1
+            return super()._new_conn(*args, **kwargs)
+
+        def urlopen(self, *args, **kwargs):
+            states = _get_request_states()
+            if states:
+                states[-1].pooled = True
+            return super().urlopen(*args, **kwargs)
+
+    CountingConnectionPool.__name__ = pool_class.__name__
+    CountingConnectionPool.__qualname__ = pool_class.__qualname__
+    return CountingConnectionPool
+
+
+def get_counting_pool_classes(
+    pool_classes_by_scheme: Dict[str, type],
+) -> Dict[str, type]:
+    """Subclasses of urllib3 connection pool classes, which count new connections
+    of instrumented requests to know whether connections are reused
+
+    :param pool_classes_by_scheme: `pool_classes_by_scheme` of a urllib3 PoolManager
+    """
+    return {
+        scheme: _get_counting_pool_class(pool_class)
+        for scheme, pool_class in pool_classes_by_scheme.items()
+    }
+
+
+def count_session_connections(session: Any) -> None:
+    """Count new connections of a requests.Session, whose pools are created by
+    its own pool managers, requests through proxies are not counted"""
+    for adapter in getattr(session, "adapters", {}).values():
+        pool_manager = getattr(adapter, "poolmanager", None)
+        pool_classes = getattr(pool_manager, "pool_classes_by_scheme", None)
+        if isinstance(pool_classes, dict):
+            # the default dict is shared by all pool managers, so replace it
+            pool_manager.pool_classes_by_scheme = get_counting_pool_classes(
+                pool_classes
+            )
+
+
+def get_error_code(error: BaseException) -> str:
+    from megfile.errors import MaxRetriesExceededError
+
+    if isinstance(error, MaxRetriesExceededError) and error.__cause__ is not None:
+        error = error.__cause__
+    response = getattr(error, "response", None)
+    if isinstance(response, dict):
+        code = response.get("Error", {}).get("Code")
+        if code:
+            return str(code)
+    status_code = getattr(response, "status_code", None)
+    if status_code is None:
+        status_code = getattr(error, "status_code", None)
+    if status_code is None:
+        status_code = getattr(error, "code", None)
+    if isinstance(status_code, int):
+        return str(status_code)
+    return type(error).__name__
+
+
+def get_response_info(response: Any) -> Tuple[int, Optional[str]]:
+    """Get size of response body and error code of a requests.Response"""
+    headers = getattr(response, "headers", None) or {}
+    size = int(headers.get("Content-Length") or 0)
+    status_code = getattr(response, "status_code", 0)
+    error = (
+        str(status_code)
+        if isinstance(status_code, int) and status_code >= 400
+        else None
+    )
+    return size, error
+
+
+def get_body_size(body: Any) -> int:
+    if isinstance(body, (bytes, bytearray, memoryview, str)):
+        return len(body)
+    if hasattr(body, "seekable") and hasattr(body, "tell"):
+        try:
+            if body.seekable():
+                offset = body.tell()
+                size = body.seek(0, os.SEEK_END) - offset
+                body.seek(offset)
+                return size
+        except Exception:
+            pass
+    return 0
+
+
+def instrument_request(
+    func: Callable,
+    protocol: str,
+    describe_request: Callable[..., Tuple[str, str, int]],
+    describe_response: Callable[[Any], Tuple[int, Optional[str]]] = get_response_info,
+) -> Callable:
+    """Record a RequestEvent for every call of func if metrics are enabled, func
+    is usually patched by patch_method, so that retries in it are counted.
+
+    :param func: Function sending request
+    :param protocol: Protocol name
+    :param describe_request: Function accepting arguments of func, and returning
+        operation name, target and size of request body
+    :param describe_response: Function accepting result of func, and returning
+        size of response body, and error code if the response is an error
+    """
+
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        if not _enabled:
+            return func(*args, **kwargs)
+        try:
+            operation, target, bytes_out = describe_request(*args, **kwargs)
+        except Exception as error:  # instrumentation should never break requests
+            _logger.debug("cannot describe request: %r", error)
+            operation, target, bytes_out = getattr(func, "__name__", "unknown"), "", 0
+        states = _get_request_states()
+        state = _RequestState()
+        states.append(state)
+        start_time, start = time.time(), time.perf_counter()
+        bytes_in, error = 0, None
+        try:
+            result = func(*args, **kwargs)
+        except Exception as exception:
+            error = get_error_code(exception)
+            raise
+        else:
+            try:
+                bytes_in, error = describe_response(result)
+            except Exception as describe_error:
+                _logger.debug("cannot describe response: %r", describe_error)
+            return result
+        finally:
+            states.pop()
+            record_request(
+                RequestEvent(
+                    protocol=protocol,
+                    operation=operation,
+                    target=target,
+                    start_time=start_time,
+                    latency=time.perf_counter() - start,
+                    bytes_in=bytes_in,
+                    bytes_out=bytes_out,
+                    retries=state.retries,
+                    error=error,
+                    connection_reused=(
+                        state.new_connections == 0 if state.pooled else None
+                    ),
+                )
+            )
+
+    return wrapper
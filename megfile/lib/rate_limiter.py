@@ -0,0 +1,199 @@
+import hashlib
+import mmap
+import os
+import struct
+import tempfile
+import threading
+import time
+from typing import Dict, Optional
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover
+    fcntl = None
+
+__all__ = [
+    "TokenBucket",
+    "SharedTokenBucket",
+    "RateLimiter",
+    "get_rate_limiter",
+    "reset_rate_limiters",
+]
+
+
+def _take_tokens(
+    tokens: float,
+    updated_at: float,
+    now: float,
+    amount: float,
+    rate: float,
+    burst: float,
+) -> float:
+    # clock of other processes may be a little ahead
+    elapsed = max(now - updated_at, 0.0)
+    return min(burst, tokens + elapsed * rate) - amount
+
+
+class TokenBucket:
+    """Token bucket shared by threads
+
+    Tokens are taken at once even if not enough, and the caller sleeps until the
+    debt is repaid, so that requests larger than burst are allowed.
+
+    :param rate: Tokens added per second
+    :param burst: Max number of tokens, rate by default
+    """
+
+    def __init__(self, rate: float, burst: Optional[float] = None):
+        if rate <= 0:
+            raise ValueError("rate should be positive: %r" % rate)
+        self._rate = rate
+        self._burst = rate if burst is None else burst
+        self._tokens = self._burst
+        self._updated_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _take(self, amount: float) -> float:
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = _take_tokens(
+                self._tokens, self._updated_at, now, amount, self._rate, self._burst
+            )
+            self._updated_at = now
+            return self._tokens
+
+    def acquire(self, amount: float = 1) -> float:
+        """Take amount tokens, and sleep until they are available
+
+        :returns: Seconds slept
+        """
+        tokens = self._take(amount)
+        if tokens >= 0:
+            return 0.0
+        interval = -tokens / self._rate
+        time.sleep(interval)
+        return interval
+
+
+def _get_shared_directory() -> str:
+    if os.path.isdir("/dev/shm"):
+        return "/dev/shm"
+    return tempfile.gettempdir()  # pragma: no cover
+
+
+class SharedTokenBucket(TokenBucket):
+    """Token bucket shared by processes on this host
+
+    State is saved in a file of shared memory named by name, and updated with the
+    file locked by flock.
+    """
+
+    _state = struct.Struct("dd")  # tokens, updated_at
+
+    def __init__(self, name: str, rate: float, burst: Optional[float] = None):
+        if fcntl is None:  # pragma: no cover
+            raise OSError("SharedTokenBucket is not supported on this platform")
+        super().__init__(rate, burst)
+        self._path = os.path.join(
+            _get_shared_directory(),
+            "megfile-rate-limit-%s" % hashlib.md5(name.encode()).hexdigest(),
+        )
+        fd = os.open(self._path, os.O_RDWR | os.O_CREAT, 0o600)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX)
+            try:
+                if os.fstat(fd).st_size < self._state.size:
+                    # zero updated_at means the bucket is new
+                    os.ftruncate(fd, self._state.size)
+            finally:
+                fcntl.flock(fd, fcntl.LOCK_UN)
+            self._mmap = mmap.mmap(fd, self._state.size)
+        except Exception:
+            os.close(fd)
+            raise
+        self._fd = fd
+
+    def _take(self, amount: float) -> float:
+        # flock does not exclude threads sharing the file descriptor
+        with self._lock:
+            fcntl.flock(self._fd, fcntl.LOCK_EX)  # pyre-ignore[16]
+            try:
+                tokens, updated_at = self._state.unpack_from(self._mmap)
+                now = time.monotonic()
+                if updated_at == 0:
+                    tokens, updated_at = self._burst, now
+                tokens = _take_tokens(
+                    tokens, updated_at, now, amount, self._rate, self._burst
+                )
+                self._state.pack_into(self._mmap, 0, tokens, now)
+                return tokens
+            finally:
+                fcntl.flock(self._fd, fcntl.LOCK_UN)  # pyre-ignore[16]
+
+    def close(self):
+        self._mmap.close()
+        os.close(self._fd)
+
+
+class RateLimiter:
+    """Limit requests per second and bytes per second, both are optional"""
+
+    def __init__(
+        self,
+        requests_per_second: float = 0,
+        bytes_per_second: int = 0,
+        shared_name: Optional[str] = None,
+    ):
+        self._requests = self._create_bucket(requests_per_second, shared_name, "req")
+        self._bytes = self._create_bucket(bytes_per_second, shared_name, "bytes")
+
+    def _create_bucket(
+        self, rate: float, shared_name: Optional[str], suffix: str
+    ) -> Optional[TokenBucket]:
+        if rate <= 0:
+            return None
+        if shared_name is not None and fcntl is not None:
+            return SharedTokenBucket("%s:%s" % (shared_name, suffix), rate)
+        return TokenBucket(rate)
+
+    def acquire_request(self, size: int = 0):
+        """Wait before sending a request with body of size bytes"""
+        if self._requests is not None:
+            self._requests.acquire(1)
+        self.acquire_bytes(size)
+
+    def acquire_bytes(self, size: int):
+        """Wait for transferring size bytes"""
+        if self._bytes is not None and size > 0:
+            self._bytes.acquire(size)
+
+
+_limiters: Dict[str, RateLimiter] = {}
+_limiters_lock = threading.Lock()
+
+
+def get_rate_limiter(
+    key: str,
+    requests_per_second: float,
+    bytes_per_second: int,
+    shared: bool = False,
+) -> RateLimiter:
+    """Rate limiter shared by all threads of this process using the same key, and
+    by processes on this host if shared is True"""
+    limiter = _limiters.get(key)
+    if limiter is None:
+        with _limiters_lock:
+            limiter = _limiters.get(key)
+            if limiter is None:
+                limiter = _limiters[key] = RateLimiter(
+                    requests_per_second,
+                    bytes_per_second,
+                    shared_name=key if shared else None,
+                )
+    return limiter
+
+
+def reset_rate_limiters() -> None:
+    """Forget all rate limiters"""
+    with _limiters_lock:
+        _limiters.clear()
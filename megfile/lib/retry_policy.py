@@ -0,0 +1,226 @@
+import random
+import threading
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Dict, Optional
+
+from megfile.config import (
+    CIRCUIT_BREAKER_COOLDOWN,
+    CIRCUIT_BREAKER_THRESHOLD,
+    RETRY_BASE_INTERVAL,
+    RETRY_BUDGET,
+    RETRY_BUDGET_REFILL_RATE,
+    RETRY_MAX_INTERVAL,
+)
+
+__all__ = [
+    "RetryBudget",
+    "CircuitBreaker",
+    "RetryPolicy",
+    "get_retry_policy",
+    "reset_retry_policies",
+    "get_retry_after",
+    "get_retry_interval",
+]
+
+# Retry-After longer than this is regarded as a mistake of server, in seconds
+MAX_RETRY_AFTER = 300
+
+
+def decorrelated_jitter(
+    previous_interval: float,
+    base: float = RETRY_BASE_INTERVAL,
+    cap: float = RETRY_MAX_INTERVAL,
+) -> float:
+    """Next retry interval of "decorrelated jitter", so that clients throttled at
+    the same time do not retry at the same time again"""
+    return min(cap, random.uniform(base, max(previous_interval, base) * 3))
+
+
+def _parse_retry_after(value) -> Optional[float]:
+    value = str(value).strip()
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    try:
+        retry_time = parsedate_to_datetime(value)
+    except (TypeError, ValueError, IndexError):
+        return None
+    if retry_time.tzinfo is None:
+        retry_time = retry_time.replace(tzinfo=timezone.utc)
+    return max((retry_time - datetime.now(timezone.utc)).total_seconds(), 0.0)
+
+
+def get_retry_after(error: BaseException) -> Optional[float]:
+    """Seconds in the Retry-After header of the response of error, None if no
+    such header. Responses of botocore and requests are supported."""
+    response = getattr(error, "response", None)
+    if isinstance(response, dict):
+        headers = response.get("ResponseMetadata", {}).get("HTTPHeaders") or {}
+    else:
+        headers = getattr(response, "headers", None) or {}
+    value = headers.get("retry-after") or headers.get("Retry-After")
+    if value is None:
+        return None
+    return _parse_retry_after(value)
+
+
+def get_retry_interval(error: BaseException, previous_interval: float) -> float:
+    """Seconds to sleep before the next retry, which is at least the Retry-After
+    required by server"""
+    interval = decorrelated_jitter(previous_interval)
+    retry_after = get_retry_after(error)
+    if retry_after is not None:
+        interval = max(interval, min(retry_after, MAX_RETRY_AFTER))
+    return interval
+
+
+class RetryBudget:
+    """Token bucket limiting retries, every retry takes a token
+
+    :param capacity: Max number of tokens, which is the max number of retries in
+        a burst
+    :param refill_rate: Tokens added per second
+    """
+
+    def __init__(self, capacity: int, refill_rate: float):
+        self._capacity = capacity
+        self._refill_rate = refill_rate
+        self._tokens = float(capacity)
+        self._updated_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    @property
+    def tokens(self) -> float:
+        with self._lock:
+            self._refill()
+            return self._tokens
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(
+            self._capacity,
+            self._tokens + (now - self._updated_at) * self._refill_rate,
+        )
+        self._updated_at = now
+
+    def acquire(self) -> bool:
+        """Take a token, return False if the budget is exhausted"""
+        with self._lock:
+            self._refill()
+            if self._tokens < 1:
+                return False
+            self._tokens -= 1
+            return True
+
+
+class CircuitBreaker:
+    """Fail fast after sustained errors
+
+    The circuit opens after threshold consecutive failures, and requests are
+    rejected in cooldown seconds. Then a single request is allowed to probe the
+    endpoint, the circuit closes if it succeeds, or opens again if it fails.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, threshold: int, cooldown: float):
+        self._threshold = threshold
+        self._cooldown = cooldown
+        self._failures = 0
+        self._state = self.CLOSED
+        self._opened_at = 0.0
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        return self._state
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self._state == self.CLOSED:
+                return True
+            if (
+                self._state == self.OPEN
+                and time.monotonic() - self._opened_at >= self._cooldown
+            ):
+                self._state = self.HALF_OPEN
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self._failures = 0
+            self._state = self.CLOSED
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self._state == self.HALF_OPEN or self._failures >= self._threshold:
+                self._state = self.OPEN
+                self._opened_at = time.monotonic()
+
+
+class RetryPolicy:
+    """Retry budget and circuit breaker of an endpoint, both are optional"""
+
+    def __init__(
+        self,
+        budget: Optional[RetryBudget] = None,
+        circuit_breaker: Optional[CircuitBreaker] = None,
+    ):
+        self.budget = budget
+        self.circuit_breaker = circuit_breaker
+
+    def allow_request(self) -> bool:
+        return self.circuit_breaker is None or self.circuit_breaker.allow()
+
+    def allow_retry(self) -> bool:
+        return self.budget is None or self.budget.acquire()
+
+    def record_success(self):
+        if self.circuit_breaker is not None:
+            self.circuit_breaker.record_success()
+
+    def record_failure(self):
+        if self.circuit_breaker is not None:
+            self.circuit_breaker.record_failure()
+
+
+_policies: Dict[str, RetryPolicy] = {}
+_policies_lock = threading.Lock()
+
+
+def get_retry_policy(endpoint: str) -> RetryPolicy:
+    """Retry policy shared by all requests to endpoint in this process,
+    configured by MEGFILE_RETRY_BUDGET and MEGFILE_CIRCUIT_BREAKER_THRESHOLD"""
+    policy = _policies.get(endpoint)
+    if policy is None:
+        with _policies_lock:
+            policy = _policies.get(endpoint)
+            if policy is None:
+                policy = _policies[endpoint] = RetryPolicy(
+                    budget=(
+                        RetryBudget(RETRY_BUDGET, RETRY_BUDGET_REFILL_RATE)
+                        if RETRY_BUDGET > 0
+                        else None
+                    ),
+                    circuit_breaker=(
+                        CircuitBreaker(
+                            CIRCUIT_BREAKER_THRESHOLD, CIRCUIT_BREAKER_COOLDOWN
+                        )
+                        if CIRCUIT_BREAKER_THRESHOLD > 0
+                        else None
+                    ),
+                )
+    return policy
+
+
+def reset_retry_policies() -> None:
+    """Forget budgets and circuit states of all endpoints"""
+    with _policies_lock:
+        _policies.clear()
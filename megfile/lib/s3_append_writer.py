@@ -0,0 +1,142 @@
+from logging import getLogger as get_logger
+from math import ceil
+from typing import Optional, Tuple
+
+from megfile.config import IO_PROFILE, WRITER_BLOCK_SIZE, WRITER_MAX_BUFFER_SIZE
+from megfile.errors import S3FileNotFoundError, raise_s3_error, translate_s3_error
+from megfile.lib.s3_buffered_writer import (
+    MAX_COPY_OBJECT_SIZE,
+    PartResult,
+    S3BufferedWriter,
+)
+from megfile.pathlike import UNKNOWN_STAT, StatResult
+from megfile.utils.endpoint import is_cloudflare_r2
+
+_logger = get_logger(__name__)
+
+
+class S3AppendWriter(S3BufferedWriter):
+    """Append to s3 object without downloading it.
+
+    The existing object is copied by UploadPartCopy on server side as the first
+    parts of a multipart upload, followed by parts of data written. Objects
+    smaller than the min part size are downloaded into the buffer instead, and
+    the object is not changed if nothing is written.
+    """
+
+    def __init__(
+        self,
+        bucket: str,
+        key: str,
+        *,
+        s3_client,
+        block_size: int = WRITER_BLOCK_SIZE,
+        max_buffer_size: int = WRITER_MAX_BUFFER_SIZE,
+        max_workers: Optional[int] = None,
+        profile_name: Optional[str] = None,
+        atomic: bool = False,
+        io_profile: bool = IO_PROFILE,
+        content_stat=UNKNOWN_STAT,
+    ):
+        super().__init__(
+            bucket,
+            key,
+            s3_client=s3_client,
+            block_size=block_size,
+            max_buffer_size=max_buffer_size,
+            max_workers=max_workers,
+            profile_name=profile_name,
+            atomic=atomic,
+            # digests of the existing content are unknown
+            checksums=(),
+            io_profile=io_profile,
+        )
+
+        remote_size, self._copy_etag = self._get_remote_size_and_etag(content_stat)
+        self._is_remote_exists = remote_size is not None
+        self._remote_size = self._copy_size = remote_size or 0
+        self._is_copy_submitted = False
+        # Cloudflare R2 requires all non-trailing parts to have the same size
+        if self._copy_size < self.MIN_BLOCK_SIZE or is_cloudflare_r2(
+            self._client._endpoint.host
+        ):
+            self._download_to_buffer()
+        self._offset = self._content_size = self._remote_size
+
+    @property
+    def mode(self) -> str:
+        return "ab"
+
+    def _get_remote_size_and_etag(
+        self, content_stat
+    ) -> Tuple[Optional[int], Optional[str]]:
+        """Size and etag of the existing object, size is None if not exists"""
+        if isinstance(content_stat, StatResult):
+            extra = content_stat.extra if isinstance(content_stat.extra, dict) else {}
+            return content_stat.size, extra.get("ETag")
+        try:
+            response = self._client.head_object(Bucket=self._bucket, Key=self._key)
+        except Exception as error:
+            error = translate_s3_error(error, self.name)
+            if isinstance(error, S3FileNotFoundError):
+                return None, None
+            raise error
+        return int(response["ContentLength"]), response.get("ETag")
+
+    def _download_to_buffer(self):
+        if self._copy_size > 0:
+            with raise_s3_error(self.name):
+                content = self._client.get_object(Bucket=self._bucket, Key=self._key)[
+                    "Body"
+                ].read()
+            self._buffer.write(content)
+        self._copy_size = 0
+        self._is_copy_submitted = True
+
+    def _upload_part_copy(self, part_number: int, start: int, stop: int):
+        kwargs = {}
+        if self._copy_etag:
+            # fail if the object is changed since opened
+            kwargs["CopySourceIfMatch"] = self._copy_etag
+        with raise_s3_error(self.name):
+            response = self._client.upload_part_copy(
+                Bucket=self._bucket,
+                Key=self._key,
+                UploadId=self._upload_id,
+                PartNumber=part_number,
+                CopySource={"Bucket": self._bucket, "Key": self._key},
+                CopySourceRange="bytes=%d-%d" % (start, stop - 1),
+                **kwargs,
+            )
+        return PartResult(response["CopyPartResult"]["ETag"], part_number, 0)
+
+    def _submit_copy_parts(self):
+        if self._is_copy_submitted:
+            return
+        self._is_copy_submitted = True
+        # size of a part copied should not be larger than 5GB
+        part_count = ceil(self._copy_size / MAX_COPY_OBJECT_SIZE)
+        part_size = ceil(self._copy_size / part_count)
+        for start in range(0, self._copy_size, part_size):
+            self._part_number += 1
+            self._uploading_futures.add(
+                self._executor.submit(
+                    self._upload_part_copy,
+                    self._part_number,
+                    start,
+                    min(start + part_size, self._copy_size),
+                )
+            )
+
+    def _submit_futures(self):
+        if self._buffer.tell() > 0:
+            self._submit_copy_parts()
+        super()._submit_futures()
+
+    def _close(self):
+        if self._is_remote_exists and self._offset == self._remote_size:
+            _logger.debug("nothing appended: %r" % self.name)
+            self._shutdown()
+            return
+        self._submit_copy_parts()
+        super()._close()
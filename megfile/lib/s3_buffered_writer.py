@@ -4,16 +4,21 @@ from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 from io import BytesIO
 from logging import getLogger as get_logger
 from threading import Lock
-from typing import NamedTuple, Optional
+from time import perf_counter
+from typing import Dict, Iterable, NamedTuple, Optional
 
 from megfile.config import (
     DEFAULT_WRITER_BLOCK_AUTOSCALE,
     GLOBAL_MAX_WORKERS,
+    IO_PROFILE,
     WRITER_BLOCK_SIZE,
+    WRITER_CHECKSUMS,
     WRITER_MAX_BUFFER_SIZE,
 )
 from megfile.errors import raise_s3_error
 from megfile.interfaces import Writable
+from megfile.lib.hashing import MultiHash
+from megfile.lib.io_stats import WriterIOStats
 from megfile.utils import process_local
 from megfile.utils.endpoint import is_cloudflare_r2
 
@@ -38,6 +43,20 @@ class PartResult(_PartResult):
         return {"PartNumber": self.part_number, "ETag": self.etag}
 
 
+# Prefix of user metadata keys, which hold digests calculated while writing
+CHECKSUM_METADATA_PREFIX = "megfile-content-"
+
+# Max size of object which can be copied by a single CopyObject
+MAX_COPY_OBJECT_SIZE = 5 * 2**30
+
+
+def get_checksum_metadata(digests: Dict[str, str]) -> Dict[str, str]:
+    return {
+        CHECKSUM_METADATA_PREFIX + algorithm: digest
+        for algorithm, digest in digests.items()
+    }
+
+
 class S3BufferedWriter(Writable[bytes]):
     # Multi-upload part size must be between 5 MiB and 5 GiB.
     # There is no minimum size limit on the last part of your multipart upload.
@@ -55,6 +74,8 @@ class S3BufferedWriter(Writable[bytes]):
         max_workers: Optional[int] = None,
         profile_name: Optional[str] = None,
         atomic: bool = False,
+        checksums: Iterable[str] = WRITER_CHECKSUMS,
+        io_profile: bool = IO_PROFILE,
     ):
         self._bucket = bucket
         self._key = key
@@ -62,6 +83,12 @@ class S3BufferedWriter(Writable[bytes]):
         self._profile_name = profile_name
         self.__atomic__ = atomic
 
+        # digests are calculated while writing, and saved as user metadata if
+        # the file is uploaded by a single request
+        self._hasher = MultiHash(checksums) if checksums else None
+        self._digests: Dict[str, str] = {}
+        self._io_stats = WriterIOStats() if io_profile else None
+
         # user maybe put block_size with 'numpy.uint64' type
         self._base_block_size = int(block_size)
 
@@ -112,6 +139,16 @@ class S3BufferedWriter(Writable[bytes]):
     def tell(self) -> int:
         return self._offset
 
+    @property
+    def digests(self) -> Dict[str, str]:
+        """Hex digests of content keyed by algorithm name, empty before closed"""
+        return self._digests
+
+    @property
+    def io_stats(self) -> Optional[WriterIOStats]:
+        """Live statistics of this writer, None if io_profile is disabled"""
+        return self._io_stats
+
     @property
     def _block_size(self) -> int:
         if self._block_autoscale:
@@ -143,16 +180,20 @@ class S3BufferedWriter(Writable[bytes]):
 
     @property
     def _multipart_upload(self):
+        start_time = perf_counter()
         for future in self._uploading_futures:
             result = future.result()
             self._total_buffer_size -= result.content_size
             self._futures_result[result.part_number] = result.asdict()
         self._uploading_futures = set()
+        if self._io_stats is not None:
+            self._io_stats.wait_time += perf_counter() - start_time
+            self._io_stats.set_queue_depth(0)
         return {"Parts": [result for _, result in sorted(self._futures_result.items())]}
 
     def _upload_buffer(self, part_number, content):
         with raise_s3_error(self.name):
-            return PartResult(
+            result = PartResult(
                 self._client.upload_part(
                     Bucket=self._bucket,
                     Key=self._key,
@@ -163,22 +204,35 @@ class S3BufferedWriter(Writable[bytes]):
                 part_number,
                 len(content),
             )
+        if self._io_stats is not None:
+            self._io_stats.add_uploaded(len(content))
+        return result
 
     def _submit_upload_buffer(self, part_number: int, content: bytes):
         self._uploading_futures.add(
             self._executor.submit(self._upload_buffer, part_number, content)
         )
         self._total_buffer_size += len(content)
+        stats = self._io_stats
+        if stats is not None:
+            stats.parts += 1
+            stats.set_queue_depth(len(self._uploading_futures))
 
         while (
             self._uploading_futures and self._total_buffer_size >= self._max_buffer_size
         ):
+            start_time = perf_counter()
             wait_result = wait(self._uploading_futures, return_when=FIRST_COMPLETED)
+            if stats is not None:
+                stats.waits += 1
+                stats.wait_time += perf_counter() - start_time
             for future in wait_result.done:
                 result = future.result()
                 self._total_buffer_size -= result.content_size
                 self._futures_result[result.part_number] = result.asdict()
             self._uploading_futures = wait_result.not_done
+            if stats is not None:
+                stats.set_queue_depth(len(self._uploading_futures))
 
     def _submit_upload_content(self, content: bytes):
         # s3 part needs at least 5MB,
@@ -212,6 +266,8 @@ class S3BufferedWriter(Writable[bytes]):
             raise IOError("file already closed: %r" % self.name)
 
         result = self._buffer.write(data)
+        if self._hasher is not None:
+            self._hasher.update(data)
         if self._buffer.tell() >= self._block_size:
             self._submit_futures()
         self._offset += result
@@ -219,6 +275,8 @@ class S3BufferedWriter(Writable[bytes]):
         return result
 
     def _shutdown(self):
+        if self._io_stats is not None:
+            _logger.info("io stats of %r: %s" % (self.name, self._io_stats))
         if not self._is_global_executor:
             self._executor.shutdown()
 
@@ -236,10 +294,19 @@ class S3BufferedWriter(Writable[bytes]):
     def _close(self):
         _logger.debug("close file: %r" % self.name)
 
+        if self._hasher is not None:
+            self._digests = self._hasher.hexdigests()
+
         if not self._is_multipart:
+            kwargs = {}
+            if self._digests:
+                kwargs["Metadata"] = get_checksum_metadata(self._digests)
             with raise_s3_error(self.name):
                 self._client.put_object(
-                    Bucket=self._bucket, Key=self._key, Body=self._buffer.getvalue()
+                    Bucket=self._bucket,
+                    Key=self._key,
+                    Body=self._buffer.getvalue(),
+                    **kwargs,
                 )
             self._shutdown()
             return
@@ -253,5 +320,9 @@ class S3BufferedWriter(Writable[bytes]):
                 MultipartUpload=self._multipart_upload,
                 UploadId=self._upload_id,
             )
+        if self._digests:
+            # metadata can't be changed after created without rewriting the
+            # object, and digests are unknown when multipart upload is created
+            _logger.debug("digests of multipart upload are not saved: %r" % self.name)
 
         self._shutdown()
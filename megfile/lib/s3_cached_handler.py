@@ -1,13 +1,33 @@
+import mmap
 import os
-from typing import Optional
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from io import BytesIO
+from math import ceil
+from threading import Lock
+from typing import Dict, Iterable, List, Optional
 
-from megfile.errors import translate_fs_error, translate_s3_error
+from megfile.config import GLOBAL_MAX_WORKERS, READER_BLOCK_SIZE, S3_MAX_RETRY_TIMES
+from megfile.errors import (
+    patch_method,
+    s3_should_retry,
+    translate_fs_error,
+    translate_s3_error,
+)
 from megfile.lib.s3_memory_handler import S3MemoryHandler
-from megfile.pathlike import UNKNOWN_STAT
-from megfile.utils import generate_cache_path
+from megfile.pathlike import UNKNOWN_STAT, StatResult
+from megfile.utils import generate_cache_path, process_local
 
 
 class S3CachedHandler(S3MemoryHandler):
+    """Download s3 object to a local cache file for random read / write, and
+    upload it when closed.
+
+    If lazy is True, the cache file is a sparse file, and blocks of the object
+    are downloaded on demand when they are read, and block_forward blocks after
+    them are prefetched in background. Use `mmap` to map a range of the cache
+    file, which is downloaded before mapped.
+    """
+
     def __init__(
         self,
         bucket: str,
@@ -19,13 +39,28 @@ class S3CachedHandler(S3MemoryHandler):
         remove_cache_when_open: bool = True,
         profile_name: Optional[str] = None,
         atomic: bool = False,
+        content_stat=UNKNOWN_STAT,
+        lazy: bool = False,
+        block_size: int = READER_BLOCK_SIZE,
+        block_forward: int = 1,
     ):
         self._bucket = bucket
         self._key = key
         self._mode = mode
         self._client = s3_client
         self._profile_name = profile_name
-        self._content_stat = UNKNOWN_STAT
+        self._content_stat = content_stat
+        self._init_modified_ranges()
+
+        # blocks downloaded are marked in bitmap in lazy mode
+        self._is_lazy = lazy
+        self._block_size = int(block_size)
+        self._block_forward = block_forward
+        self._block_bitmap = bytearray()
+        self._block_futures: Dict[int, Future] = {}
+        self._block_lock = Lock()
+        # blocks written to the file behind its buffer since the last flush
+        self._blocks_fetched = self._blocks_flushed = 0
 
         if mode not in ("rb", "wb", "ab", "rb+", "wb+", "ab+"):
             raise ValueError("unacceptable mode: %r" % mode)
@@ -45,9 +80,226 @@ class S3CachedHandler(S3MemoryHandler):
 
     def fileno(self) -> int:
         # allow numpy.array to create a memmaped ndarray
+        self._load_range(0, self._remote_size)
+        self._fileobj.flush()
         return self._fileobj.fileno()
 
+    def mmap(self, offset: int = 0, size: Optional[int] = None) -> memoryview:
+        """Map a range of the cache file into memory read only, e.g. for
+        `numpy.frombuffer`
+
+        The range is downloaded before mapped in lazy mode, and content out of
+        the range can't be accessed by the returned view.
+
+        :param offset: Start of the range
+        :param size: Size of the range, to the end of file by default
+        :returns: Read only memoryview of content in [offset, offset + size)
+        """
+        self._fileobj.flush()
+        fileno = self._fileobj.fileno()
+        file_size = os.fstat(fileno).st_size
+        stop = file_size if size is None else min(offset + size, file_size)
+        if offset >= stop:
+            # empty range can not be mapped
+            return memoryview(b"")
+        self._load_range(offset, stop)
+        # offset of mapping must be a multiple of the allocation granularity
+        map_offset = offset - offset % mmap.ALLOCATIONGRANULARITY
+        mapped = mmap.mmap(
+            fileno, stop - map_offset, access=mmap.ACCESS_READ, offset=map_offset
+        )
+        return memoryview(mapped)[offset - map_offset :]
+
     def _translate_error(self, error: Exception):
         error = translate_fs_error(error, self._cache_path)  # pyre-ignore[6]
         error = translate_s3_error(error, self.name)
         return error
+
+    def _download_fileobj(self):
+        if not self._is_lazy:
+            return super()._download_fileobj()
+        need_download = self._mode[0] == "r"
+        need_download = need_download or (self._mode[0] == "a" and self._file_exists())
+        if not need_download:
+            return
+        try:
+            size, self._remote_etag = self._get_remote_size_and_etag()
+        except Exception as error:
+            raise self._translate_error(error)
+        # sparse file, blocks are filled when they are read
+        self._fileobj.truncate(size)
+        self._remote_size = size
+        self._block_bitmap = bytearray(ceil(size / self._block_size))
+        if self._mode[0] == "a":
+            self.seek(0, os.SEEK_END)
+
+    def _get_remote_size_and_etag(self):
+        if isinstance(self._content_stat, StatResult):
+            extra = self._content_stat.extra
+            etag = extra.get("ETag") if isinstance(extra, dict) else None
+            if etag:
+                return self._content_stat.size, etag
+        response = self._client.head_object(Bucket=self._bucket, Key=self._key)
+        return int(response["ContentLength"]), response.get("ETag")
+
+    def _fetch_block(self, index: int):
+        start = index * self._block_size
+        stop = min(start + self._block_size, self._remote_size)
+
+        def get_object() -> bytes:
+            kwargs = {}
+            if self._remote_etag:
+                # fail if the object is changed since opened
+                kwargs["IfMatch"] = self._remote_etag
+            return self._client.get_object(
+                Bucket=self._bucket,
+                Key=self._key,
+                Range="bytes=%d-%d" % (start, stop - 1),
+                **kwargs,
+            )["Body"].read()
+
+        get_object = patch_method(
+            get_object, max_retries=S3_MAX_RETRY_TIMES, should_retry=s3_should_retry
+        )
+        try:
+            data = get_object()
+            # write behind the buffer of file object, which is flushed later
+            os.pwrite(self._fileobj.fileno(), data, start)
+        except Exception:
+            with self._block_lock:
+                self._block_futures.pop(index, None)
+            raise
+        with self._block_lock:
+            self._block_bitmap[index] = 1
+            self._blocks_fetched += 1
+            self._block_futures.pop(index, None)
+
+    def _submit_block(self, index: int) -> Optional[Future]:
+        """Future of downloading block, None if the block is downloaded"""
+        with self._block_lock:
+            if self._block_bitmap[index]:
+                return None
+            future = self._block_futures.get(index)
+            if future is None:
+                executor = process_local(
+                    "S3CachedHandler.executor",
+                    ThreadPoolExecutor,
+                    max_workers=GLOBAL_MAX_WORKERS,
+                )
+                future = self._block_futures[index] = executor.submit(
+                    self._fetch_block, index
+                )
+            return future
+
+    def _load_range(self, start: int, stop: int, prefetch: bool = False):
+        stop = min(stop, self._remote_size)
+        if not self._is_lazy or start >= stop:
+            return
+        start_index = start // self._block_size
+        stop_index = ceil(stop / self._block_size)
+        futures = [
+            self._submit_block(index) for index in range(start_index, stop_index)
+        ]
+        if prefetch:
+            for index in range(
+                stop_index,
+                min(stop_index + self._block_forward, len(self._block_bitmap)),
+            ):
+                self._submit_block(index)
+        for future in futures:
+            if future is not None:
+                future.result()
+        if self._blocks_flushed != self._blocks_fetched:
+            # buffer of file object may hold holes read before blocks fetched
+            self._blocks_flushed = self._blocks_fetched
+            self._fileobj.flush()
+
+    def _wait_blocks(self, start_index: int, stop_index: int):
+        with self._block_lock:
+            futures = [
+                future
+                for index, future in self._block_futures.items()
+                if start_index <= index < stop_index
+            ]
+        wait(futures)
+
+    def _load_written_range(self, start: int, stop: int):
+        """Download blocks written partially, and mark blocks overwritten"""
+        if not self._is_lazy or start >= self._remote_size:
+            return
+        start_index = start // self._block_size
+        stop_index = ceil(stop / self._block_size)
+        if start % self._block_size:
+            self._load_range(start, start + 1)
+        if stop < min(stop_index * self._block_size, self._remote_size):
+            self._load_range(stop - 1, stop)
+        # blocks in downloading may overwrite content written
+        self._wait_blocks(start_index, stop_index)
+        with self._block_lock:
+            for index in range(start_index, min(stop_index, len(self._block_bitmap))):
+                self._block_bitmap[index] = 1
+
+    def read(self, size: Optional[int] = None) -> bytes:
+        if self.readable():
+            offset = self.tell()
+            stop = self._remote_size if size is None or size < 0 else offset + size
+            self._load_range(offset, stop, prefetch=True)
+        return super().read(size)
+
+    def readline(self, size: Optional[int] = None) -> bytes:
+        if not self._is_lazy or not self.readable():
+            return super().readline(size)
+        if size is not None and size < 0:
+            size = None
+        # read line block by block, since its end is unknown
+        buffer = BytesIO()
+        while size is None or buffer.tell() < size:
+            offset = self.tell()
+            rest = None if size is None else size - buffer.tell()
+            if offset >= self._remote_size:
+                # content appended is in cache file
+                buffer.write(super().readline(rest))
+                break
+            block_stop = (offset // self._block_size + 1) * self._block_size
+            self._load_range(offset, block_stop, prefetch=True)
+            line_size = block_stop - offset
+            if rest is not None:
+                line_size = min(line_size, rest)
+            line = super().readline(line_size)
+            buffer.write(line)
+            if not line or line.endswith(b"\n"):
+                break
+        return buffer.getvalue()
+
+    def readlines(self, hint: Optional[int] = None) -> List[bytes]:
+        if self.readable():
+            self._load_range(self.tell(), self._remote_size)
+        return super().readlines(hint)
+
+    def write(self, data: bytes) -> int:
+        if self._is_lazy and self.writable():
+            if self._mode[0] == "a":
+                start = self._fileobj.seek(0, os.SEEK_END)
+            else:
+                start = self.tell()
+            self._load_written_range(start, start + len(data))
+        return super().write(data)
+
+    def writelines(self, lines: Iterable[bytes]):
+        if not self._is_lazy:
+            return super().writelines(lines)
+        self.write(b"".join(lines))
+
+    def _wait_all_blocks(self):
+        self._wait_blocks(0, len(self._block_bitmap))
+
+    def _close(self, need_upload: bool = True):
+        if hasattr(self, "_fileobj"):
+            # blocks in downloading write to the file
+            self._wait_all_blocks()
+        super()._close(need_upload)
+
+    def _abort(self):
+        if hasattr(self, "_fileobj"):
+            self._wait_all_blocks()
+        super()._abort()
@@ -4,6 +4,7 @@ from logging import getLogger as get_logger
 from typing import Optional
 
 from megfile.config import (
+    IO_PROFILE,
     WRITER_MAX_BUFFER_SIZE,
 )
 from megfile.errors import raise_s3_error
@@ -34,6 +35,7 @@ class S3LimitedSeekableWriter(S3BufferedWriter, Seekable):
         max_workers: Optional[int] = None,
         profile_name: Optional[str] = None,
         atomic: bool = False,
+        io_profile: bool = IO_PROFILE,
     ):
         super().__init__(
             bucket,
@@ -44,6 +46,9 @@ class S3LimitedSeekableWriter(S3BufferedWriter, Seekable):
             max_workers=max_workers,
             profile_name=profile_name,
             atomic=atomic,
+            io_profile=io_profile,
+            # content may be overwritten by seeking, so digests are not calculated
+            checksums=(),
         )
 
         self._head_block_size = head_block_size or block_size
@@ -1,16 +1,44 @@
 import os
-from typing import Optional
+from concurrent.futures import ThreadPoolExecutor
+from logging import getLogger as get_logger
+from math import ceil
+from tempfile import SpooledTemporaryFile
+from typing import Iterable, List, Optional, Tuple
 
+from megfile.config import (
+    GLOBAL_MAX_WORKERS,
+    S3_MAX_RETRY_TIMES,
+    S3_MEMORY_HANDLER_SPILL_SIZE,
+    S3_SMALL_FILE_SIZE,
+    WRITER_BLOCK_SIZE,
+)
 from megfile.errors import (
     S3ConfigError,
     S3PermissionError,
     S3UnknownError,
+    patch_method,
+    s3_should_retry,
     translate_s3_error,
 )
 from megfile.lib.base_memory_handler import BaseMemoryHandler
+from megfile.lib.s3_buffered_writer import S3BufferedWriter
+from megfile.pathlike import UNKNOWN_STAT, StatResult
+from megfile.utils import process_local
+
+_logger = get_logger(__name__)
+
+# Max number of parts of a multipart upload
+MAX_PARTS = 10000
 
 
 class S3MemoryHandler(BaseMemoryHandler):
+    """Load s3 object into memory for random read / write, and upload it when
+    closed. Content larger than spill_size is spilled to a temporary file.
+
+    Ranges written are tracked, parts of the object not modified are copied by
+    UploadPartCopy on server side instead of being uploaded again.
+    """
+
     def __init__(
         self,
         bucket: str,
@@ -20,12 +48,25 @@ class S3MemoryHandler(BaseMemoryHandler):
         s3_client,
         profile_name: Optional[str] = None,
         atomic: bool = False,
+        content_stat=UNKNOWN_STAT,
+        spill_size: int = S3_MEMORY_HANDLER_SPILL_SIZE,
     ):
         self._bucket = bucket
         self._key = key
         self._client = s3_client
         self._profile_name = profile_name
-        super().__init__(mode=mode, atomic=atomic)
+        self._spill_size = spill_size
+        self._init_modified_ranges()
+        super().__init__(mode=mode, atomic=atomic, content_stat=content_stat)
+
+    def _init_modified_ranges(self):
+        # size and etag of the object downloaded, parts of it may be copied
+        self._remote_size = 0
+        self._remote_etag = None
+        self._modified_ranges: List[Tuple[int, int]] = []
+
+    def _create_fileobj(self):
+        return SpooledTemporaryFile(max_size=self._spill_size)
 
     @property
     def name(self) -> str:
@@ -37,12 +78,13 @@ class S3MemoryHandler(BaseMemoryHandler):
 
     def _file_exists_from_remote(self) -> bool:
         try:
-            self._client.head_object(Bucket=self._bucket, Key=self._key)
+            response = self._client.head_object(Bucket=self._bucket, Key=self._key)
         except Exception as error:
             error = self._translate_error(error)
             if isinstance(error, (S3UnknownError, S3ConfigError, S3PermissionError)):
                 raise error
             return False
+        self._remote_etag = response.get("ETag")
         return True
 
     def _download_fileobj(self):
@@ -50,21 +92,179 @@ class S3MemoryHandler(BaseMemoryHandler):
         need_download = need_download or (self._mode[0] == "a" and self._file_exists())
         if not need_download:
             return
-        # directly download to the file handle
         try:
-            self._client.download_fileobj(self._bucket, self._key, self._fileobj)
+            if self._is_small_file():
+                self._get_object_to_fileobj()
+            else:
+                if self.writable() and self._remote_etag is None:
+                    self._remote_etag = self._get_remote_etag()
+                # directly download to the file handle
+                self._client.download_fileobj(self._bucket, self._key, self._fileobj)
         except Exception as error:
             raise self._translate_error(error)
+        self._remote_size = self.seek(0, os.SEEK_END)
         if self._mode[0] == "r":
             self.seek(0, os.SEEK_SET)
 
+    def _get_remote_etag(self) -> Optional[str]:
+        if isinstance(self._content_stat, StatResult) and isinstance(
+            self._content_stat.extra, dict
+        ):
+            etag = self._content_stat.extra.get("ETag")
+            if etag:
+                return etag
+        return self._client.head_object(Bucket=self._bucket, Key=self._key).get("ETag")
+
+    def _is_small_file(self) -> bool:
+        # download_fileobj sends a HEAD request before GET
+        return (
+            isinstance(self._content_stat, StatResult)
+            and self._content_stat.size <= S3_SMALL_FILE_SIZE
+        )
+
+    def _get_object_to_fileobj(self):
+        def get_object():
+            response = self._client.get_object(Bucket=self._bucket, Key=self._key)
+            self._fileobj.seek(0)
+            self._fileobj.truncate()
+            self._fileobj.write(response["Body"].read())
+            self._remote_etag = response.get("ETag")
+
+        patch_method(
+            get_object, max_retries=S3_MAX_RETRY_TIMES, should_retry=s3_should_retry
+        )()
+
+    def _load_range(self, start: int, stop: int):
+        """Make sure content of the object in [start, stop) is downloaded, which
+        is always downloaded when opened"""
+
+    def write(self, data: bytes) -> int:
+        result = super().write(data)
+        self._add_modified_range(self.tell() - result, self.tell())
+        return result
+
+    def writelines(self, lines: Iterable[bytes]):
+        start = self.tell()
+        super().writelines(lines)
+        if self._mode[0] != "a":
+            self._add_modified_range(start, self.tell())
+
+    def _add_modified_range(self, start: int, stop: int):
+        if start >= self._remote_size or start == stop:
+            return  # appended content is never copied
+        ranges = self._modified_ranges
+        if ranges and ranges[-1][0] <= start <= ranges[-1][1]:
+            # usually written sequentially
+            ranges[-1] = (ranges[-1][0], max(ranges[-1][1], stop))
+        else:
+            ranges.append((start, stop))
+
+    def _is_part_modified(self, start: int, stop: int) -> bool:
+        if stop > self._remote_size:
+            return True
+        for range_start, range_stop in self._modified_ranges:
+            if range_start < stop and start < range_stop:
+                return True
+        return False
+
+    def _get_part_size(self, size: int) -> int:
+        return max(
+            WRITER_BLOCK_SIZE, S3BufferedWriter.MIN_BLOCK_SIZE, ceil(size / MAX_PARTS)
+        )
+
+    def _get_parts(self) -> List[Tuple[int, int, int, bool]]:
+        """Parts of content, as (part_number, start, stop, modified)"""
+        size = self.seek(0, os.SEEK_END)
+        part_size = self._get_part_size(size)
+        return [
+            (
+                index + 1,
+                start,
+                min(start + part_size, size),
+                self._is_part_modified(start, min(start + part_size, size)),
+            )
+            for index, start in enumerate(range(0, size, part_size))
+        ]
+
+    def _upload_part_copy(
+        self, upload_id: str, part_number: int, start: int, stop: int
+    ):
+        response = self._client.upload_part_copy(
+            Bucket=self._bucket,
+            Key=self._key,
+            UploadId=upload_id,
+            PartNumber=part_number,
+            CopySource={"Bucket": self._bucket, "Key": self._key},
+            CopySourceRange="bytes=%d-%d" % (start, stop - 1),
+            # fail if the object is changed since downloaded
+            CopySourceIfMatch=self._remote_etag,
+        )
+        return {"PartNumber": part_number, "ETag": response["CopyPartResult"]["ETag"]}
+
+    def _upload_modified_parts(self, parts: List[Tuple[int, int, int, bool]]):
+        executor = process_local(
+            "S3MemoryHandler.executor",
+            ThreadPoolExecutor,
+            max_workers=GLOBAL_MAX_WORKERS,
+        )
+        upload_id = self._client.create_multipart_upload(
+            Bucket=self._bucket, Key=self._key
+        )["UploadId"]
+        try:
+            copy_futures, results = [], []
+            for part_number, start, stop, modified in parts:
+                if not modified:
+                    copy_futures.append(
+                        executor.submit(
+                            self._upload_part_copy, upload_id, part_number, start, stop
+                        )
+                    )
+                    continue
+                self._load_range(start, stop)
+                self.seek(start, os.SEEK_SET)
+                response = self._client.upload_part(
+                    Bucket=self._bucket,
+                    Key=self._key,
+                    UploadId=upload_id,
+                    PartNumber=part_number,
+                    Body=self._fileobj.read(stop - start),
+                )
+                results.append({"PartNumber": part_number, "ETag": response["ETag"]})
+            results.extend(future.result() for future in copy_futures)
+            self._client.complete_multipart_upload(
+                Bucket=self._bucket,
+                Key=self._key,
+                MultipartUpload={
+                    "Parts": sorted(results, key=lambda part: part["PartNumber"])
+                },
+                UploadId=upload_id,
+            )
+        except Exception:
+            self._client.abort_multipart_upload(
+                Bucket=self._bucket, Key=self._key, UploadId=upload_id
+            )
+            raise
+
     def _upload_fileobj(self):
         need_upload = self.writable()
         if not need_upload:
             return
+        if self._remote_etag and self._remote_size >= S3BufferedWriter.MIN_BLOCK_SIZE:
+            parts = self._get_parts()
+            modified_parts = sum(1 for part in parts if part[3])
+            if modified_parts == 0:
+                _logger.debug("file not modified: %r" % self.name)
+                return
+            if modified_parts < len(parts):
+                try:
+                    self._upload_modified_parts(parts)
+                except Exception as error:
+                    raise self._translate_error(error)
+                return
         # directly upload from file handle
-        self.seek(0, os.SEEK_SET)
         try:
+            self._load_range(0, self._remote_size)
+            self.seek(0, os.SEEK_SET)
             self._client.upload_fileobj(self._fileobj, self._bucket, self._key)
         except Exception as error:
             raise self._translate_error(error)
@@ -1,12 +1,18 @@
+import os
 from concurrent.futures import Future
 from io import BytesIO
-from typing import Optional
+from logging import getLogger as get_logger
+from threading import Condition, Thread
+from typing import Dict, Optional
 
 from megfile.config import (
+    IO_PROFILE,
     READER_BLOCK_SIZE,
+    READER_HEDGE_PERCENTILE,
     READER_LAZY_PREFETCH,
     READER_MAX_BUFFER_SIZE,
     S3_MAX_RETRY_TIMES,
+    S3_READER_STREAM_MIN_SIZE,
 )
 from megfile.errors import (
     S3FileChangedError,
@@ -22,6 +28,8 @@ __all__ = [
     "LRUCacheFutureManager",
 ]
 
+_logger = get_logger(__name__)
+
 
 class S3PrefetchReader(BasePrefetchReader):
     """
@@ -33,6 +41,10 @@ class S3PrefetchReader(BasePrefetchReader):
     open(), seek() and read() will trigger prefetch read.
     The prefetch will cached block_forward blocks of data from offset position
     (the position after reading if the called function is read).
+
+    If the object is not smaller than stream_min_size, blocks are read from a
+    single streaming GET by a dedicated thread until the first seek, instead of
+    a ranged GET per block.
     """
 
     def __init__(
@@ -47,6 +59,9 @@ class S3PrefetchReader(BasePrefetchReader):
         max_retries: int = S3_MAX_RETRY_TIMES,
         max_workers: Optional[int] = None,
         profile_name: Optional[str] = None,
+        io_profile: bool = IO_PROFILE,
+        hedge_percentile: float = READER_HEDGE_PERCENTILE,
+        stream_min_size: int = S3_READER_STREAM_MIN_SIZE,
     ):
         self._bucket = bucket
         self._key = key
@@ -54,12 +69,25 @@ class S3PrefetchReader(BasePrefetchReader):
         self._profile_name = profile_name
         self._content_etag = None
 
+        self._stream_min_size = stream_min_size
+        self._is_sequential = True  # no seek happened
+        self._stream_closed = False
+        # stream is read by a dedicated thread, which sets results of futures of
+        # blocks submitted, from the block of _stream_index
+        self._stream = None
+        self._stream_index = 0
+        self._stream_thread: Optional[Thread] = None
+        self._stream_futures: Dict[int, Future] = {}
+        self._stream_cond = Condition()
+
         super().__init__(
             block_size=block_size,
             max_buffer_size=max_buffer_size,
             block_forward=block_forward,
             max_retries=max_retries,
             max_workers=max_workers,
+            io_profile=io_profile,
+            hedge_percentile=hedge_percentile,
         )
 
     def _get_content_size_from_remote(self):
@@ -117,15 +145,165 @@ class S3PrefetchReader(BasePrefetchReader):
         with raise_s3_error(self.name):
             return fetch_response()
 
-    def _fetch_buffer(self, index: int) -> BytesIO:
-        start = index * self._block_size
-        end = min((index + 1) * self._block_size - 1, self._content_size - 1)
-        response = self._fetch_response(start=start, end=end)
-        etag = response.get("ETag", None)
+    @property
+    def _is_streaming(self) -> bool:
+        return (
+            self._is_sequential
+            and not self._stream_closed
+            and self._block_capacity > 0
+            and 0 < self._stream_min_size <= self._content_size
+        )
+
+    def seek(self, offset: int, whence: int = os.SEEK_SET) -> int:
+        old_offset = self._offset
+        new_offset = super().seek(offset, whence)
+        if new_offset != old_offset and self._is_sequential:
+            # stream thread stops after the block in reading, and blocks waiting
+            # for it are fetched by range, seek does not wait for it
+            with self._stream_cond:
+                self._is_sequential = False
+                self._stream_cond.notify_all()
+        return new_offset
+
+    def _submit_future(self, index: int):
+        if index < 0 or index >= self._block_stop:
+            return
+        if self._future_key(index) not in self._futures and self._is_streaming:
+            with self._stream_cond:
+                if self._is_stream_reachable(index):
+                    future = Future()
+                    self._stream_futures[index] = future
+                    self._insert_futures(index, future)
+                    self._start_stream_thread(index)
+                    self._stream_cond.notify_all()
+                    _logger.debug(
+                        "submit future: %r, key: %r, from stream" % (self.name, index)
+                    )
+                    return
+        super()._submit_future(index)
+
+    def _is_stream_reachable(self, index: int) -> bool:
+        if self._stream_thread is None:
+            return True
+        return self._stream_index <= index < self._stream_index + self._block_capacity
+
+    def _start_stream_thread(self, index: int):
+        if self._stream_thread is not None:
+            return
+        # blocks are usually submitted in reversed order, start stream from the
+        # block after the current one
+        self._stream_index = min(index, self._block_index + 1)
+        self._stream_thread = Thread(
+            target=self._stream_blocks, name="S3PrefetchReader.stream", daemon=True
+        )
+        self._stream_thread.start()
+
+    def _next_stream_index(self) -> Optional[int]:
+        """Index of the next block to read from stream, None if stream stops"""
+        with self._stream_cond:
+            while True:
+                if not self._is_streaming or self._stream_index >= self._block_stop:
+                    return None
+                # read only blocks submitted, so reading is bounded by buffer
+                if any(index >= self._stream_index for index in self._stream_futures):
+                    return self._stream_index
+                self._stream_cond.wait()
+
+    def _stream_blocks(self):
+        """Read blocks from a single streaming GET in a dedicated thread, and set
+        results of their futures, so that threads of executor never wait for it"""
+        try:
+            while True:
+                index = self._next_stream_index()
+                if index is None:
+                    break
+                if self._stream is None:
+                    self._open_stream(index)
+                size = self._get_block_size(index)
+                data = self._stream.read(size)  # pyre-ignore[16]
+                if len(data) != size:
+                    raise IOError(
+                        "unexpected end of stream: %r, index: %d" % (self.name, index)
+                    )
+                if self._io_stats is not None:
+                    self._io_stats.add_fetched(size)
+                with self._stream_cond:
+                    self._stream_index += 1
+                    future = self._stream_futures.pop(index, None)
+                if future is not None and future.set_running_or_notify_cancel():
+                    future.set_result(BytesIO(data))
+        except Exception as error:
+            _logger.warning(
+                "read stream failed: %r, error: %r, fetch by range" % (self.name, error)
+            )
+        finally:
+            self._close_stream()
+            with self._stream_cond:
+                futures, self._stream_futures = self._stream_futures, {}
+                self._stream_thread = None
+            for index, future in futures.items():
+                self._fetch_by_range(index, future)
+
+    def _fetch_by_range(self, index: int, future: Future):
+        """Fetch block waiting for stream by range, after stream stopped"""
+        if self._stream_closed:
+            future.cancel()
+            return
+        if not future.set_running_or_notify_cancel():
+            return
+
+        def set_result(fetched: Future):
+            try:
+                future.set_result(fetched.result())
+            except BaseException as error:
+                future.set_exception(error)
+
+        try:
+            self._executor.submit(self._fetch_block, index).add_done_callback(
+                set_result
+            )
+        except RuntimeError as error:  # executor is shutdown
+            future.set_exception(error)
+
+    def _open_stream(self, index: int):
+        def get_object():
+            return self._client.get_object(
+                Bucket=self._bucket,
+                Key=self._key,
+                Range="bytes=%d-" % (index * self._block_size),
+            )
+
+        get_object = patch_method(
+            get_object, max_retries=self._max_retries, should_retry=s3_should_retry
+        )
+        with raise_s3_error(self.name):
+            response = get_object()
+        self._check_etag(response.get("ETag"))
+        self._stream = response["Body"]
+        _logger.debug("open stream: %r, index: %d" % (self.name, index))
+
+    def _close_stream(self):
+        if self._stream is not None:
+            self._stream.close()
+            self._stream = None
+
+    def _check_etag(self, etag: Optional[str]):
         if self._content_etag and etag and etag != self._content_etag:
             raise S3FileChangedError(
                 "File changed: %r, etag before: %s, after: %s"
                 % (self.name, self._content_etag, etag)
             )
 
+    def _fetch_buffer(self, index: int) -> BytesIO:
+        start = index * self._block_size
+        end = min((index + 1) * self._block_size - 1, self._content_size - 1)
+        response = self._fetch_response(start=start, end=end)
+        self._check_etag(response.get("ETag", None))
         return response["Body"]
+
+    def _close(self):
+        with self._stream_cond:
+            # stream thread closes stream after the block in reading
+            self._stream_closed = True
+            self._stream_cond.notify_all()
+        super()._close()
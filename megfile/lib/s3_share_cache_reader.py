@@ -1,9 +1,9 @@
 from collections import Counter
-from concurrent.futures import Future
 from logging import getLogger as get_logger
 from typing import Optional
 
 from megfile.config import (
+    IO_PROFILE,
     READER_BLOCK_SIZE,
     READER_MAX_BUFFER_SIZE,
     S3_MAX_RETRY_TIMES,
@@ -42,6 +42,7 @@ class S3ShareCacheReader(S3PrefetchReader):
         cache_key: str = "lru",
         max_workers: Optional[int] = None,
         profile_name: Optional[str] = None,
+        io_profile: bool = IO_PROFILE,
     ):
         self._cache_key = cache_key
 
@@ -55,6 +56,9 @@ class S3ShareCacheReader(S3PrefetchReader):
             max_retries=max_retries,
             max_workers=max_workers,
             profile_name=profile_name,
+            io_profile=io_profile,
+            # blocks are shared by readers, which read randomly usually
+            stream_min_size=0,
         )
 
     def _get_futures(self) -> "ShareCacheFutureManager":
@@ -72,24 +76,18 @@ class S3ShareCacheReader(S3PrefetchReader):
         self._cached_offset = offset
         self._block_index = index
 
-    def _submit_future(self, index: int):
-        if index < 0 or index >= self._block_stop:
-            return
-        self._futures.submit(
-            self._executor, (self.name, index), self._fetch_buffer, index
-        )
-
-    def _insert_futures(self, index: int, future: Future):
-        self._futures[(self.name, index)] = future
+    def _future_key(self, index: int):
+        return (self.name, index)
 
     def _fetch_future_result(self, index: int):
-        return self._futures.result((self.name, index))
+        return self._futures.result(self._future_key(index))
 
     def _cleanup_futures(self):
-        self._futures.cleanup(DEFAULT_BLOCK_CAPACITY)
+        self._count_evictions(self._futures.cleanup(DEFAULT_BLOCK_CAPACITY))
 
     def _close(self):
         _logger.debug("close file: %r" % self.name)
+        self._log_io_stats()
 
         if not self._is_global_executor:
             self._executor.shutdown()
@@ -0,0 +1,168 @@
+import hashlib
+import os
+import uuid
+from logging import getLogger as get_logger
+from typing import Callable
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover
+    fcntl = None
+
+_logger = get_logger(__name__)
+
+__all__ = [
+    "SharedCache",
+    "SharedCacheEntry",
+    "get_cache_key",
+]
+
+_LOCK_SUFFIX = ".lock"
+_TEMP_SUFFIX = ".tmp"
+
+
+class SharedCacheEntry:
+    """A file of shared cache in use, which is never evicted before released"""
+
+    def __init__(self, path: str, lock_fd: int):
+        self.path = path
+        self._lock_fd = lock_fd
+
+    def release(self):
+        if self._lock_fd is not None:
+            fcntl.flock(self._lock_fd, fcntl.LOCK_UN)  # pyre-ignore[16]
+            os.close(self._lock_fd)
+            self._lock_fd = None
+
+
+class SharedCache:
+    """Local cache of files shared by threads and processes on this host
+
+    Files are addressed by key, e.g. path and version of the remote file, and
+    every file has a lock file locked by flock:
+
+    - a shared lock is held while the file is in use, as the reference count
+    - an exclusive lock is held while downloading the file, so that other
+      users wait for it instead of downloading it again
+    - files are evicted in LRU order when total size exceeds max_size, and a
+      file is evicted only if the exclusive lock is acquired without blocking
+
+    :param directory: Directory of cache files
+    :param max_size: Max total size of cache files in bytes
+    """
+
+    def __init__(self, directory: str, max_size: int):
+        if fcntl is None:  # pragma: no cover
+            raise OSError("SharedCache is not supported on this platform")
+        self._directory = directory
+        self._max_size = max_size
+        os.makedirs(directory, exist_ok=True)
+
+    def get_path(self, key: str, suffix: str = "") -> str:
+        """Path of the cache file of key, suffix like ".mp4" is kept for tools
+        that recognize files by extension"""
+        if suffix in (_LOCK_SUFFIX, _TEMP_SUFFIX):
+            suffix = ""
+        return os.path.join(
+            self._directory, hashlib.sha256(key.encode()).hexdigest() + suffix
+        )
+
+    def acquire(
+        self, key: str, download: Callable[[str], None], suffix: str = ""
+    ) -> SharedCacheEntry:
+        """Get the cache file of key, download it by calling download with a
+        temporary path if it is not cached
+
+        :param key: Key of the file, which should change when the content changes
+        :param download: Function saving the content to the path given
+        :param suffix: Suffix of the cache file
+        :returns: Entry in use, which should be released after used
+        """
+        path = self.get_path(key, suffix)
+        fd = os.open(path + _LOCK_SUFFIX, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            while True:
+                fcntl.flock(fd, fcntl.LOCK_SH)  # pyre-ignore[16]
+                if os.path.exists(path):
+                    break
+                # only one of processes downloading the same file
+                fcntl.flock(fd, fcntl.LOCK_EX)  # pyre-ignore[16]
+                if not os.path.exists(path):
+                    self._download(path, download)
+                # lock is converted to shared lock non-atomically, and the file
+                # may be evicted in between, so check it again
+        except Exception:
+            os.close(fd)
+            raise
+        # mtime is the last used time for LRU eviction
+        os.utime(path)
+        self._evict()
+        return SharedCacheEntry(path, fd)
+
+    def _download(self, path: str, download: Callable[[str], None]):
+        temp_path = "%s.%s%s" % (path, uuid.uuid4().hex, _TEMP_SUFFIX)
+        _logger.debug("download shared cache: %r" % path)
+        try:
+            download(temp_path)
+            os.rename(temp_path, path)
+        finally:
+            if os.path.exists(temp_path):
+                os.unlink(temp_path)
+
+    def _list_files(self):
+        files = []
+        with os.scandir(self._directory) as entries:
+            for entry in entries:
+                if entry.name.endswith((_LOCK_SUFFIX, _TEMP_SUFFIX)):
+                    continue
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:  # evicted by others
+                    continue
+                files.append((stat.st_mtime, stat.st_size, entry.path))
+        return files
+
+    def _evict(self):
+        files = self._list_files()
+        total_size = sum(size for _, size, _ in files)
+        for _, size, path in sorted(files):
+            if total_size <= self._max_size:
+                break
+            if self._try_remove(path):
+                total_size -= size
+
+    def _try_remove(self, path: str) -> bool:
+        # lock files are never removed, otherwise users of the same file may
+        # lock different lock files
+        try:
+            fd = os.open(path + _LOCK_SUFFIX, os.O_RDWR | os.O_CREAT, 0o644)
+        except OSError:
+            return False
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)  # pyre-ignore[16]
+        except OSError:  # in use
+            os.close(fd)
+            return False
+        try:
+            os.unlink(path)
+            _logger.debug("evict shared cache: %r" % path)
+            return True
+        except FileNotFoundError:
+            return False
+        finally:
+            fcntl.flock(fd, fcntl.LOCK_UN)  # pyre-ignore[16]
+            os.close(fd)
+
+    def get_size(self) -> int:
+        """Total size of cache files"""
+        return sum(size for _, size, _ in self._list_files())
+
+
+def get_cache_key(path: str, stat) -> str:
+    """Key of the cache file of path with stat, e.g. path with ETag of s3 file,
+    or path with size and mtime"""
+    extra = getattr(stat, "extra", None)
+    etag = extra.get("ETag") if hasattr(extra, "get") else None
+    if etag:
+        return "%s\0etag:%s" % (path, etag)
+    return "%s\0size:%s,mtime:%s" % (path, stat.size, stat.mtime)
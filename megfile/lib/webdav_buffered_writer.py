@@ -0,0 +1,310 @@
+import posixpath
+import re
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from io import BytesIO
+from logging import getLogger as get_logger
+from queue import Empty, Full, Queue
+from threading import Thread
+from typing import Iterator, Optional
+from uuid import uuid4
+
+from webdav3.client import Client as WebdavClient
+from webdav3.client import Urn
+
+from megfile.config import (
+    GLOBAL_MAX_WORKERS,
+    WRITER_BLOCK_SIZE,
+    WRITER_MAX_BUFFER_SIZE,
+)
+from megfile.interfaces import Writable
+from megfile.utils import process_local
+
+_logger = get_logger(__name__)
+
+# Nextcloud / ownCloud expose user files under "/remote.php/dav/files/<user>/",
+# and accept chunked uploads under "/remote.php/dav/uploads/<user>/"
+NEXTCLOUD_FILES_PATTERN = re.compile(
+    r"^(?P<dav_root>.*/remote\.php/dav)/files/(?P<user>[^/]+)/"
+)
+
+_STREAM_END = object()
+
+
+class WebdavUploadAborted(Exception):
+    pass
+
+
+def get_chunk_upload_root(remote_path: str) -> Optional[str]:
+    """Return the chunked upload collection of a Nextcloud / ownCloud style server,
+    or None if the path doesn't look like one.
+    """
+    match = NEXTCLOUD_FILES_PATTERN.match(remote_path)
+    if match is None:
+        return None
+    return "%s/uploads/%s" % (match.group("dav_root"), match.group("user"))
+
+
+class WebdavBufferedWriter(Writable[bytes]):
+    """
+    Writer uploading content to WebDAV with bounded memory.
+
+    Content smaller than block_size is uploaded with a single PUT on close.
+    Otherwise, if the server supports Nextcloud / ownCloud style chunked upload,
+    blocks are uploaded as chunks concurrently and assembled by a MOVE on close;
+    if not, content is streamed in one PUT with chunked transfer encoding.
+    When atomic is True, the stream is PUT to a hidden temporary file next to
+    the target and moved onto it on close, so abort never leaves a partial file.
+
+    At most max_buffer_size bytes are buffered in memory.
+    """
+
+    # Nextcloud requires all chunks but the last one to be at least 5 MiB
+    MIN_CHUNK_SIZE = 5 * 2**20
+
+    def __init__(
+        self,
+        remote_path: str,
+        *,
+        webdav_client: WebdavClient,
+        name: str,
+        block_size: int = WRITER_BLOCK_SIZE,
+        max_buffer_size: int = WRITER_MAX_BUFFER_SIZE,
+        max_workers: Optional[int] = None,
+        atomic: bool = False,
+    ):
+        self._remote_path = remote_path
+        self._urn = Urn(remote_path)
+        self._client = webdav_client
+        self._name = name
+        self.__atomic__ = atomic
+
+        self._chunk_upload_root = get_chunk_upload_root(remote_path)
+        # user maybe put block_size with 'numpy.uint64' type
+        self._block_size = int(block_size)
+        if self._chunk_upload_root is not None:
+            self._block_size = max(self._block_size, self.MIN_CHUNK_SIZE)
+        self._max_buffer_size = max_buffer_size
+        self._total_buffer_size = 0
+        self._offset = 0
+        self._buffer = BytesIO()
+
+        # chunked upload
+        self._chunk_upload_dir = None
+        self._chunk_number = 0
+        self._uploading_futures = set()
+        self._is_global_executor = False
+        if max_workers is None:
+            self._executor = process_local(
+                "WebdavBufferedWriter.executor",
+                ThreadPoolExecutor,
+                max_workers=GLOBAL_MAX_WORKERS,
+            )
+            self._is_global_executor = True
+        else:
+            self._executor = ThreadPoolExecutor(max_workers=max_workers)
+
+        # chunked transfer encoding
+        self._stream_queue = None
+        self._stream_thread = None
+        self._exc = None
+        self._stream_path = remote_path
+        if atomic and self._chunk_upload_root is None:
+            dirname, basename = posixpath.split(remote_path)
+            self._stream_path = posixpath.join(
+                dirname, ".%s.megfile-%s.tmp" % (basename, uuid4().hex)
+            )
+
+        _logger.debug("open file: %r, mode: %s" % (self.name, self.mode))
+
+    @property
+    def name(self) -> str:
+        return self._name
+
+    @property
+    def mode(self) -> str:
+        return "wb"
+
+    def tell(self) -> int:
+        return self._offset
+
+    @property
+    def _is_streaming(self) -> bool:
+        return self._chunk_upload_dir is not None or self._stream_queue is not None
+
+    @property
+    def _destination_header(self) -> str:
+        return "Destination: %s" % self._client.get_url(self._urn.quote())
+
+    def _upload_chunk(self, chunk_path: str, content: bytes) -> int:
+        self._client.execute_request(
+            action="upload",
+            path=Urn(chunk_path).quote(),
+            data=content,
+            headers_ext=[self._destination_header],
+        )
+        return len(content)
+
+    def _submit_chunk(self, content: bytes):
+        if self._chunk_upload_dir is None:
+            self._chunk_upload_dir = "%s/megfile-%s" % (
+                self._chunk_upload_root,
+                uuid4().hex,
+            )
+            self._client.execute_request(
+                action="mkdir",
+                path=Urn(self._chunk_upload_dir, directory=True).quote(),
+                headers_ext=[self._destination_header],
+            )
+
+        # chunk names must be numbers between 1 and 10000
+        self._chunk_number += 1
+        chunk_path = "%s/%05d" % (self._chunk_upload_dir, self._chunk_number)
+        self._uploading_futures.add(
+            self._executor.submit(self._upload_chunk, chunk_path, content)
+        )
+        self._total_buffer_size += len(content)
+
+        while (
+            self._uploading_futures and self._total_buffer_size >= self._max_buffer_size
+        ):
+            wait_result = wait(self._uploading_futures, return_when=FIRST_COMPLETED)
+            for future in wait_result.done:
+                self._total_buffer_size -= future.result()
+            self._uploading_futures = wait_result.not_done
+
+    def _iter_stream(self) -> Iterator[bytes]:
+        while True:
+            content = self._stream_queue.get()  # pyre-ignore[16]
+            if content is _STREAM_END:
+                return
+            if isinstance(content, WebdavUploadAborted):
+                raise content
+            yield content
+
+    def _upload_stream(self):
+        try:
+            self._client.execute_request(
+                action="upload",
+                path=Urn(self._stream_path).quote(),
+                data=self._iter_stream(),
+            )
+        except Exception as error:
+            self._exc = error
+
+    def _raise_exception(self):
+        if self._exc is not None:
+            raise self._exc
+
+    def _put_stream(self, content):
+        if self._stream_queue is None:
+            self._stream_queue = Queue(
+                maxsize=max(self._max_buffer_size // self._block_size, 1)
+            )
+            self._stream_thread = Thread(target=self._upload_stream, daemon=True)
+            self._stream_thread.start()
+
+        while True:
+            self._raise_exception()
+            if not self._stream_thread.is_alive():  # pyre-ignore[16]
+                raise IOError("upload stream closed unexpectedly: %r" % self.name)
+            try:
+                self._stream_queue.put(content, timeout=1)
+                return
+            except Full:
+                continue
+
+    def _submit_buffer(self):
+        content = self._buffer.getvalue()
+        if len(content) == 0:
+            return
+        self._buffer.seek(0)
+        self._buffer.truncate()
+        if self._chunk_upload_root is not None:
+            self._submit_chunk(content)
+        else:
+            self._put_stream(content)
+
+    def write(self, data: bytes) -> int:
+        if self.closed:
+            raise IOError("file already closed: %r" % self.name)
+
+        result = self._buffer.write(data)
+        if self._buffer.tell() >= self._block_size:
+            self._submit_buffer()
+        self._offset += result
+        return result
+
+    def _shutdown(self):
+        if not self._is_global_executor:
+            self._executor.shutdown()
+
+    def _abort(self):
+        _logger.debug("abort file: %r" % self.name)
+
+        if self._stream_queue is not None:
+            # drop pending content, and break the request by raising in the body
+            while True:
+                try:
+                    self._stream_queue.get_nowait()
+                except Empty:
+                    break
+            self._stream_queue.put(WebdavUploadAborted(self.name))
+            self._stream_thread.join()  # pyre-ignore[16]
+            if self._stream_path != self._remote_path:
+                try:
+                    self._client.execute_request(
+                        action="clean", path=Urn(self._stream_path).quote()
+                    )
+                except Exception as error:
+                    # the temporary file may not have been created yet
+                    _logger.debug(
+                        "remove temporary file failed: %r, error: %s"
+                        % (self._stream_path, error)
+                    )
+
+        if self._chunk_upload_dir is not None:
+            wait(self._uploading_futures)
+            self._client.execute_request(
+                action="clean",
+                path=Urn(self._chunk_upload_dir, directory=True).quote(),
+            )
+
+        self._shutdown()
+
+    def _close(self):
+        _logger.debug("close file: %r" % self.name)
+
+        if not self._is_streaming:
+            self._buffer.seek(0)
+            self._client.upload_to(self._buffer, self._remote_path)
+            self._shutdown()
+            return
+
+        self._submit_buffer()
+
+        if self._stream_queue is not None:
+            self._put_stream(_STREAM_END)
+            self._stream_thread.join()  # pyre-ignore[16]
+            self._shutdown()
+            self._raise_exception()
+            if self._stream_path != self._remote_path:
+                self._client.execute_request(
+                    action="move",
+                    path=Urn(self._stream_path).quote(),
+                    headers_ext=[self._destination_header, "Overwrite: T"],
+                )
+            return
+
+        for future in self._uploading_futures:
+            future.result()
+        self._uploading_futures = set()
+        self._client.execute_request(
+            action="move",
+            path=Urn("%s/.file" % self._chunk_upload_dir).quote(),
+            headers_ext=[
+                self._destination_header,
+                "Overwrite: T",
+                "OC-Total-Length: %d" % self._offset,
+            ],
+        )
+        self._shutdown()
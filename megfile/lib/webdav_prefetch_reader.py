@@ -1,26 +1,78 @@
+from concurrent.futures import Future
 from io import BytesIO
 from typing import Optional
 
 from webdav3.client import Client as WebdavClient
 from webdav3.client import Urn
+from webdav3.exceptions import ResponseErrorCode
 
 from megfile.config import (
+    IO_PROFILE,
     READER_BLOCK_SIZE,
     READER_MAX_BUFFER_SIZE,
     WEBDAV_MAX_RETRY_TIMES,
 )
 from megfile.errors import (
-    HttpBodyIncompleteError,
     http_should_retry,
     patch_method,
 )
 from megfile.lib.base_prefetch_reader import BasePrefetchReader
+from megfile.lib.http_prefetch_reader import (
+    check_content_complete,
+    get_content_size_from_content_range,
+)
 from megfile.lib.webdav_memory_handler import _webdav_stat
 from megfile.pathlike import UNKNOWN_STAT
 
 DEFAULT_TIMEOUT = (60, 60 * 60 * 24)
 
 
+def _webdav_fetch_first_block(
+    client: WebdavClient,
+    remote_path: str,
+    block_size: int,
+    max_retries: int = WEBDAV_MAX_RETRY_TIMES,
+) -> Optional[dict]:
+    """Fetch the first block by a ranged GET, which also tells the content size and
+    whether server supports Range, so that opening a file needs only one request.
+
+    :returns: Response of the first block, or None if server doesn't answer with
+        partial content (e.g. Range is not supported, or file is empty)
+    """
+    urn = Urn(remote_path)
+
+    def fetch_first_block() -> Optional[dict]:
+        try:
+            response = client.execute_request(
+                action="download",
+                path=urn.quote(),
+                headers_ext=[f"Range: bytes=0-{block_size - 1}"],
+            )
+        except ResponseErrorCode as error:
+            if error.code == 416:  # pytype: disable=attribute-error
+                return None
+            raise
+        with response:
+            content_size = get_content_size_from_content_range(response.headers)
+            if response.status_code != 206 or content_size is None:
+                return None
+            return {
+                "Body": BytesIO(check_content_complete(response)),
+                "ContentSize": content_size,
+                "Headers": response.headers,
+                "Cookies": response.cookies,
+                "StatusCode": response.status_code,
+            }
+
+    fetch_first_block = patch_method(
+        fetch_first_block,
+        max_retries=max_retries,
+        should_retry=http_should_retry,
+    )
+
+    return fetch_first_block()
+
+
 class WebdavPrefetchReader(BasePrefetchReader):
     """
     Reader to fast read the http content, service must support Accept-Ranges.
@@ -32,6 +84,9 @@ class WebdavPrefetchReader(BasePrefetchReader):
 
     The prefetch will cached block_forward blocks of data from offset position
     (the position after reading if the called function is read).
+
+    If first_index_response (returned by _webdav_fetch_first_block) is given,
+    its content is used as the first block without requesting again.
     """
 
     def __init__(
@@ -45,10 +100,14 @@ class WebdavPrefetchReader(BasePrefetchReader):
         block_forward: Optional[int] = None,
         max_retries: int = WEBDAV_MAX_RETRY_TIMES,
         max_workers: Optional[int] = None,
+        first_index_response: Optional[dict] = None,
+        io_profile: bool = IO_PROFILE,
     ):
         self._urn = Urn(remote_path)
         self._remote_path = remote_path
         self._client = client or WebdavClient({})
+        self._content_size = None
+        self._first_index_response = first_index_response
 
         super().__init__(
             block_size=block_size,
@@ -57,12 +116,38 @@ class WebdavPrefetchReader(BasePrefetchReader):
             max_retries=max_retries,
             max_workers=max_workers,
             content_stat=content_stat,
+            io_profile=io_profile,
         )
 
+    def _get_content_size(self) -> int:
+        if self._first_index_response is not None:
+            first_index_response, self._first_index_response = (
+                self._first_index_response,
+                None,
+            )
+            return self._insert_first_block(first_index_response)
+        return super()._get_content_size()
+
     def _get_content_size_from_remote(self) -> int:
+        if self._block_capacity > 0:
+            first_index_response = _webdav_fetch_first_block(
+                self._client,
+                self._remote_path,
+                self._block_size,
+                max_retries=self._max_retries,
+            )
+            if first_index_response is not None:
+                return self._insert_first_block(first_index_response)
         info = _webdav_stat(self._client, self._remote_path)
         return int(info.get("size") or 0)
 
+    def _insert_first_block(self, first_index_response: dict) -> int:
+        if self._block_capacity > 0:
+            first_future = Future()
+            first_future.set_result(first_index_response["Body"])
+            self._insert_futures(index=0, future=first_future)
+        return first_index_response["ContentSize"]
+
     @property
     def name(self) -> str:
         return self._remote_path
@@ -88,22 +173,8 @@ class WebdavPrefetchReader(BasePrefetchReader):
             with self._client.execute_request(
                 action="download", path=self._urn.quote(), headers_ext=headers_ext
             ) as response:
-                headers = response.headers
-                if (
-                    "Content-Length" in headers
-                    and len(response.content) != int(headers["Content-Length"])
-                    and not headers.get("Content-Encoding")
-                ):
-                    raise HttpBodyIncompleteError(
-                        "The downloaded content is incomplete, "
-                        "expected size: %s, actual size: %d"
-                        % (
-                            headers["Content-Length"],
-                            len(response.content),
-                        )
-                    )
                 return {
-                    "Body": BytesIO(response.content),
+                    "Body": BytesIO(check_content_complete(response)),
                     "Headers": response.headers,
                     "Cookies": response.cookies,
                     "StatusCode": response.status_code,
@@ -1,13 +1,24 @@
-import hashlib
 import io
 import os
 import re
 import time
 from collections import deque
-from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
 from functools import cached_property, lru_cache, wraps
 from logging import getLogger as get_logger
-from typing import IO, Any, BinaryIO, Callable, Dict, Iterator, List, Optional, Tuple
+from threading import Lock
+from typing import (
+    IO,
+    Any,
+    BinaryIO,
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Tuple,
+)
 from urllib.parse import urlparse
 
 import boto3
@@ -19,12 +30,22 @@ from botocore.utils import calculate_md5 as botocore_calculate_md5
 from megfile.config import (
     GLOBAL_MAX_WORKERS,
     HTTP_AUTH_HEADERS,
+    IO_PROFILE,
     READER_BLOCK_SIZE,
     READER_MAX_BUFFER_SIZE,
     S3_CLIENT_CACHE_MODE,
     S3_FAST_LIST,
+    S3_MAX_BYTES_PER_SECOND,
+    S3_MAX_REQUESTS_PER_SECOND,
     S3_MAX_RETRY_TIMES,
+    S3_RANDOM_READ_BLOCK_SIZE,
+    S3_RATE_LIMIT_SCOPE,
+    S3_RATE_LIMIT_SHARED,
+    S3_READER_STREAM_MIN_SIZE,
+    S3_SMALL_FILE_SIZE,
+    S3_SYMLINK_EMPTY_ONLY,
     WRITER_BLOCK_SIZE,
+    WRITER_CHECKSUMS,
     WRITER_MAX_BUFFER_SIZE,
     parse_boolean,
 )
@@ -72,7 +93,16 @@ from megfile.lib.glob import (
     split_magic,
     ungloblize,
 )
+from megfile.lib.hashing import calculate_dir_md5
 from megfile.lib.joinpath import uri_join
+from megfile.lib.metrics import (
+    get_body_size,
+    get_counting_pool_classes,
+    get_response_info,
+    instrument_request,
+)
+from megfile.lib.rate_limiter import get_rate_limiter
+from megfile.lib.s3_append_writer import S3AppendWriter
 from megfile.lib.s3_buffered_writer import (
     S3BufferedWriter,
 )
@@ -83,11 +113,13 @@ from megfile.lib.s3_pipe_handler import S3PipeHandler
 from megfile.lib.s3_prefetch_reader import S3PrefetchReader
 from megfile.lib.s3_share_cache_reader import S3ShareCacheReader
 from megfile.lib.url import get_url_scheme
+from megfile.pathlike import UNKNOWN_STAT
 from megfile.smart_path import SmartPath
 from megfile.utils import (
     _is_pickle,
     binary_open,
     calculate_md5,
+    copyfileobj,
     generate_cache_path,
     get_content_offset,
     is_domain_or_subdomain,
@@ -131,7 +163,51 @@ CALCULATE_MD5_FOR_OPERATIONS = {
 }
 
 
-def _patch_make_request(client: botocore.client.BaseClient, redirect: bool = False):
+def _get_rate_limit_key(
+    endpoint: Optional[str], bucket: str, profile_name: Optional[str]
+) -> str:
+    if S3_RATE_LIMIT_SCOPE == "profile":
+        return "s3+profile:%s" % (profile_name or "default")
+    if S3_RATE_LIMIT_SCOPE == "endpoint":
+        return "s3+endpoint:%s" % endpoint
+    return "s3+bucket:%s/%s" % (endpoint, bucket)
+
+
+def _limit_request_rate(
+    make_request: Callable,
+    describe_request: Callable,
+    describe_response: Callable,
+    endpoint: Optional[str],
+    profile_name: Optional[str],
+) -> Callable:
+    """Wait for rate limits of requests and bytes before every request, body of
+    response is counted after the response is received"""
+
+    @wraps(make_request)
+    def wrapper(operation_model, request_dict, request_context):
+        _, bucket, size = describe_request(
+            operation_model, request_dict, request_context
+        )
+        limiter = get_rate_limiter(
+            _get_rate_limit_key(endpoint, bucket, profile_name),
+            S3_MAX_REQUESTS_PER_SECOND,
+            S3_MAX_BYTES_PER_SECOND,
+            shared=S3_RATE_LIMIT_SHARED,
+        )
+        limiter.acquire_request(size)
+        result = make_request(operation_model, request_dict, request_context)
+        if request_dict.get("method") != "HEAD" and isinstance(result, tuple):
+            limiter.acquire_bytes(describe_response(result)[0])
+        return result
+
+    return wrapper
+
+
+def _patch_make_request(
+    client: botocore.client.BaseClient,
+    redirect: bool = False,
+    profile_name: Optional[str] = None,
+):
     def after_callback(result: Tuple[AWSResponse, dict], *args, **kwargs):
         if (
             not isinstance(result, tuple)
@@ -166,14 +242,46 @@ def _patch_make_request(client: botocore.client.BaseClient, redirect: bool = Fal
             request_dict,
         )
 
-    client._make_request = patch_method(
-        client._make_request,
-        max_retries=max_retries,
-        should_retry=s3_should_retry,
-        after_callback=after_callback,
-        before_callback=before_callback,
-        retry_callback=retry_callback,
+    def describe_request(operation_model, request_dict, request_context):
+        bucket = (request_context or {}).get("input_params", {}).get("Bucket", "")
+        headers = request_dict.get("headers") or {}
+        # body may be wrapped for aws-chunked encoding
+        size = headers.get("X-Amz-Decoded-Content-Length") or headers.get(
+            "Content-Length"
+        )
+        if size is None:
+            size = get_body_size(request_dict.get("body"))
+        return operation_model.name, bucket, int(size)
+
+    def describe_response(result: Tuple[AWSResponse, dict]):
+        return get_response_info(result[0])
+
+    endpoint = getattr(getattr(client, "_endpoint", None), "host", None)
+    make_request = client._make_request
+    if S3_MAX_REQUESTS_PER_SECOND > 0 or S3_MAX_BYTES_PER_SECOND > 0:
+        make_request = _limit_request_rate(
+            make_request, describe_request, describe_response, endpoint, profile_name
+        )
+
+    client._make_request = instrument_request(
+        patch_method(
+            make_request,
+            max_retries=max_retries,
+            should_retry=s3_should_retry,
+            after_callback=after_callback,
+            before_callback=before_callback,
+            retry_callback=retry_callback,
+            endpoint=endpoint,
+        ),
+        "s3",
+        describe_request,
+        describe_response,
     )
+    # pools of endpoint and proxies are created by classes in this dict
+    http_session = getattr(getattr(client, "_endpoint", None), "http_session", None)
+    pool_classes = getattr(http_session, "_pool_classes_by_scheme", None)
+    if isinstance(pool_classes, dict):
+        pool_classes.update(get_counting_pool_classes(pool_classes))
 
     def patch_send(send):
         def patched_send(request: AWSPreparedRequest) -> AWSResponse:
@@ -359,7 +467,7 @@ def get_s3_client(
         aws_secret_access_key=secret_key,
         aws_session_token=session_token,
     )
-    client = _patch_make_request(client, redirect=redirect)
+    client = _patch_make_request(client, redirect=redirect, profile_name=profile_name)
     return client
 
 
@@ -898,6 +1006,66 @@ def _s3_glob_stat_single_path(
     return create_generator(s3_pathname)
 
 
+def _s3_follow_links(
+    s3_path: "S3Path",
+    entries: Iterable[FileEntry],
+    max_workers: Optional[int] = None,
+) -> Iterator[FileEntry]:
+    """Replace entries of symlinks with entries of their targets, in the same order.
+
+    Metadata of objects are requested concurrently, while a bounded number of
+    entries are pending. Stats of targets are cached, since many links may point
+    to the same target.
+    """
+    target_stats, target_locks = {}, {}
+
+    def follow_link(entry: FileEntry) -> FileEntry:
+        try:
+            target_path = s3_path.from_path(entry.path).readlink()
+        except S3NotALinkError:
+            return entry
+        target = target_path.path_with_protocol
+        with target_locks.setdefault(target, Lock()):
+            if target not in target_stats:
+                target_stats[target] = target_path.lstat()
+        return FileEntry(target_path.name, target, target_stats[target])
+
+    if max_workers is None:
+        executor = process_local(
+            "s3_follow_links.executor",
+            ThreadPoolExecutor,
+            max_workers=GLOBAL_MAX_WORKERS,
+        )
+        max_pending = GLOBAL_MAX_WORKERS * 2
+    else:
+        executor = ThreadPoolExecutor(max_workers=max_workers)
+        max_pending = max_workers * 2
+
+    def is_ready(item) -> bool:
+        return not isinstance(item, Future) or item.done()
+
+    def get_entry(item) -> FileEntry:
+        return item.result() if isinstance(item, Future) else item
+
+    pending = deque()
+    try:
+        for entry in entries:
+            if S3_SYMLINK_EMPTY_ONLY and entry.stat.size > 0:
+                pending.append(entry)
+            else:
+                pending.append(executor.submit(follow_link, entry))
+            while pending and (len(pending) > max_pending or is_ready(pending[0])):
+                yield get_entry(pending.popleft())
+        while pending:
+            yield get_entry(pending.popleft())
+    finally:
+        for item in pending:
+            if isinstance(item, Future):
+                item.cancel()
+        if max_workers is not None:
+            executor.shutdown(wait=False)
+
+
 def _s3_scan_pairs(
     src_url: PathLike, dst_url: PathLike
 ) -> Iterator[Tuple[PathLike, PathLike]]:
@@ -1145,6 +1313,7 @@ def s3_cached_open(
     followlinks: bool = False,
     *,
     cache_path: Optional[str] = None,
+    lazy: bool = False,
 ) -> S3CachedHandler:
     """Open a local-cache file reader / writer, for frequent random read / write
 
@@ -1166,6 +1335,8 @@ def s3_cached_open(
         decoding errors are to be handled—this cannot be used in binary mode.
     :param followlinks: follow symbolic link, default `False`
     :param cache_path: cache file path
+    :param lazy: If True, blocks of the file are downloaded when they are read,
+        instead of downloading the whole file when opened
     :returns: An opened BufferedReader / BufferedWriter object
     """
     if mode not in ("rb", "wb", "ab", "rb+", "wb+", "ab+"):
@@ -1188,6 +1359,7 @@ def s3_cached_open(
         s3_client=client,
         cache_path=cache_path,
         profile_name=s3_url._profile_name,
+        lazy=lazy,
     )
 
 
@@ -1206,6 +1378,10 @@ def s3_buffered_open(
     share_cache_key: Optional[str] = None,
     cache_path: Optional[str] = None,
     atomic: bool = False,
+    checksums: Optional[Iterable[str]] = None,
+    access: Optional[str] = None,
+    stat: Optional[StatResult] = None,
+    io_profile: bool = IO_PROFILE,
 ) -> IO:
     """Open an asynchronous prefetch reader, to support fast sequential read
 
@@ -1240,11 +1416,33 @@ def s3_buffered_open(
         Read-handle support arbitrary seek
     :param buffered: If you are operating pickle file without .pkl or .pickle extension,
         please set this to True to avoid the performance issue.
+    :param checksums: Digests calculated while writing, e.g. ("md5", "sha256"),
+        which are available as `digests` of the writer after closed, and saved as
+        user metadata unless the file is uploaded by multipart upload.
+        `MEGFILE_WRITER_CHECKSUMS` by default.
+        Notes: This parameter are valid only for write-handle without limited seek.
+    :param access: How the file will be read, which chooses the reader in "rb" mode:
+
+        - "sequential": read from a single streaming GET until the first seek
+        - "random": read small blocks without readahead, and download blocks of
+          the cache file when they are read if cache_path is given
+        - "whole": read the whole file into memory
+        - "once": read through once, from a streaming GET with a small buffer
+
+        `None` by default, files of known size not larger than
+        `MEGFILE_S3_SMALL_FILE_SIZE` are read into memory by a single GET.
+    :param stat: Stat of the file if known, e.g. `FileEntry.stat` of listing
+        results, which saves the HEAD request of "ab" mode, and is used to choose
+        the reader in "rb" mode.
+    :param io_profile: Collect statistics of the prefetch reader or buffered
+        writer, which are logged when closed, `MEGFILE_IO_PROFILE` by default.
     :returns: An opened File object
     :raises: S3FileNotFoundError
     """
     if mode not in ("rb", "wb", "ab", "rb+", "wb+", "ab+"):
         raise ValueError("unacceptable mode: %r" % mode)
+    if access not in (None, "sequential", "random", "whole", "once"):
+        raise ValueError("unacceptable access: %r" % access)
     if not isinstance(s3_url, S3Path):
         s3_url = S3Path(s3_url)
     if followlinks:
@@ -1256,6 +1454,25 @@ def s3_buffered_open(
     config = botocore.config.Config(max_pool_connections=GLOBAL_MAX_WORKERS)
     client = get_s3_client_with_cache(config=config, profile_name=s3_url._profile_name)
 
+    content_stat = UNKNOWN_STAT
+    if stat is not None and not followlinks:
+        # stat of listing results may check symlink lazily by HEAD request
+        content_stat = StatResult(size=stat.size, mtime=stat.mtime, extra=stat.extra)
+
+    if mode == "ab" and cache_path is None:
+        return S3AppendWriter(
+            bucket,
+            key,
+            s3_client=client,
+            max_workers=max_workers,
+            block_size=block_size or WRITER_BLOCK_SIZE,
+            max_buffer_size=max_buffer_size or WRITER_MAX_BUFFER_SIZE,
+            profile_name=s3_url._profile_name,
+            atomic=atomic,
+            content_stat=content_stat,
+            io_profile=io_profile,
+        )
+
     if "a" in mode or "+" in mode:
         if cache_path is None:
             return S3MemoryHandler(
@@ -1265,6 +1482,7 @@ def s3_buffered_open(
                 s3_client=client,
                 profile_name=s3_url._profile_name,
                 atomic=atomic,
+                content_stat=content_stat,
             )
         return S3CachedHandler(
             bucket,
@@ -1274,10 +1492,44 @@ def s3_buffered_open(
             cache_path=cache_path,
             profile_name=s3_url._profile_name,
             atomic=atomic,
+            content_stat=content_stat,
+            # only blocks read are downloaded
+            lazy=access == "random",
         )
 
+    if mode == "rb" and share_cache_key is None:
+        if (
+            access is None
+            and isinstance(content_stat, StatResult)
+            and content_stat.size <= S3_SMALL_FILE_SIZE
+        ):
+            access = "whole"
+        if access == "whole":
+            reader = S3MemoryHandler(
+                bucket,
+                key,
+                mode,
+                s3_client=client,
+                profile_name=s3_url._profile_name,
+                content_stat=content_stat,
+            )
+            if buffered or _is_pickle(reader):
+                reader = io.BufferedReader(reader)  # type: ignore
+            return reader
+
     if mode == "rb":
+        stream_min_size = S3_READER_STREAM_MIN_SIZE
+        if access == "random":
+            block_size = block_size or S3_RANDOM_READ_BLOCK_SIZE
+            if block_forward is None:
+                block_forward = 0
+            stream_min_size = 0
+        elif access in ("sequential", "once"):
+            stream_min_size = 1
         block_size = block_size or READER_BLOCK_SIZE
+        if access == "once" and max_buffer_size is None:
+            # blocks are not read again, only buffer blocks read ahead
+            max_buffer_size = min(READER_MAX_BUFFER_SIZE, 4 * block_size)
         if share_cache_key is not None:
             reader = S3ShareCacheReader(
                 bucket,
@@ -1289,6 +1541,7 @@ def s3_buffered_open(
                 block_size=block_size,
                 block_forward=block_forward,
                 profile_name=s3_url._profile_name,
+                io_profile=io_profile,
             )
         else:
             if max_buffer_size is None:
@@ -1303,6 +1556,8 @@ def s3_buffered_open(
                 block_forward=block_forward,
                 block_size=block_size,
                 profile_name=s3_url._profile_name,
+                stream_min_size=stream_min_size,
+                io_profile=io_profile,
             )
         if buffered or _is_pickle(reader):
             reader = io.BufferedReader(reader)  # type: ignore
@@ -1321,6 +1576,7 @@ def s3_buffered_open(
             max_buffer_size=max_buffer_size,
             profile_name=s3_url._profile_name,
             atomic=atomic,
+            io_profile=io_profile,
         )
     else:
         if max_buffer_size is None:
@@ -1334,6 +1590,8 @@ def s3_buffered_open(
             max_buffer_size=max_buffer_size,
             profile_name=s3_url._profile_name,
             atomic=atomic,
+            checksums=WRITER_CHECKSUMS if checksums is None else checksums,
+            io_profile=io_profile,
         )
     if buffered or _is_pickle(writer):
         writer = io.BufferedWriter(writer)  # type: ignore
@@ -1486,6 +1744,8 @@ def s3_upload(
     callback: Optional[Callable[[int], None]] = None,
     followlinks: bool = False,
     overwrite: bool = True,
+    *,
+    checksums: Optional[Iterable[str]] = None,
 ) -> None:
     """
     Uploads a file from local filesystem to s3.
@@ -1496,6 +1756,9 @@ def s3_upload(
         the data size (in bytes) of copy since the last call
     :param followlinks: False if regard symlink as file, else True
     :param overwrite: whether or not overwrite file when exists, default is True
+    :param checksums: Digests calculated while uploading and saved as user
+        metadata unless the file is uploaded by multipart upload,
+        `MEGFILE_WRITER_CHECKSUMS` by default
     """
     from megfile.fs_path import FSPath, is_fs
 
@@ -1519,6 +1782,24 @@ def s3_upload(
         return
 
     client = get_s3_client_with_cache(profile_name=S3Path(dst_url)._profile_name)
+    if checksums is None:
+        checksums = WRITER_CHECKSUMS
+    if checksums:
+        # file is read only once, digests are calculated while uploading
+        with (
+            src_path.open("rb") as fsrc,
+            S3BufferedWriter(
+                dst_bucket,
+                dst_key,
+                s3_client=client,
+                profile_name=S3Path(dst_url)._profile_name,
+                atomic=True,
+                checksums=checksums,
+            ) as fdst,
+        ):
+            copyfileobj(fsrc, fdst, callback=callback, length=WRITER_BLOCK_SIZE)
+        return
+
     upload_file = patch_method(
         client.upload_file, max_retries=max_retries, should_retry=s3_should_retry
     )
@@ -1563,8 +1844,14 @@ def s3_load_content(
     if not key or key.endswith("/"):
         raise S3IsADirectoryError("Is a directory: %r" % s3_url)
 
-    start, stop = get_content_offset(start, stop, s3_url.getsize(follow_symlinks=False))
-    if start == 0 and stop == 0:
+    if start is None or stop is None or start < 0 or stop < 0:
+        start, stop = get_content_offset(
+            start, stop, s3_url.getsize(follow_symlinks=False)
+        )
+    elif stop < start:
+        raise ValueError("read length must be positive")
+    if start == stop:
+        # explicit range needs no HEAD request, and empty range needs no GET
         return b""
     range_str = "bytes=%d-%d" % (start, stop - 1)
 
@@ -2251,14 +2538,23 @@ class S3Path(URIPath):
         return create_generator()
 
     def scan_stat(
-        self, missing_ok: bool = True, followlinks: bool = False
+        self,
+        missing_ok: bool = True,
+        followlinks: bool = False,
+        *,
+        max_workers: Optional[int] = None,
     ) -> Iterator[FileEntry]:
         """
         Iteratively traverse only files in given directory, in alphabetical order.
         Every iteration on generator yields a tuple of path string and file stat
 
+        If followlinks is True, symlinks are resolved concurrently, and only empty
+        objects are checked if `MEGFILE_S3_SYMLINK_EMPTY_ONLY` is set.
+
         :param missing_ok: If False and there's no file in the directory,
             raise FileNotFoundError
+        :param max_workers: Max thread number of resolving symlinks, `None` by
+            default, will use global thread pool with 8 threads.
         :raises: UnsupportedError
         :returns: A file path generator
         """
@@ -2285,27 +2581,22 @@ class S3Path(URIPath):
                     return True
                 return False
 
-            with raise_s3_error(self.path_with_protocol, suppress_error_callback):
+            def list_entries() -> Iterator[FileEntry]:
                 for resp in _s3_list_objects(client, bucket, prefix):
                     for content in resp.get("Contents", []):
                         if content["Key"].endswith("/"):
                             continue
                         path = _s3_path_join(f"{protocol}://", bucket, content["Key"])
-
-                        if followlinks:
-                            try:
-                                origin_path = self.from_path(path).readlink()
-                                yield FileEntry(
-                                    origin_path.name,
-                                    origin_path.path_with_protocol,
-                                    origin_path.lstat(),
-                                )
-                                continue
-                            except S3NotALinkError:
-                                pass
-
                         yield FileEntry(S3Path(path).name, path, _make_stat(content))
 
+            with raise_s3_error(self.path_with_protocol, suppress_error_callback):
+                if followlinks:
+                    yield from _s3_follow_links(
+                        self, list_entries(), max_workers=max_workers
+                    )
+                else:
+                    yield from list_entries()
+
         return _create_missing_ok_generator(
             create_generator(),
             missing_ok=missing_ok,
@@ -2549,7 +2840,8 @@ class S3Path(URIPath):
         """
         Get md5 meta info in files that uploaded/copied via megfile
 
-        If meta info is lost or non-existent, return None
+        md5 calculated while writing (see `MEGFILE_WRITER_CHECKSUMS`) is returned
+        if exists, else s3 etag is returned
 
         :param recalculate: calculate md5 in real-time or return s3 etag
         :param followlinks: If is True, calculate md5 for real file
@@ -2564,15 +2856,12 @@ class S3Path(URIPath):
         if followlinks and stat.is_symlink():
             return self.readlink().md5(recalculate=recalculate, followlinks=followlinks)
         elif stat.is_dir():
-            hash_md5 = hashlib.md5()  # nosec
-            for file_name in self.listdir():
-                chunk = (
-                    self.joinpath(file_name)
-                    .md5(recalculate=recalculate, followlinks=followlinks)
-                    .encode()
-                )
-                hash_md5.update(chunk)
-            return hash_md5.hexdigest()
+            # members are told by listing, only files are requested in md5()
+            return calculate_dir_md5(
+                self,
+                recalculate=recalculate,
+                followlinks=followlinks,
+            )
         if recalculate:
             path_instance = self
             if followlinks:
@@ -2582,6 +2871,9 @@ class S3Path(URIPath):
                     pass
             with path_instance.open("rb") as f:
                 return calculate_md5(f)
+        metadata = stat.extra.get("Metadata") or {}
+        if metadata.get(content_md5_header):
+            return metadata[content_md5_header]
         return stat.extra.get("ETag", "")[1:-1]
 
     def copy(
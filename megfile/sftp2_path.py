@@ -1,5 +1,4 @@
 import getpass
-import hashlib
 import io
 import os
 import shlex
@@ -22,6 +21,7 @@ from megfile.interfaces import ContextIterator, FileEntry, PathLike, StatResult
 from megfile.lib.compare import is_same_file
 from megfile.lib.compat import fspath
 from megfile.lib.glob import FSFunc, iglob
+from megfile.lib.hashing import calculate_dir_md5
 from megfile.pathlike import URIPath
 from megfile.smart_path import SmartPath
 from megfile.utils import calculate_md5, copyfileobj, thread_local
@@ -839,15 +839,12 @@ class Sftp2Path(URIPath):
     def md5(self, recalculate: bool = False, followlinks: bool = False):
         """Calculate the md5 value of the file"""
         if self.is_dir():
-            hash_md5 = hashlib.md5()
-            for file_name in self.listdir():
-                chunk = (
-                    self.joinpath(file_name)
-                    .md5(recalculate=recalculate, followlinks=followlinks)
-                    .encode()
-                )
-                hash_md5.update(chunk)
-            return hash_md5.hexdigest()
+            return calculate_dir_md5(
+                self,
+                is_dir=lambda path: path.is_dir(),
+                recalculate=recalculate,
+                followlinks=followlinks,
+            )
         with self.open("rb") as src:
             md5 = calculate_md5(src)
         return md5
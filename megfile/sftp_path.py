@@ -21,6 +21,8 @@ from megfile.interfaces import ContextIterator, FileEntry, PathLike, StatResult
 from megfile.lib.compare import is_same_file
 from megfile.lib.compat import fspath
 from megfile.lib.glob import FSFunc, iglob
+from megfile.lib.hashing import calculate_dir_md5
+from megfile.lib.metrics import get_body_size, instrument_request
 from megfile.pathlike import URIPath
 from megfile.smart_path import SmartPath
 from megfile.utils import calculate_md5, copyfileobj, thread_local
@@ -141,11 +143,25 @@ def _patch_sftp_client_request(
         )
         client.sock = new_sftp_client.sock
 
-    client._request = patch_method(  # pyre-ignore[16]
-        client._request,  # pytype: disable=attribute-error
-        max_retries=MAX_RETRIES,
-        should_retry=sftp_should_retry,
-        retry_callback=retry_callback,
+    def describe_request(t, *args):
+        operation = paramiko.sftp.CMD_NAMES.get(t, str(t))
+        return operation, hostname, sum(get_body_size(arg) for arg in args)
+
+    def describe_response(result):
+        _, msg = result
+        return len(msg.asbytes()), None
+
+    client._request = instrument_request(  # pyre-ignore[16]
+        patch_method(
+            client._request,  # pytype: disable=attribute-error
+            max_retries=MAX_RETRIES,
+            should_retry=sftp_should_retry,
+            retry_callback=retry_callback,
+            endpoint="sftp://%s:%s" % (hostname, port or 22),
+        ),
+        "sftp",
+        describe_request,
+        describe_response,
     )
     return client
 
@@ -1177,15 +1193,12 @@ class SftpPath(URIPath):
         returns: md5 of file
         """
         if self.is_dir():
-            hash_md5 = hashlib.md5()  # nosec
-            for file_name in self.listdir():
-                chunk = (
-                    self.joinpath(file_name)
-                    .md5(recalculate=recalculate, followlinks=followlinks)
-                    .encode()
-                )
-                hash_md5.update(chunk)
-            return hash_md5.hexdigest()
+            return calculate_dir_md5(
+                self,
+                is_dir=lambda path: path.is_dir(),
+                recalculate=recalculate,
+                followlinks=followlinks,
+            )
         with self.open("rb") as src:
             md5 = calculate_md5(src)
         return md5
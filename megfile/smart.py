@@ -1,25 +1,38 @@
 import os
-from collections import defaultdict
+from collections import defaultdict, deque
+from concurrent.futures import ThreadPoolExecutor
 from functools import partial
 from typing import (
     IO,
     Any,
     BinaryIO,
     Callable,
+    Dict,
     Iterable,
     Iterator,
     List,
     Optional,
     Tuple,
+    Union,
 )
 
 from tqdm import tqdm
 
+from megfile.config import (
+    GLOBAL_MAX_WORKERS,
+    READER_BLOCK_SIZE,
+    READER_MAX_BUFFER_SIZE,
+    SMART_CACHE_DIR,
+    SMART_CACHE_MAX_SIZE,
+    SMART_CACHE_SHARED,
+)
 from megfile.errors import S3UnknownError
 from megfile.fs_path import (
+    fs_concat,
     fs_copy,
     is_fs,
 )
+from megfile.http_path import http_download
 from megfile.interfaces import (
     Access,
     ContextIterator,
@@ -33,6 +46,8 @@ from megfile.lib.combine_reader import CombineReader
 from megfile.lib.compare import get_sync_type, is_same_file
 from megfile.lib.compat import fspath
 from megfile.lib.glob import globlize, ungloblize
+from megfile.lib.hashing import HashingWriter
+from megfile.lib.shared_cache import SharedCache, get_cache_key
 from megfile.s3_path import (
     is_s3,
     s3_concat,
@@ -44,7 +59,7 @@ from megfile.s3_path import (
 )
 from megfile.sftp_path import sftp_concat, sftp_copy, sftp_download, sftp_upload
 from megfile.smart_path import SmartPath, get_traditional_path
-from megfile.utils import combine, copyfileobj, generate_cache_path
+from megfile.utils import combine, copyfileobj, generate_cache_path, process_local
 
 __all__ = [
     "smart_access",
@@ -267,6 +282,8 @@ _copy_funcs = {
     "s3": {"s3": s3_copy, "file": s3_download},
     "file": {"s3": s3_upload, "file": fs_copy, "sftp": sftp_upload},
     "sftp": {"file": sftp_download, "sftp": sftp_copy},
+    "http": {"file": http_download},
+    "https": {"file": http_download},
 }
 
 
@@ -303,19 +320,29 @@ def _default_copy_func(
     callback: Optional[Callable[[int], None]] = None,
     followlinks: bool = False,
     overwrite: bool = True,
-) -> None:
+    checksums: Optional[Iterable[str]] = None,
+) -> Optional[Dict[str, str]]:
     if not overwrite and smart_exists(dst_path):
-        return
+        return None
 
     with smart_open(src_path, "rb", followlinks=followlinks) as fsrc:
-        with smart_open(dst_path, "wb") as fdst:
+        if checksums and is_s3(dst_path):
+            # s3 writer calculates digests and saves them as metadata
+            fdst = smart_open(dst_path, "wb", checksums=checksums)
+        elif checksums:
+            fdst = HashingWriter(smart_open(dst_path, "wb"), checksums)
+        else:
+            fdst = smart_open(dst_path, "wb")
+        with fdst:
             copyfileobj(fsrc, fdst, callback)
     try:
         src_stat = smart_stat(src_path)
-        dst_path = SmartPath(dst_path)
-        dst_path.utime(src_stat.st_atime, src_stat.st_mtime)
+        SmartPath(dst_path).utime(src_stat.st_atime, src_stat.st_mtime)
     except (NotImplementedError, TypeError):
         pass
+    if checksums:
+        return getattr(fdst, "raw", fdst).digests
+    return None
 
 
 def _get_copy_func(src_protocol, dst_protocol):
@@ -344,7 +371,9 @@ def smart_copy(
     callback: Optional[Callable[[int], None]] = None,
     followlinks: bool = False,
     overwrite: bool = True,
-) -> None:
+    *,
+    checksums: Optional[Iterable[str]] = None,
+) -> Optional[Dict[str, str]]:
     """
     Copy file from source path to destination path
 
@@ -374,10 +403,24 @@ def smart_copy(
         data size (in bytes) of copy since the last call
     :param followlinks: False if regard symlink as file, else True
     :param overwrite: whether or not overwrite file when exists, default is True
+    :param checksums: Digests calculated while copying, e.g. ("md5", "sha256").
+        Content is copied through this process instead of server-side copy, and
+        digests are saved as metadata if the destination is s3
+    :returns: Digests keyed by algorithm if checksums is given, else None
     """
     # this function contains plenty of manual polymorphism
     if is_s3(dst_path) and not followlinks and smart_islink(src_path):
-        return
+        return None
+
+    if checksums:
+        return _default_copy_func(
+            src_path,
+            dst_path,
+            callback=callback,
+            followlinks=followlinks,
+            overwrite=overwrite,
+            checksums=checksums,
+        )
 
     src_protocol = SmartPath._extract_protocol(src_path)
     dst_protocol = SmartPath._extract_protocol(dst_path)
@@ -687,7 +730,7 @@ def smart_makedirs(path: PathLike, exist_ok: bool = False) -> None:
 
 
 def smart_open(
-    path: PathLike,
+    path: Union[PathLike, FileEntry],
     mode: str = "r",
     encoding: Optional[str] = None,
     errors: Optional[str] = None,
@@ -715,7 +758,8 @@ def smart_open(
         >>> img = cv2.imdecode(np.frombuffer(raw, np.uint8),
         ...                    cv2.IMREAD_ANYDEPTH | cv2.IMREAD_COLOR)
 
-    :param path: Given path
+    :param path: Given path, or FileEntry of listing results like `smart_scandir`,
+        whose stat is passed as `stat` option
     :param mode: Mode to open file, supports r'[rwa][tb]?\+?'
     :param encoding: encoding is the name of the encoding used to decode or encode
         the file. This should only be used in text mode.
@@ -736,10 +780,17 @@ def smart_open(
         thread. Only be used in s3, http, hdfs.
     :param buffered: If you are operating pickle file without .pkl or .pickle extension,
         please set this to True to avoid the performance issue.
+    :param access: How the file will be read, one of "sequential", "random",
+        "whole" and "once", which chooses the reader. Only be used in s3.
+    :param stat: Stat of the file if known, which saves requests getting the size
+        and chooses the reader by size. Only be used in s3.
 
     :returns: File-Like object
     :raises: FileNotFoundError, IsADirectoryError, ValueError
     """
+    if isinstance(path, FileEntry):
+        options.setdefault("stat", path.stat)
+        path = path.path
     options = {
         "s3_open_func": s3_open_func,
         "encoding": encoding,
@@ -945,16 +996,40 @@ def smart_load_from(path: PathLike) -> BinaryIO:
 
 
 def smart_combine_open(
-    path_glob: str, mode: str = "rb", open_func=smart_open
+    path_glob: str,
+    mode: str = "rb",
+    open_func=smart_open,
+    *,
+    block_forward: int = 2,
+    max_workers: Optional[int] = None,
 ) -> CombineReader:
     """Open a unified reader that supports multi file reading.
 
+    In binary mode, files are opened lazily with sizes listed by glob, and the next
+    `block_forward` files are opened in background while reading the current one.
+
     :param path_glob: A path may contain shell wildcard characters
     :param mode: Mode to open file, supports 'rb'
+    :param block_forward: How many files opened in advance, only for binary mode
+    :param max_workers: Max thread number to open files, `None` by default,
+        will use global thread pool with 8 threads.
     :returns: A ```CombineReader```
     """
-    file_objects = list(open_func(path, mode) for path in sorted(smart_glob(path_glob)))
-    return combine(file_objects, path_glob)
+    if "b" not in mode:
+        file_objects = list(
+            open_func(path, mode) for path in sorted(smart_glob(path_glob))
+        )
+        return combine(file_objects, path_glob)
+
+    entries = sorted(smart_glob_stat(path_glob), key=lambda entry: entry.path)
+    return combine(
+        [partial(open_func, entry.path, mode) for entry in entries],
+        path_glob,
+        sizes=[entry.stat.size for entry in entries],
+        mode=mode,
+        block_forward=block_forward,
+        max_workers=max_workers,
+    )
 
 
 def smart_abspath(path: PathLike):
@@ -1061,7 +1136,13 @@ class SmartCacher(FileCacher):
 
     cache_path = None
 
-    def __init__(self, path: str, cache_path: Optional[str] = None, mode: str = "r"):
+    def __init__(
+        self,
+        path: str,
+        cache_path: Optional[str] = None,
+        mode: str = "r",
+        shared: Optional[bool] = None,
+    ):
         """
         :param path: Path to cache
         :type path: str
@@ -1069,19 +1150,41 @@ class SmartCacher(FileCacher):
         :type cache_path: Optional[str], optional
         :param mode: Mode to open cache file, defaults to "r"
         :type mode: str, optional
+        :param shared: Whether to use the cache shared by processes in
+            ``MEGFILE_SMART_CACHE_DIR`` in read mode, which is kept after closed and
+            reused until path changes, defaults to ``MEGFILE_SMART_CACHE_SHARED``.
+            Ignored if cache_path is given.
+        :type shared: Optional[bool], optional
         :raises ValueError: If mode is not one of "r", "w", "a"
         """
         if mode not in ("r", "w", "a"):
             raise ValueError("unacceptable mode: %r" % mode)
+        if shared is None:
+            shared = SMART_CACHE_SHARED
+        self.name = path
+        self.mode = mode
+        self._shared_entry = None
+        if shared and mode == "r" and cache_path is None:
+            self._shared_entry = SharedCache(
+                SMART_CACHE_DIR, SMART_CACHE_MAX_SIZE
+            ).acquire(
+                get_cache_key(path, smart_stat(path)),
+                partial(smart_copy, path),
+                suffix=os.path.splitext(path)[1],
+            )
+            self.cache_path = self._shared_entry.path
+            return
         if cache_path is None:
             cache_path = generate_cache_path(path)
         if mode in ("r", "a"):
             smart_copy(path, cache_path)
-        self.name = path
-        self.mode = mode
         self.cache_path = cache_path
 
     def _close(self):
+        if getattr(self, "_shared_entry", None) is not None:
+            # cache file is kept for other users, and evicted when not in use
+            self._shared_entry.release()
+            return
         if getattr(self, "cache_path", None) is not None and os.path.exists(
             self.cache_path
         ):
@@ -1131,14 +1234,64 @@ def smart_getmd5(path: PathLike, recalculate: bool = False, followlinks: bool =
     return SmartPath(path).md5(recalculate=recalculate, followlinks=followlinks)
 
 
-_concat_funcs = {"s3": s3_concat, "sftp": sftp_concat}
+_concat_funcs = {"file": fs_concat, "s3": s3_concat, "sftp": sftp_concat}
 
 
-def _default_concat_func(src_paths: List[PathLike], dst_path: PathLike) -> None:
-    with smart_open(dst_path, "wb") as dst_fd:
-        for src_path in src_paths:
-            with smart_open(src_path, "rb") as src_fd:
-                copyfileobj(src_fd, dst_fd)
+def _load_head(src_path: PathLike, size: int) -> Tuple[bytes, bool]:
+    """Read the head of file, which is size bytes at most plus one byte to tell
+    whether there is more content
+
+    :returns: Content, and whether there is more content
+    """
+    with smart_open(src_path, "rb") as src_fd:
+        data = src_fd.read(size + 1)
+        return data, len(data) > size
+
+
+def _default_concat_func(
+    src_paths: List[PathLike],
+    dst_path: PathLike,
+    *,
+    block_forward: Optional[int] = None,
+    max_buffer_size: int = READER_MAX_BUFFER_SIZE,
+) -> None:
+    """Concatenate files by reading heads of the next block_forward files
+    concurrently while writing the current one
+
+    Content is written in order. Heads of files are loaded in memory, whose total
+    size is limited by max_buffer_size, and the rest of a large file is streamed
+    when it is being written.
+    """
+    if block_forward is None:
+        block_forward = GLOBAL_MAX_WORKERS
+    head_size = max(max_buffer_size // (block_forward + 1), 1)
+    executor = process_local(
+        "smart_concat.executor", ThreadPoolExecutor, max_workers=GLOBAL_MAX_WORKERS
+    )
+    src_paths_iter = iter(src_paths)
+    futures = deque()
+
+    def submit_next():
+        src_path = next(src_paths_iter, None)
+        if src_path is not None:
+            futures.append((src_path, executor.submit(_load_head, src_path, head_size)))
+
+    try:
+        for _ in range(block_forward + 1):
+            submit_next()
+        with smart_open(dst_path, "wb") as dst_fd:
+            while futures:
+                src_path, future = futures.popleft()
+                data, has_more = future.result()
+                submit_next()
+                dst_fd.write(data)
+                if has_more:
+                    with smart_open(src_path, "rb") as src_fd:
+                        src_fd.seek(len(data))
+                        copyfileobj(src_fd, dst_fd, length=READER_BLOCK_SIZE)
+    finally:
+        for _, future in futures:
+            future.cancel()
 
 
 def smart_concat(src_paths: List[PathLike], dst_path: PathLike) -> None:
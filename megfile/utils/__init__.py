@@ -1,4 +1,3 @@
-import hashlib
 import inspect
 import math
 import os
@@ -180,10 +179,10 @@ thread_local = ThreadLocal()
 process_local = ProcessLocal()
 
 
-def combine(file_objects, name):
+def combine(file_objects, name, **kwargs):
     from megfile.lib.combine_reader import CombineReader
 
-    return CombineReader(file_objects, name)
+    return CombineReader(file_objects, name, **kwargs)
 
 
 def get_binary_mode(mode: str) -> str:
@@ -271,10 +270,11 @@ def _get_class(cls_or_obj) -> type:
 
 
 def calculate_md5(file_object) -> str:
-    hash_md5 = hashlib.md5()  # nosec
-    for chunk in iter(lambda: file_object.read(DEFAULT_HASH_BUFFER_SIZE), b""):
-        hash_md5.update(chunk)
-    return hash_md5.hexdigest()
+    from megfile.lib.hashing import calculate_hashes
+
+    return calculate_hashes(
+        file_object, ("md5",), buffer_size=DEFAULT_HASH_BUFFER_SIZE
+    )["md5"]
 
 
 class classproperty(property):
@@ -1,19 +1,31 @@
-import hashlib
 import io
 import os
 import re
 import shlex
 import subprocess
 import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
 from functools import cached_property
 from logging import getLogger as get_logger
-from typing import IO, BinaryIO, Callable, Iterable, Iterator, List, Optional, Tuple
+from typing import (
+    IO,
+    BinaryIO,
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Tuple,
+)
 from urllib.parse import quote, unquote, urlsplit, urlunsplit
 
 import dateutil.parser
+from lxml import etree
 from webdav3.client import Client as WebdavClient
 from webdav3.client import WebDavXmlUtils
 from webdav3.exceptions import (
+    MethodNotSupported,
     RemoteResourceNotFound,
     ResponseErrorCode,
     WebDavException,
@@ -21,9 +33,13 @@ from webdav3.exceptions import (
 from webdav3.urn import Urn
 
 from megfile.config import (
+    GLOBAL_MAX_WORKERS,
+    IO_PROFILE,
     READER_BLOCK_SIZE,
     READER_MAX_BUFFER_SIZE,
     WEBDAV_MAX_RETRY_TIMES,
+    WRITER_BLOCK_SIZE,
+    WRITER_MAX_BUFFER_SIZE,
 )
 from megfile.errors import (
     SameFileError,
@@ -46,8 +62,18 @@ from megfile.lib.glob import (
     should_recursive_glob,
     split_magic,
 )
+from megfile.lib.hashing import calculate_dir_md5
+from megfile.lib.metrics import (
+    count_session_connections,
+    get_body_size,
+    instrument_request,
+)
+from megfile.lib.webdav_buffered_writer import WebdavBufferedWriter
 from megfile.lib.webdav_memory_handler import WebdavMemoryHandler, _webdav_stat
-from megfile.lib.webdav_prefetch_reader import WebdavPrefetchReader
+from megfile.lib.webdav_prefetch_reader import (
+    WebdavPrefetchReader,
+    _webdav_fetch_first_block,
+)
 from megfile.pathlike import URIPath
 from megfile.smart_path import SmartPath
 from megfile.utils import (
@@ -71,6 +97,10 @@ WEBDAV_TOKEN = "WEBDAV_TOKEN"
 WEBDAV_TOKEN_COMMAND = "WEBDAV_TOKEN_COMMAND"
 WEBDAV_TIMEOUT = "WEBDAV_TIMEOUT"
 
+# Status codes returned by servers which refuse a "Depth: infinity" PROPFIND,
+# e.g. 403 with a <DAV:propfind-finite-depth/> precondition (RFC 4918 9.1)
+WEBDAV_DEPTH_INFINITY_REJECTED_CODES = (400, 403, 501)
+
 
 def _make_stat(info: dict) -> StatResult:
     """Convert WebDAV info dict to StatResult"""
@@ -93,6 +123,19 @@ def _make_stat(info: dict) -> StatResult:
     )
 
 
+def _make_stat_from_headers(headers, size: int) -> StatResult:
+    """Convert headers of a GET response to StatResult"""
+    return _make_stat(
+        {
+            "size": size,
+            "modified": headers.get("Last-Modified", ""),
+            "etag": headers.get("ETag"),
+            "content_type": headers.get("Content-Type"),
+            "isdir": False,
+        }
+    )
+
+
 def _make_entry(info: dict, root_relative: str, root_absolute: str) -> FileEntry:
     path = info.get("path", "").rstrip("/")
     name = os.path.basename(path)
@@ -195,14 +238,24 @@ def _patch_execute_request(
             _logger.warning("Can not retry http request with iterator data")
             raise
 
-    client.execute_request = patch_method(
-        client.execute_request,
-        max_retries=max_retries,
-        should_retry=webdav_should_retry,
-        before_callback=before_callback,
-        after_callback=after_callback,
-        retry_callback=retry_callback,
+    def describe_request(action, path, data=None, headers_ext=None):
+        hostname = urlsplit(getattr(client.webdav, "hostname", "")).hostname or ""
+        return action, hostname, get_body_size(data)
+
+    client.execute_request = instrument_request(
+        patch_method(
+            client.execute_request,
+            max_retries=max_retries,
+            should_retry=webdav_should_retry,
+            before_callback=before_callback,
+            after_callback=after_callback,
+            retry_callback=retry_callback,
+            endpoint=getattr(client.webdav, "hostname", None),
+        ),
+        "webdav",
+        describe_request,
     )
+    count_session_connections(getattr(client, "session", None))
 
     return client
 
@@ -268,30 +321,104 @@ def _webdav_scan_pairs(
         yield src_file_path, dst_file_path
 
 
-def _webdav_scan(client: WebdavClient, remote_path: str) -> List[dict]:
+def _webdav_iterparse_list_info(response) -> Iterator[dict]:
+    """Parse a PROPFIND multistatus response incrementally,
+    yield the info of each resource as soon as its element is received.
+
+    Parsed elements are dropped immediately, so memory usage does not grow
+    with the size of the listing.
+    """
+    response.raw.decode_content = True
+    try:
+        for _, element in etree.iterparse(
+            response.raw, events=("end",), tag="{DAV:}response"
+        ):
+            href = element.findtext(".//{DAV:}href")
+            if href is not None:
+                info = WebDavXmlUtils.get_info_from_response(element)
+                info["isdir"] = element.find(".//{DAV:}collection") is not None
+                info["path"] = unquote(urlsplit(href).path)
+                yield info
+            element.clear()
+            while element.getprevious() is not None:
+                del element.getparent()[0]
+    except etree.XMLSyntaxError as error:
+        # Same as WebDavXmlUtils.parse_get_list_info_response
+        _logger.debug("invalid PROPFIND response: %s", error)
+    finally:
+        response.close()
+
+
+def _webdav_propfind(client: WebdavClient, remote_path: str, depth: str):
     directory_urn = Urn(remote_path, directory=True)
     path = Urn.normalize_path(client.get_full_path(directory_urn))
     response = client.execute_request(
-        action="list", path=directory_urn.quote(), headers_ext=["Depth: infinity"]
+        action="list", path=directory_urn.quote(), headers_ext=[f"Depth: {depth}"]
+    )
+    for info in _webdav_iterparse_list_info(response):
+        if Urn.compare_path(path, info.get("path")) is False:
+            yield info
+
+
+def _is_depth_infinity_rejected(error: Exception) -> bool:
+    if isinstance(error, MethodNotSupported):
+        return True
+    return (
+        isinstance(error, ResponseErrorCode)
+        and error.code  # pytype: disable=attribute-error
+        in WEBDAV_DEPTH_INFINITY_REJECTED_CODES
     )
-    subfiles = WebDavXmlUtils.parse_get_list_info_response(response.content)
-    return [
-        subfile
-        for subfile in subfiles
-        if Urn.compare_path(path, subfile.get("path")) is False
-    ]
 
 
-def _webdav_scandir(client: WebdavClient, remote_path: str) -> List[dict]:
-    return client.list(remote_path, get_info=True)
+def _webdav_parallel_scan(
+    client: WebdavClient, remote_path: str, max_workers: int = GLOBAL_MAX_WORKERS
+) -> Iterator[dict]:
+    """Breadth-first walk with "Depth: 1" PROPFIND, list directories concurrently
+
+    Infos are yielded in the order directories are listed, not sorted.
+    """
 
+    def list_directory(directory: str) -> List[dict]:
+        return list(_webdav_propfind(client, directory, "1"))
 
-def _webdav_check_accept_ranges(client: WebdavClient, remote_path: str):
-    urn = Urn(remote_path)
-    response = client.execute_request(action="download", path=urn.quote())
-    response.close()
-    headers = response.headers
-    return headers.get("Accept-Ranges") == "bytes"
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {executor.submit(list_directory, remote_path)}
+        while futures:
+            done, futures = wait(futures, return_when=FIRST_COMPLETED)
+            for future in done:
+                for info in future.result():
+                    if info["isdir"]:
+                        futures.add(executor.submit(list_directory, info["path"]))
+                    yield info
+
+
+def _webdav_scan(client: WebdavClient, remote_path: str) -> Iterator[dict]:
+    """Recursively list all resources under remote_path
+
+    Send one "Depth: infinity" PROPFIND and parse the response as a stream.
+    If the server rejects infinite depth, fall back to a parallel breadth-first
+    walk with "Depth: 1" requests.
+    """
+    try:
+        infos = _webdav_propfind(client, remote_path, "infinity")
+        first_info = next(infos, None)
+    except (MethodNotSupported, ResponseErrorCode) as error:
+        if not _is_depth_infinity_rejected(error):
+            raise
+        _logger.debug(
+            "PROPFIND with infinite depth rejected, fallback to parallel scan: %s",
+            error,
+        )
+        yield from _webdav_parallel_scan(client, remote_path)
+        return
+    if first_info is None:
+        return
+    yield first_info
+    yield from infos
+
+
+def _webdav_scandir(client: WebdavClient, remote_path: str) -> List[dict]:
+    return client.list(remote_path, get_info=True)
 
 
 @SmartPath.register
@@ -439,16 +566,19 @@ class WebdavPath(URIPath):
 
             scan_func = _webdav_scan if recursive_scan else _webdav_scandir
             try:
-                infos = scan_func(root._client, root._remote_path)
+                for info in scan_func(root._client, root._remote_path):
+                    entry = _make_entry(
+                        info, root._remote_path, root.path_with_protocol
+                    )
+                    match_path = (
+                        entry.path + "/"
+                        if search_dir and entry.is_dir()
+                        else entry.path
+                    )
+                    if compiled_pattern.match(match_path):
+                        yield entry
             except RemoteResourceNotFound:
                 return
-            for info in infos:
-                entry = _make_entry(info, root._remote_path, root.path_with_protocol)
-                match_path = (
-                    entry.path + "/" if search_dir and entry.is_dir() else entry.path
-                )
-                if compiled_pattern.match(match_path):
-                    yield entry
 
         return _create_missing_ok_generator(
             create_generator(),
@@ -758,26 +888,46 @@ class WebdavPath(URIPath):
         if stat is None or stat.is_file():
             return
 
-        stack = [self]
-        while stack:
-            root_path = stack.pop()
-            dirs, files = [], []
+        client = self._client
+        max_prefetch = GLOBAL_MAX_WORKERS * 2
+        with ThreadPoolExecutor(max_workers=GLOBAL_MAX_WORKERS) as executor:
+            # Directories at the top of the stack are listed ahead of time
+            listings: Dict[str, Future] = {}
 
-            for info in _webdav_scandir(root_path._client, root_path._remote_path):
-                entry = _make_entry(
-                    info, root_path._remote_path, root_path.path_with_protocol
-                )
-                if entry.is_dir():
-                    dirs.append(entry.name)
-                else:
-                    files.append(entry.name)
+            def prefetch(path_obj: "WebdavPath"):
+                if path_obj._remote_path not in listings:
+                    listings[path_obj._remote_path] = executor.submit(
+                        _webdav_scandir, client, path_obj._remote_path
+                    )
+
+            stack = [self]
+            while stack:
+                root_path = stack.pop()
+                prefetch(root_path)
+                dirs, files = [], []
 
-            dirs = sorted(dirs)
-            files = sorted(files)
+                for info in listings.pop(root_path._remote_path).result():
+                    entry = _make_entry(
+                        info, root_path._remote_path, root_path.path_with_protocol
+                    )
+                    if entry.is_dir():
+                        dirs.append(entry.name)
+                    else:
+                        files.append(entry.name)
+
+                dirs = sorted(dirs)
+                files = sorted(files)
 
-            yield root_path.path_with_protocol, dirs, files
+                yield root_path.path_with_protocol, dirs, files
 
-            stack.extend(root_path.joinpath(directory) for directory in reversed(dirs))
+                # dirs may be pruned in place by caller
+                stack.extend(
+                    root_path.joinpath(directory) for directory in reversed(dirs)
+                )
+                for path_obj in reversed(stack[-max_prefetch:]):
+                    if len(listings) >= max_prefetch:
+                        break
+                    prefetch(path_obj)
 
     def resolve(self, strict=False) -> "WebdavPath":
         """Return the absolute path
@@ -796,15 +946,12 @@ class WebdavPath(URIPath):
         :returns: md5 of file
         """
         if self.is_dir():
-            hash_md5 = hashlib.md5()
-            for file_name in self.listdir():
-                chunk = (
-                    self.joinpath(file_name)
-                    .md5(recalculate=recalculate, followlinks=followlinks)
-                    .encode()
-                )
-                hash_md5.update(chunk)
-            return hash_md5.hexdigest()
+            return calculate_dir_md5(
+                self,
+                is_dir=lambda path: path.is_dir(),
+                recalculate=recalculate,
+                followlinks=followlinks,
+            )
 
         with self.open("rb") as src:
             md5 = calculate_md5(src)
@@ -838,10 +985,11 @@ class WebdavPath(URIPath):
         mode: str = "rb",
         *,
         max_workers: Optional[int] = None,
-        max_buffer_size: int = READER_MAX_BUFFER_SIZE,
+        max_buffer_size: Optional[int] = None,
         block_forward: Optional[int] = None,
-        block_size: int = READER_BLOCK_SIZE,
+        block_size: Optional[int] = None,
         atomic: bool = False,
+        io_profile: bool = IO_PROFILE,
         **kwargs,
     ) -> IO:
         """Open a file on the path.
@@ -850,8 +998,52 @@ class WebdavPath(URIPath):
         :param buffering: buffering policy
         :param encoding: encoding for text mode
         :param errors: error handling for text mode
+        :param max_workers: Max download / upload thread number, `None` by default,
+            will use global thread pool with 8 threads.
+        :param max_buffer_size: Max cached buffer size in memory, 128MB by default.
+        :param block_forward: How many blocks of data cached from offset position,
+            only for read mode.
+        :param block_size: Size of single block, 8MB by default.
+        :param io_profile: Collect statistics of the reader in read mode, which
+            are logged when closed, `MEGFILE_IO_PROFILE` by default.
         :returns: File-Like object
         """
+        if mode == "rb":
+            block_size = block_size or READER_BLOCK_SIZE
+            if max_buffer_size is None:
+                max_buffer_size = READER_MAX_BUFFER_SIZE
+            # One ranged GET tells the size and Range support, and its content
+            # is the first block, no need to stat before reading
+            first_index_response = None
+            if max_buffer_size > 0:
+                try:
+                    first_index_response = _webdav_fetch_first_block(
+                        self._client, self._remote_path, block_size
+                    )
+                except RemoteResourceNotFound:
+                    raise FileNotFoundError(
+                        "No such file: %r" % self.path_with_protocol
+                    )
+                except (MethodNotSupported, ResponseErrorCode) as error:
+                    # e.g. GET of a directory is rejected, check it by stat
+                    _logger.debug(
+                        "fetch first block failed: %r, error: %s"
+                        % (self.path_with_protocol, error)
+                    )
+            if first_index_response is not None:
+                return self._open_prefetch_reader(
+                    content_stat=_make_stat_from_headers(
+                        first_index_response["Headers"],
+                        first_index_response["ContentSize"],
+                    ),
+                    block_size=block_size,
+                    max_buffer_size=max_buffer_size,
+                    block_forward=block_forward,
+                    max_workers=max_workers,
+                    first_index_response=first_index_response,
+                    io_profile=io_profile,
+                )
+
         stat = self._stat_or_none()
 
         if "x" in mode and stat is not None:
@@ -863,21 +1055,29 @@ class WebdavPath(URIPath):
         elif stat is None:
             raise FileNotFoundError("No such file: %r" % self.path_with_protocol)
 
-        if mode == "rb":
-            if _webdav_check_accept_ranges(self._client, self._remote_path):
-                reader = WebdavPrefetchReader(
-                    self._remote_path,
-                    client=self._client,
-                    content_stat=stat,
-                    block_size=block_size,
-                    max_buffer_size=max_buffer_size,
-                    block_forward=block_forward,
-                    max_retries=WEBDAV_MAX_RETRY_TIMES,
-                    max_workers=max_workers,
-                )
-                if _is_pickle(reader):
-                    reader = io.BufferedReader(reader)  # type: ignore
-                return reader
+        if mode == "rb" and max_buffer_size == 0:
+            # blocks are fetched when read, nothing is buffered
+            return self._open_prefetch_reader(
+                content_stat=stat,
+                block_size=block_size,
+                max_buffer_size=max_buffer_size,
+                block_forward=block_forward,
+                max_workers=max_workers,
+                io_profile=io_profile,
+            )
+
+        if mode == "wb":
+            return WebdavBufferedWriter(
+                self._remote_path,
+                webdav_client=self._client,
+                name=self.path_with_protocol,
+                block_size=block_size or WRITER_BLOCK_SIZE,
+                max_buffer_size=max_buffer_size
+                if max_buffer_size is not None
+                else WRITER_MAX_BUFFER_SIZE,
+                max_workers=max_workers,
+                atomic=atomic,
+            )
 
         return WebdavMemoryHandler(
             self._remote_path,
@@ -888,6 +1088,17 @@ class WebdavPath(URIPath):
             content_stat=stat,
         )
 
+    def _open_prefetch_reader(self, **kwargs) -> IO:
+        reader = WebdavPrefetchReader(
+            self._remote_path,
+            client=self._client,
+            max_retries=WEBDAV_MAX_RETRY_TIMES,
+            **kwargs,
+        )
+        if _is_pickle(reader):
+            reader = io.BufferedReader(reader)  # type: ignore
+        return reader
+
     def chmod(self, mode: int, *, follow_symlinks: bool = True):
         """
         WebDAV doesn't support chmod
@@ -0,0 +1,41 @@
+import sys
+import time
+
+from megfile import smart_open
+
+s3_path = sys.argv[1] if len(sys.argv) > 1 else "s3://bucketA/large.jsonl"
+
+start = time.time()
+with smart_open(s3_path, "r") as f:
+    count = 0
+    for line in f:
+        count += 1
+print("for line in smart_open(path, 'r'):", count, time.time() - start)
+
+start = time.time()
+with smart_open(s3_path, "rb") as f:
+    count = 0
+    for line in f:
+        count += 1
+print("for line in smart_open(path, 'rb'):", count, time.time() - start)
+
+start = time.time()
+with smart_open(s3_path, "rb") as f:
+    count = 0
+    for line in f.iter_lines(encoding="utf-8"):
+        count += 1
+print("f.iter_lines(encoding='utf-8'):", count, time.time() - start)
+
+start = time.time()
+with smart_open(s3_path, "rb") as f:
+    count = 0
+    for line in f.iter_lines():
+        count += 1
+print("f.iter_lines():", count, time.time() - start)
+
+start = time.time()
+with smart_open(s3_path, "rb") as f:
+    count = 0
+    for lines in f.iter_lines_batched(65536):
+        count += len(lines)
+print("f.iter_lines_batched(65536):", count, time.time() - start)
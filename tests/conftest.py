@@ -0,0 +1,8 @@
+import pytest
+
+
+@pytest.fixture(autouse=True)
+def disable_zero_copy_in_fake_fs(request, monkeypatch):
+    # zero copy syscalls work on real file descriptors, not on fake ones of pyfakefs
+    if "fs" in request.fixturenames:
+        monkeypatch.setattr("megfile.fs_path._use_zero_copy", lambda: False)
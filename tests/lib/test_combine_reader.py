@@ -293,3 +293,74 @@ def test_combine_reader_tell_after_seek():
         assert reader.tell() == 13
         reader.seek(0, os.SEEK_END)
         assert reader.tell() == 35
+
+
+class FakeOpener:
+    def __init__(self, content):
+        self.content = content
+        self.file_objects = []
+
+    def __call__(self):
+        file_object = BytesIO(self.content)
+        self.file_objects.append(file_object)
+        return file_object
+
+
+def test_combine_reader_lazy():
+    contents = [b"block0 ", b"", b"block2 ", b"block3 ", b"block4 "]
+    openers = [FakeOpener(content) for content in contents]
+    reader = CombineReader(
+        openers,
+        "test_combine_reader_lazy",
+        sizes=[len(content) for content in contents],
+        mode="rb+",
+        block_forward=1,
+        max_workers=1,
+    )
+    assert reader.mode == "rb+"
+    assert all(not opener.file_objects for opener in openers)
+
+    assert reader.read(3) == b"blo"
+    assert len(openers[0].file_objects) == 1
+    assert reader.read(6) == b"ck0 bl"
+    assert openers[0].file_objects[0].closed
+    # empty file is skipped
+    assert not openers[1].file_objects
+
+    reader.seek(0)
+    assert reader.read() == b"".join(contents)
+    assert len(openers[0].file_objects) == 2
+    assert len(openers[4].file_objects) == 1
+
+    reader.seek(-3, os.SEEK_END)
+    assert reader.readline() == b"k4 "
+    reader.close()
+    assert all(
+        file_object.closed for opener in openers for file_object in opener.file_objects
+    )
+
+
+def test_combine_reader_lazy_readline():
+    contents = [b"line0\nli", b"ne1", b"\nline2"]
+    with CombineReader(
+        [FakeOpener(content) for content in contents],
+        "test_combine_reader_lazy_readline",
+        sizes=[len(content) for content in contents],
+        mode="rb+",
+        block_forward=2,
+    ) as reader:
+        assert list(reader) == [b"line0\n", b"line1\n", b"line2"]
+
+
+def test_combine_reader_lazy_error():
+    with pytest.raises(ValueError):
+        CombineReader([FakeOpener(b"block0")], "test", sizes=[6, 6])
+
+    reader = CombineReader([FakeOpener(b"block0")], "test", sizes=[10], mode="rb+")
+    assert reader.read(6) == b"block0"
+    with pytest.raises(IOError):
+        reader.read()
+
+    reader = CombineReader([lambda: StringIO("block0")], "test", sizes=[6], mode="rb+")
+    with pytest.raises(IOError):
+        reader.read()
@@ -0,0 +1,80 @@
+import os
+
+from megfile.lib.fs_walk import parallel_walk
+
+
+def make_tree(root):
+    for dirname in ["a/b/c", "a/d", "e"]:
+        os.makedirs(os.path.join(root, dirname))
+    for filename in ["1", "a/2", "a/b/3", "a/b/c/4", "a/d/5", "e/6"]:
+        with open(os.path.join(root, filename), "w") as f:
+            f.write(filename)
+    os.symlink(os.path.join(root, "a/d"), os.path.join(root, "link"))
+
+
+def to_names(results):
+    return [
+        (root, [e.name for e in dirs], [e.name for e in files])
+        for root, dirs, files in results
+    ]
+
+
+def test_parallel_walk_ordered(tmp_path):
+    root = str(tmp_path)
+    make_tree(root)
+    expected = [
+        (root, ["a", "e"], ["1", "link"]),
+        (os.path.join(root, "a"), ["b", "d"], ["2"]),
+        (os.path.join(root, "a", "b"), ["c"], ["3"]),
+        (os.path.join(root, "a", "b", "c"), [], ["4"]),
+        (os.path.join(root, "a", "d"), [], ["5"]),
+        (os.path.join(root, "e"), [], ["6"]),
+    ]
+    assert to_names(parallel_walk(root)) == expected
+    assert to_names(parallel_walk(root, max_workers=1)) == expected
+
+
+def test_parallel_walk_followlinks(tmp_path):
+    root = str(tmp_path)
+    make_tree(root)
+    results = to_names(parallel_walk(root, followlinks=True))
+    assert results[0] == (root, ["a", "e", "link"], ["1"])
+    assert (os.path.join(root, "link"), [], ["5"]) in results
+
+
+def test_parallel_walk_unordered(tmp_path):
+    root = str(tmp_path)
+    make_tree(root)
+    ordered = to_names(parallel_walk(root, max_workers=2))
+    unordered = to_names(parallel_walk(root, ordered=False, max_workers=2))
+    assert sorted(unordered) == sorted(ordered)
+
+
+def test_parallel_walk_stat(tmp_path):
+    root = str(tmp_path)
+    make_tree(root)
+    for _, _, files in parallel_walk(root, stat=True):
+        for entry in files:
+            assert (
+                entry.stat(follow_symlinks=False).st_size
+                == os.lstat(entry.path).st_size
+            )
+
+
+def test_parallel_walk_close_early(tmp_path):
+    root = str(tmp_path)
+    make_tree(root)
+    walker = parallel_walk(root, max_workers=1)
+    assert next(walker)[0] == root
+    walker.close()
+
+
+def test_parallel_walk_prune(tmp_path):
+    root = str(tmp_path)
+    make_tree(root)
+    for ordered in (True, False):
+        roots = []
+        for dirpath, dirs, _ in parallel_walk(root, ordered=ordered, max_workers=2):
+            roots.append(dirpath)
+            dirs[:] = [entry for entry in dirs if entry.name != "a"]
+        assert sorted(roots) == [root, os.path.join(root, "e")]
@@ -368,6 +368,47 @@ def test_glob(fs_setup):
     _glob_with_curly()
 
 
+def test_glob_recursive_prefetch(tmp_path):
+    for name in ("a/b/1.json", "a/b/c/2.json", "a/.d/3.json", "e/4.json", "5.json"):
+        path = tmp_path / name
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(name)
+    (tmp_path / "f").mkdir()
+    pathname = os.path.join(str(tmp_path), "**", "*.json")
+
+    scanned = []
+
+    def scandir(dirname):
+        scanned.append(dirname)
+        return glob._scandir(dirname)
+
+    sequential_fs = glob.FSFunc(glob._exists, glob._isdir, scandir)
+    expected = glob.glob(pathname, recursive=True, fs=sequential_fs)
+    assert glob.glob(pathname, recursive=True) == expected
+    assert [os.path.relpath(path, str(tmp_path)) for path in expected] == [
+        "5.json",
+        "a/b/1.json",
+        "a/b/c/2.json",
+        "e/4.json",
+    ]
+    # files and hidden directories are not listed
+    assert sorted({os.path.relpath(path, str(tmp_path)) for path in scanned}) == [
+        ".",
+        "a",
+        "a/b",
+        "a/b/c",
+        "e",
+        "f",
+    ]
+
+    scanned.clear()
+    pathname = os.path.join(str(tmp_path), "**")
+    expected = glob.glob(pathname, recursive=True, fs=sequential_fs)
+    assert glob.glob(pathname, recursive=True) == expected
+    assert len(expected) == 10
+    assert len(scanned) == 6
+
+
 def test_escape():
     assert glob.escape("*") == "[*]"
     assert glob.escape("**") == "[*][*]"
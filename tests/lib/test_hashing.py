@@ -0,0 +1,133 @@
+import hashlib
+import zlib
+from io import BytesIO
+
+import pytest
+
+from megfile.fs_path import FSPath
+from megfile.lib.hashing import (
+    Crc32cHash,
+    HashingWriter,
+    MultiHash,
+    MultipartEtagHash,
+    calculate_dir_md5,
+    calculate_hashes,
+    new_hash,
+)
+
+CONTENT = b"block0 block1 block2 block3 block4"
+
+
+class ReadOnlyFile:
+    def __init__(self, content):
+        self._buffer = BytesIO(content)
+
+    def read(self, size=-1):
+        return self._buffer.read(size)
+
+
+def test_calculate_hashes():
+    digests = calculate_hashes(
+        BytesIO(CONTENT),
+        ("md5", "sha256", "crc32", "crc32c", "etag"),
+        part_size=1024,
+        buffer_size=4,
+    )
+    assert digests == {
+        "md5": hashlib.md5(CONTENT).hexdigest(),
+        "sha256": hashlib.sha256(CONTENT).hexdigest(),
+        "crc32": "%08x" % zlib.crc32(CONTENT),
+        "crc32c": Crc32cHash(CONTENT).hexdigest(),
+        "etag": hashlib.md5(CONTENT).hexdigest(),
+    }
+    assert calculate_hashes(ReadOnlyFile(CONTENT), buffer_size=3) == {
+        "md5": hashlib.md5(CONTENT).hexdigest()
+    }
+    assert calculate_hashes(BytesIO(b""), ("md5",)) == {
+        "md5": hashlib.md5(b"").hexdigest()
+    }
+
+
+def test_crc32c():
+    assert Crc32cHash(b"123456789").hexdigest() == "e3069283"
+    crc = Crc32cHash()
+    crc.update(b"12345")
+    crc.update(memoryview(b"6789"))
+    assert crc.digest() == bytes.fromhex("e3069283")
+
+
+def test_crc32c_not_installed(mocker):
+    mocker.patch("megfile.lib.hashing._crc32c", None)
+    with pytest.raises(ImportError) as error:
+        new_hash("crc32c")
+    assert "megfile[crc32c]" in str(error.value)
+    with pytest.raises(ImportError):
+        MultiHash(("md5", "crc32c"))
+
+
+def test_multipart_etag():
+    etag = MultipartEtagHash(part_size=7)
+    etag.update(CONTENT[:10])
+    etag.update(CONTENT[10:])
+    parts = [CONTENT[i : i + 7] for i in range(0, len(CONTENT), 7)]
+    expected = hashlib.md5(b"".join(hashlib.md5(part).digest() for part in parts))
+    assert etag.hexdigest() == "%s-%d" % (expected.hexdigest(), len(parts))
+
+    assert MultipartEtagHash(CONTENT[:7], part_size=7).hexdigest() == (
+        hashlib.md5(CONTENT[:7]).hexdigest()
+    )
+
+
+def test_new_hash_unknown():
+    with pytest.raises(ValueError):
+        new_hash("unknown")
+
+
+def test_calculate_dir_md5(tmpdir):
+    root = tmpdir.mkdir("root")
+    root.join("b").write(b"b", mode="wb")
+    root.mkdir("a").join("c").write(b"c", mode="wb")
+    root.mkdir("d")
+
+    def md5(content: bytes) -> str:
+        return hashlib.md5(content).hexdigest()
+
+    expected = md5(
+        (md5(md5(b"c").encode()) + md5(b"b") + md5(b"")).encode()  # a, b, d
+    )
+    path = FSPath(str(root))
+    assert calculate_dir_md5(path, is_dir=lambda p: p.is_dir()) == expected
+    assert path.md5() == expected
+    assert (
+        calculate_dir_md5(path, is_dir=lambda p: p.is_dir(), max_workers=1) == expected
+    )
+    # members are told by entries of scandir
+    assert calculate_dir_md5(path) == expected
+
+
+def test_multi_hash():
+    hasher = MultiHash(("md5", "crc32"))
+    hasher.update(CONTENT[:10])
+    hasher.update(CONTENT[10:])
+    assert hasher.hexdigests() == {
+        "md5": hashlib.md5(CONTENT).hexdigest(),
+        "crc32": "%08x" % zlib.crc32(CONTENT),
+    }
+
+
+def test_hashing_writer(tmpdir):
+    path = str(tmpdir / "file")
+    with HashingWriter(open(path, "wb"), ("md5", "sha256")) as writer:
+        assert writer.name == path
+        assert writer.mode == "wb"
+        writer.write(CONTENT)
+        writer.flush()
+        assert writer.tell() == len(CONTENT)
+        assert writer.digests == {}
+
+    assert writer.digests == {
+        "md5": hashlib.md5(CONTENT).hexdigest(),
+        "sha256": hashlib.sha256(CONTENT).hexdigest(),
+    }
+    with open(path, "rb") as f:
+        assert f.read() == CONTENT
@@ -0,0 +1,51 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from megfile.lib.hedge_policy import HedgePolicy, first_successful
+
+
+def test_hedge_policy():
+    policy = HedgePolicy(percentile=0.9, max_ratio=0.1, window=10, min_samples=5)
+    for latency in range(4):
+        policy.record(latency)
+    assert policy.threshold() is None
+    for latency in range(4, 20):
+        policy.record(latency)
+    # only the last 10 latencies are used
+    assert policy.threshold() == 19
+
+    assert policy.try_hedge()
+    assert policy.try_hedge()
+    assert not policy.try_hedge()
+    policy.record(1)
+    assert not policy.try_hedge()
+    for _ in range(9):
+        policy.record(1)
+    assert policy.try_hedge()
+
+    with pytest.raises(ValueError):
+        HedgePolicy(percentile=1, max_ratio=0.1)
+
+
+def test_first_successful():
+    def sleep_and_return(seconds, result=None, error=None):
+        time.sleep(seconds)
+        if error is not None:
+            raise error
+        return result
+
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        slow = executor.submit(sleep_and_return, 0.5, "slow")
+        fast = executor.submit(sleep_and_return, 0, "fast")
+        assert first_successful(slow, fast).result() == "fast"
+
+        failed = executor.submit(sleep_and_return, 0, error=ValueError())
+        slow = executor.submit(sleep_and_return, 0.1, "slow")
+        assert first_successful(failed, slow).result() == "slow"
+
+        failed = executor.submit(sleep_and_return, 0, error=ValueError())
+        failed_later = executor.submit(sleep_and_return, 0.1, error=KeyError())
+        with pytest.raises(KeyError):
+            first_successful(failed, failed_later).result()
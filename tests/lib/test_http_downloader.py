@@ -0,0 +1,194 @@
+import json
+import os
+from threading import Lock
+
+import pytest
+import requests
+
+from megfile.errors import HttpFileChangedError
+from megfile.lib.http_downloader import (
+    PARTIAL_SUFFIX,
+    STATE_SUFFIX,
+    HttpDownloader,
+    _Segment,
+)
+
+URL = "http://test/file"
+CONTENT = bytes(range(256)) * 4
+ETAG = '"etag"'
+
+
+class FakeResponse:
+    def __init__(self, status_code, content=b"", headers=None):
+        self.status_code = status_code
+        self.content = content
+        self.headers = headers or {}
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            error = requests.exceptions.HTTPError()
+            error.response = self
+            raise error
+
+    def iter_content(self, chunk_size=1):
+        for i in range(0, len(self.content), 7):
+            yield self.content[i : i + 7]
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+
+class FakeSession:
+    def __init__(self, content=CONTENT, etag=ETAG, accept_ranges=True):
+        self.content = content
+        self.etag = etag
+        self.accept_ranges = accept_ranges
+        self.ranges = []
+        self.lock = Lock()
+
+    def get(self, url, headers=None, stream=False):
+        headers = headers or {}
+        response_headers = {"ETag": self.etag}
+        if (
+            "Range" not in headers
+            or not self.accept_ranges
+            or headers.get("If-Range", self.etag) != self.etag
+        ):
+            response_headers["Content-Length"] = str(len(self.content))
+            return FakeResponse(200, self.content, response_headers)
+        start, end = map(int, headers["Range"][6:].split("-"))
+        with self.lock:
+            self.ranges.append((start, end))
+        end = min(end, len(self.content) - 1)
+        response_headers["Content-Range"] = "bytes %d-%d/%d" % (
+            start,
+            end,
+            len(self.content),
+        )
+        return FakeResponse(206, self.content[start : end + 1], response_headers)
+
+
+def test_http_downloader(tmpdir):
+    path = str(tmpdir / "file")
+    session = FakeSession()
+    sizes = []
+    HttpDownloader(
+        URL,
+        path,
+        session=session,
+        block_size=64,
+        max_workers=4,
+        callback=sizes.append,
+    ).download()
+
+    with open(path, "rb") as f:
+        assert f.read() == CONTENT
+    assert sum(sizes) == len(CONTENT)
+    # probe, and one range for each connection at least
+    assert len(session.ranges) >= 5
+    assert not os.path.exists(path + PARTIAL_SUFFIX)
+    assert not os.path.exists(path + STATE_SUFFIX)
+
+
+def test_http_downloader_single_connection(tmpdir):
+    path = str(tmpdir / "file")
+    session = FakeSession(accept_ranges=False)
+    HttpDownloader(URL, path, session=session, block_size=64).download()
+
+    with open(path, "rb") as f:
+        assert f.read() == CONTENT
+    assert session.ranges == []
+
+    session = FakeSession(content=CONTENT[:100])
+    HttpDownloader(URL, path, session=session, block_size=64).download()
+    with open(path, "rb") as f:
+        assert f.read() == CONTENT[:100]
+    assert session.ranges == [(0, 0)]
+
+
+def test_http_downloader_resume(tmpdir):
+    path = str(tmpdir / "file")
+    with open(path + PARTIAL_SUFFIX, "wb") as f:
+        f.write(CONTENT[:512])
+        f.truncate(len(CONTENT))
+    with open(path + STATE_SUFFIX, "w") as f:
+        json.dump(
+            {
+                "url": URL,
+                "size": len(CONTENT),
+                "validator": {"ETag": ETAG, "Last-Modified": None},
+                "segments": [[512, len(CONTENT)]],
+            },
+            f,
+        )
+
+    session = FakeSession()
+    sizes = []
+    HttpDownloader(
+        URL, path, session=session, block_size=64, max_workers=2, callback=sizes.append
+    ).download()
+
+    with open(path, "rb") as f:
+        assert f.read() == CONTENT
+    assert sum(sizes) == len(CONTENT)
+    assert min(start for start, _ in session.ranges[1:]) == 512
+
+
+def test_http_downloader_resume_changed(tmpdir):
+    path = str(tmpdir / "file")
+    with open(path + PARTIAL_SUFFIX, "wb") as f:
+        f.write(b"\0" * len(CONTENT))
+    with open(path + STATE_SUFFIX, "w") as f:
+        json.dump(
+            {
+                "url": URL,
+                "size": len(CONTENT),
+                "validator": {"ETag": '"old"', "Last-Modified": None},
+                "segments": [[512, len(CONTENT)]],
+            },
+            f,
+        )
+
+    HttpDownloader(
+        URL, path, session=FakeSession(), block_size=64, max_workers=2
+    ).download()
+    with open(path, "rb") as f:
+        assert f.read() == CONTENT
+
+
+def test_http_downloader_file_changed(tmpdir):
+    path = str(tmpdir / "file")
+    session = FakeSession()
+    get = session.get
+
+    def fake_get(url, headers=None, stream=False):
+        response = get(url, headers=headers, stream=stream)
+        session.etag = '"changed"'
+        return response
+
+    session.get = fake_get
+    with pytest.raises(HttpFileChangedError):
+        HttpDownloader(
+            URL, path, session=session, block_size=64, max_workers=2
+        ).download()
+    assert not os.path.exists(path)
+    assert os.path.exists(path + STATE_SUFFIX)
+
+
+def test_http_downloader_steal_segment(tmpdir):
+    downloader = HttpDownloader(URL, str(tmpdir / "file"), block_size=64)
+    assert downloader._steal_segment() is None
+
+    downloader._segments = [_Segment(0, 100), _Segment(100, 227)]
+    assert downloader._steal_segment() is None
+
+    downloader._segments = [_Segment(0, 100), _Segment(100, 400)]
+    segment = downloader._steal_segment()
+    assert (segment.offset, segment.end) == (250, 400)
+    assert downloader._segments[1].end == 250
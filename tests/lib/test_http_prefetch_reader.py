@@ -8,7 +8,10 @@ import requests
 
 from megfile.config import READER_BLOCK_SIZE
 from megfile.errors import UnsupportedError
-from megfile.lib.http_prefetch_reader import HttpPrefetchReader
+from megfile.lib.http_prefetch_reader import (
+    HttpPrefetchReader,
+    get_content_size_from_content_range,
+)
 
 URL = "http://test"
 CONTENT = b"block0 block1 block2 block3 block4 "
@@ -629,3 +632,48 @@ def test_http_prefetch_reader_retry(mocker, caplog):
         ) as f:
             f.read()
         assert "The downloaded content is incomplete" in caplog.text
+
+
+class FakeResponse206(FakeResponse):
+    status_code = 206
+
+    def __init__(self, content=CONTENT, start=0) -> None:
+        super().__init__(content)
+        self._start = start
+
+    @property
+    def headers(self):
+        headers = super().headers
+        headers["Content-Range"] = "bytes %d-%d/%d" % (
+            self._start,
+            self._start + len(self._content) - 1,
+            CONTENT_SIZE,
+        )
+        return headers
+
+
+def test_get_content_size_from_content_range():
+    assert get_content_size_from_content_range({}) is None
+    assert get_content_size_from_content_range({"Content-Range": "bytes 0-1/*"}) is None
+    assert (
+        get_content_size_from_content_range({"Content-Range": "bytes 0-1/1234"}) == 1234
+    )
+    assert get_content_size_from_content_range({"Content-Range": "bytes */0"}) == 0
+
+
+def test_http_prefetch_reader_first_block(mocker):
+    def fake_get(*args, headers=None, **kwargs):
+        start, end = list(map(int, headers["Range"][6:].split("-")))
+        return FakeResponse206(CONTENT[start : end + 1], start)
+
+    requests_get_func = mocker.patch(
+        "megfile.lib.http_prefetch_reader.requests.Session.get",
+        side_effect=fake_get,
+    )
+
+    with HttpPrefetchReader(URL, max_workers=2, block_size=7, block_forward=0) as f:
+        assert f._content_size == CONTENT_SIZE
+        assert requests_get_func.call_count == 1
+        assert f.read(7) == CONTENT[:7]
+        assert requests_get_func.call_count == 1
+        assert f.read() == CONTENT[7:]
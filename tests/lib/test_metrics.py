@@ -0,0 +1,241 @@
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+from urllib3.connectionpool import HTTPConnectionPool
+
+import megfile
+from megfile.errors import patch_method
+from megfile.http_path import get_http_session
+from megfile.lib.metrics import (
+    OpenTelemetryHook,
+    RequestEvent,
+    add_request_hook,
+    disable_metrics,
+    enable_metrics,
+    export_openmetrics,
+    get_counting_pool_classes,
+    instrument_request,
+    is_metrics_enabled,
+    remove_request_hook,
+    reset_stats,
+    stats,
+)
+from megfile.s3_path import _patch_make_request
+from tests.test_s3 import s3_empty_client  # noqa: F401
+
+
+@pytest.fixture(autouse=True)
+def clean_stats():
+    enabled = is_metrics_enabled()
+    enable_metrics()
+    reset_stats()
+    yield
+    reset_stats()
+    if not enabled:
+        disable_metrics()
+
+
+def describe_request(operation, target, data=b""):
+    return operation, target, len(data)
+
+
+def describe_response(result):
+    return len(result), None
+
+
+def test_instrument_request(mocker):
+    mocker.patch.object(time, "sleep")
+    events = []
+    add_request_hook(events.append)
+
+    def send(operation, target, data=b""):
+        if operation == "Fail":
+            raise ValueError("fail")
+        if operation == "Retry" and len(events) == 0 and send.tries == 0:
+            send.tries += 1
+            raise ConnectionError("retry")
+        return b"response"
+
+    send.tries = 0
+    request = instrument_request(
+        patch_method(
+            send, max_retries=3, should_retry=lambda e: isinstance(e, ConnectionError)
+        ),
+        "test",
+        describe_request,
+        describe_response,
+    )
+    try:
+        assert request("Retry", "bucket", b"data") == b"response"
+        with pytest.raises(ValueError):
+            request("Fail", "bucket")
+    finally:
+        remove_request_hook(events.append)
+    request("Get", "other")
+
+    assert [(e.operation, e.retries, e.error) for e in events] == [
+        ("Retry", 1, None),
+        ("Fail", 0, "ValueError"),
+    ]
+    assert events[0].bytes_in == 8
+    assert events[0].bytes_out == 4
+    assert isinstance(events[0], RequestEvent)
+
+    result = stats()["test"]
+    assert set(result) == {"bucket", "other"}
+    assert result["bucket"]["Retry"]["count"] == 1
+    assert result["bucket"]["Retry"]["retries"] == 1
+    assert result["bucket"]["Fail"]["errors"] == {"ValueError": 1}
+    assert result["other"]["Get"]["latency_buckets"][float("inf")] == 1
+
+
+def test_instrument_request_disabled():
+    request = instrument_request(
+        lambda *args: b"", "test", describe_request, describe_response
+    )
+    disable_metrics()
+    assert request("Get", "host") == b""
+    assert stats() == {}
+
+    events = []
+    add_request_hook(events.append)
+    try:
+        assert is_metrics_enabled()
+        request("Get", "host")
+    finally:
+        remove_request_hook(events.append)
+    assert len(events) == 1
+
+
+class FakeConnectionPool(HTTPConnectionPool):
+    def urlopen(self, method, url, **kwargs):
+        if url == "/new":
+            self._new_conn()
+        return b""
+
+
+def test_instrument_request_connection_reused():
+    events = []
+    add_request_hook(events.append)
+    pool_class = get_counting_pool_classes({"http": FakeConnectionPool})["http"]
+    assert issubclass(pool_class, FakeConnectionPool)
+    assert get_counting_pool_classes({"http": pool_class})["http"] is pool_class
+    pool = pool_class("localhost")
+
+    def send(operation, target, data=b""):
+        if operation == "Connect":
+            pool.urlopen("GET", "/new")
+        elif operation == "Reuse":
+            pool.urlopen("GET", "/")
+        return b""
+
+    request = instrument_request(send, "test", describe_request, describe_response)
+    try:
+        request("Connect", "host")
+        request("Reuse", "host")
+        # not sent by a counting pool, e.g. sftp
+        request("Other", "host")
+    finally:
+        remove_request_hook(events.append)
+    assert [e.connection_reused for e in events] == [False, True, None]
+    # classes of urllib3 are not patched
+    assert not hasattr(HTTPConnectionPool, "_megfile_counting")
+
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        self.send_response(200)
+        self.send_header("Content-Length", "2")
+        self.end_headers()
+        self.wfile.write(b"ok")
+
+    def log_message(self, *args):
+        pass
+
+
+def test_http_connection_reused():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    events = []
+    add_request_hook(events.append)
+    try:
+        session = get_http_session()
+        url = "http://127.0.0.1:%d/" % server.server_address[1]
+        assert session.get(url).content == b"ok"
+        assert session.get(url).content == b"ok"
+    finally:
+        remove_request_hook(events.append)
+        server.shutdown()
+        server.server_close()
+    assert [e.connection_reused for e in events] == [False, True]
+    assert events[0].operation == "GET"
+
+
+def test_request_hook_error():
+    def hook(event):
+        raise ValueError("hook")
+
+    add_request_hook(hook)
+    try:
+        request = instrument_request(
+            lambda *args: b"", "test", describe_request, describe_response
+        )
+        assert request("Get", "host") == b""
+    finally:
+        remove_request_hook(hook)
+    assert stats()["test"]["host"]["Get"]["count"] == 1
+
+
+def test_export_openmetrics():
+    request = instrument_request(
+        lambda *args: b"ok", "test", describe_request, describe_response
+    )
+    request("Get", 'a"b')
+    text = export_openmetrics()
+    labels = 'protocol="test",target="a\\"b",operation="Get"'
+    assert "megfile_requests_total{%s} 1" % labels in text
+    assert "megfile_request_bytes_in_total{%s} 2" % labels in text
+    assert 'megfile_request_duration_seconds_bucket{%s,le="+Inf"} 1' % labels in text
+    assert "megfile_request_duration_seconds_count{%s} 1" % labels in text
+    assert text.endswith("# EOF\n")
+
+
+def test_open_telemetry_hook(mocker):
+    tracer = mocker.MagicMock()
+    hook = OpenTelemetryHook(tracer=tracer)
+    hook(
+        RequestEvent(
+            protocol="s3",
+            operation="GetObject",
+            target="bucket",
+            start_time=1.0,
+            latency=0.5,
+            error="NoSuchKey",
+        )
+    )
+    name = tracer.start_span.call_args.args[0]
+    kwargs = tracer.start_span.call_args.kwargs
+    assert name == "s3 GetObject"
+    assert kwargs["start_time"] == 1000000000
+    assert kwargs["attributes"]["error.type"] == "NoSuchKey"
+    tracer.start_span.return_value.end.assert_called_once_with(end_time=1500000000)
+
+
+def test_s3_request_stats(s3_empty_client):
+    _patch_make_request(s3_empty_client)
+    s3_empty_client.create_bucket(Bucket="bucket")
+    reset_stats()
+    megfile.smart_save_content("s3://bucket/key", b"data")
+    assert megfile.smart_load_content("s3://bucket/key") == b"data"
+    with pytest.raises(FileNotFoundError):
+        megfile.smart_load_content("s3://bucket/notExist")
+
+    result = megfile.stats()["s3"]["bucket"]
+    assert result["PutObject"]["bytes_out"] == 4
+    assert result["GetObject"]["bytes_in"] == 4
+    assert result["HeadObject"]["errors"] == {"404": 1}
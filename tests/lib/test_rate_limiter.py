@@ -0,0 +1,106 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import pytest
+
+from megfile.lib.rate_limiter import (
+    RateLimiter,
+    SharedTokenBucket,
+    TokenBucket,
+    get_rate_limiter,
+    reset_rate_limiters,
+)
+
+
+@pytest.fixture
+def clock(mocker):
+    now = mocker.patch("time.monotonic", return_value=100.0)
+
+    def sleep(interval):
+        now.return_value += interval
+
+    mocker.patch("time.sleep", side_effect=sleep)
+    return now
+
+
+def test_token_bucket(clock):
+    bucket = TokenBucket(rate=10, burst=2)
+    assert bucket.acquire() == 0
+    assert bucket.acquire() == 0
+    assert bucket.acquire() == pytest.approx(0.1)
+
+    # requests larger than burst are allowed, and repaid later
+    assert bucket.acquire(5) == pytest.approx(0.5)
+    clock.return_value += 10
+    assert bucket.acquire(2) == 0
+    assert bucket.acquire(1) == pytest.approx(0.1)
+
+    with pytest.raises(ValueError):
+        TokenBucket(rate=0)
+
+
+def test_shared_token_bucket(clock):
+    name = "test-%d" % os.getpid()
+    first = SharedTokenBucket(name, rate=10, burst=2)
+    second = SharedTokenBucket(name, rate=10, burst=2)
+    other = SharedTokenBucket(name + "-other", rate=10, burst=2)
+    try:
+        assert first.acquire() == 0
+        assert second.acquire() == 0
+        assert first.acquire() == pytest.approx(0.1)
+        assert other.acquire() == 0
+    finally:
+        for bucket in (first, second, other):
+            bucket.close()
+            if os.path.exists(bucket._path):
+                os.unlink(bucket._path)
+
+
+def _acquire_shared(name):
+    bucket = SharedTokenBucket(name, rate=0.01, burst=1)
+    try:
+        return bucket._take(1)
+    finally:
+        bucket.close()
+
+
+def test_shared_token_bucket_between_processes():
+    name = "test-processes-%d" % os.getpid()
+    try:
+        with ProcessPoolExecutor(max_workers=2) as executor:
+            tokens = sorted(executor.map(_acquire_shared, [name] * 3))
+        # only one process gets the burst token
+        assert tokens[-1] == pytest.approx(0, abs=0.1)
+        assert tokens[0] < -1.5
+    finally:
+        bucket = SharedTokenBucket(name, rate=1)
+        bucket.close()
+        os.unlink(bucket._path)
+
+
+def test_rate_limiter(clock):
+    limiter = RateLimiter(requests_per_second=2, bytes_per_second=100)
+    limiter.acquire_request(100)
+    limiter.acquire_request()
+    assert clock.return_value == 100.0
+    # waits 0.5s for the request, when 50 bytes are refilled
+    limiter.acquire_request(50)
+    assert clock.return_value == pytest.approx(100.5)
+    limiter.acquire_bytes(0)
+    limiter.acquire_bytes(200)
+    assert clock.return_value == pytest.approx(102.5)
+
+    unlimited = RateLimiter()
+    for _ in range(100):
+        unlimited.acquire_request(2**30)
+    assert clock.return_value == pytest.approx(102.5)
+
+
+def test_get_rate_limiter():
+    reset_rate_limiters()
+    try:
+        limiter = get_rate_limiter("key", 10, 0)
+        assert get_rate_limiter("key", 10, 0) is limiter
+        assert get_rate_limiter("other", 10, 0) is not limiter
+    finally:
+        reset_rate_limiters()
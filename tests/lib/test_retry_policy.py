@@ -0,0 +1,133 @@
+import time
+from email.utils import formatdate
+
+import botocore.exceptions
+import pytest
+import requests
+
+from megfile.lib import retry_policy
+from megfile.lib.retry_policy import (
+    CircuitBreaker,
+    RetryBudget,
+    decorrelated_jitter,
+    get_retry_after,
+    get_retry_interval,
+    get_retry_policy,
+    reset_retry_policies,
+)
+
+
+def test_decorrelated_jitter():
+    interval = 0.0
+    for _ in range(100):
+        next_interval = decorrelated_jitter(interval, base=0.1, cap=5)
+        assert 0.1 <= next_interval <= min(max(interval, 0.1) * 3, 5)
+        interval = next_interval
+
+
+def make_client_error(headers):
+    return botocore.exceptions.ClientError(
+        {
+            "Error": {"Code": "SlowDown"},
+            "ResponseMetadata": {"HTTPHeaders": headers},
+        },
+        "GetObject",
+    )
+
+
+def make_http_error(headers):
+    response = requests.Response()
+    response.status_code = 503
+    response.headers.update(headers)
+    return requests.exceptions.HTTPError(response=response)
+
+
+def test_get_retry_after():
+    assert get_retry_after(ValueError()) is None
+    assert get_retry_after(make_client_error({})) is None
+    assert get_retry_after(make_client_error({"retry-after": "3"})) == 3
+    assert get_retry_after(make_http_error({"Retry-After": "2.5"})) == 2.5
+    assert get_retry_after(make_http_error({"Retry-After": "invalid"})) is None
+
+    retry_after = get_retry_after(
+        make_http_error({"Retry-After": formatdate(time.time() + 60, usegmt=True)})
+    )
+    assert 55 < retry_after <= 60
+    past = formatdate(time.time() - 60, usegmt=True)
+    assert get_retry_after(make_http_error({"Retry-After": past})) == 0
+
+
+def test_get_retry_interval():
+    assert get_retry_interval(ValueError(), 0) < 1
+    assert get_retry_interval(make_client_error({"retry-after": "5"}), 0) == 5
+    assert (
+        get_retry_interval(make_client_error({"retry-after": "3600"}), 0)
+        == retry_policy.MAX_RETRY_AFTER
+    )
+
+
+def test_retry_budget(mocker):
+    now = mocker.patch("time.monotonic", return_value=100.0)
+    budget = RetryBudget(capacity=2, refill_rate=0.5)
+    assert budget.acquire()
+    assert budget.acquire()
+    assert not budget.acquire()
+
+    now.return_value = 102.0
+    assert budget.tokens == 1
+    assert budget.acquire()
+    assert not budget.acquire()
+
+    now.return_value = 200.0
+    assert budget.tokens == 2
+
+
+def test_circuit_breaker(mocker):
+    now = mocker.patch("time.monotonic", return_value=100.0)
+    breaker = CircuitBreaker(threshold=2, cooldown=10)
+    breaker.record_failure()
+    assert breaker.allow()
+    breaker.record_success()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.CLOSED
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    assert not breaker.allow()
+
+    # only one request probes the endpoint after cooldown
+    now.return_value = 110.0
+    assert breaker.allow()
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    assert not breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+
+    now.return_value = 120.0
+    assert breaker.allow()
+    breaker.record_success()
+    assert breaker.state == CircuitBreaker.CLOSED
+    assert breaker.allow()
+
+
+@pytest.fixture
+def policies():
+    reset_retry_policies()
+    yield
+    reset_retry_policies()
+
+
+def test_get_retry_policy(mocker, policies):
+    policy = get_retry_policy("endpoint")
+    assert policy is get_retry_policy("endpoint")
+    assert policy.budget is None
+    assert policy.circuit_breaker is None
+    assert policy.allow_request()
+    assert policy.allow_retry()
+
+    reset_retry_policies()
+    mocker.patch("megfile.lib.retry_policy.RETRY_BUDGET", 10)
+    mocker.patch("megfile.lib.retry_policy.CIRCUIT_BREAKER_THRESHOLD", 3)
+    policy = get_retry_policy("endpoint")
+    assert policy.budget.tokens == 10
+    assert policy.circuit_breaker.state == CircuitBreaker.CLOSED
+    assert get_retry_policy("other") is not policy
@@ -0,0 +1,93 @@
+import moto
+import moto.s3
+import pytest
+
+from megfile.lib.s3_append_writer import S3AppendWriter
+from megfile.lib.s3_buffered_writer import S3BufferedWriter
+from megfile.pathlike import StatResult
+from tests.test_s3 import s3_empty_client  # noqa: F401
+
+BUCKET = "bucket"
+KEY = "key"
+CONTENT = b"block0\n block1\n block2"
+
+
+@pytest.fixture
+def client(s3_empty_client, mocker):
+    mocker.patch.object(moto.s3.models, "S3_UPLOAD_PART_MIN_SIZE", 4)
+    mocker.patch.object(S3BufferedWriter, "MIN_BLOCK_SIZE", 8)
+    s3_empty_client.create_bucket(Bucket=BUCKET)
+    return s3_empty_client
+
+
+def load_content(client) -> bytes:
+    return client.get_object(Bucket=BUCKET, Key=KEY)["Body"].read()
+
+
+def test_s3_append_writer_new_file(client):
+    with S3AppendWriter(BUCKET, KEY, s3_client=client) as writer:
+        assert writer.mode == "ab"
+        assert writer.tell() == 0
+    assert load_content(client) == b""
+
+    with S3AppendWriter(BUCKET, "other", s3_client=client) as writer:
+        writer.write(CONTENT)
+    assert client.get_object(Bucket=BUCKET, Key="other")["Body"].read() == CONTENT
+
+
+def test_s3_append_writer_small_file(client, mocker):
+    client.put_object(Bucket=BUCKET, Key=KEY, Body=b"small")
+    upload_part_copy = mocker.spy(client, "upload_part_copy")
+
+    with S3AppendWriter(BUCKET, KEY, s3_client=client) as writer:
+        assert writer.tell() == 5
+        writer.write(CONTENT)
+        assert writer.tell() == 5 + len(CONTENT)
+
+    assert load_content(client) == b"small" + CONTENT
+    assert upload_part_copy.call_count == 0
+
+
+def test_s3_append_writer_copy(client, mocker):
+    client.put_object(Bucket=BUCKET, Key=KEY, Body=CONTENT)
+    mocker.patch("megfile.lib.s3_append_writer.MAX_COPY_OBJECT_SIZE", 10)
+    get_object = mocker.spy(client, "get_object")
+    upload_part_copy = mocker.spy(client, "upload_part_copy")
+
+    with S3AppendWriter(BUCKET, KEY, s3_client=client, block_size=8) as writer:
+        assert writer.tell() == len(CONTENT)
+        writer.write(b"block3\n block4")
+
+    assert get_object.call_count == 0
+    # 22 bytes are copied by 3 parts not larger than 10 bytes, concurrently
+    assert {
+        call.kwargs["PartNumber"]: call.kwargs["CopySourceRange"]
+        for call in upload_part_copy.mock_calls
+    } == {1: "bytes=0-7", 2: "bytes=8-15", 3: "bytes=16-21"}
+    assert load_content(client) == CONTENT + b"block3\n block4"
+
+
+def test_s3_append_writer_nothing_appended(client, mocker):
+    client.put_object(Bucket=BUCKET, Key=KEY, Body=CONTENT)
+    stat = StatResult(size=len(CONTENT))
+    head_object = mocker.spy(client, "head_object")
+    create_multipart_upload = mocker.spy(client, "create_multipart_upload")
+
+    with S3AppendWriter(BUCKET, KEY, s3_client=client, content_stat=stat) as writer:
+        assert writer.tell() == len(CONTENT)
+
+    assert head_object.call_count == 0
+    assert create_multipart_upload.call_count == 0
+    assert load_content(client) == CONTENT
+
+
+def test_s3_append_writer_copy_if_match(client, mocker):
+    etag = client.put_object(Bucket=BUCKET, Key=KEY, Body=CONTENT)["ETag"]
+    upload_part_copy = mocker.spy(client, "upload_part_copy")
+
+    with S3AppendWriter(BUCKET, KEY, s3_client=client) as writer:
+        writer.write(b"block3")
+
+    # fail if the object is changed after opened
+    assert upload_part_copy.call_args.kwargs["CopySourceIfMatch"] == etag
+    assert load_content(client) == CONTENT + b"block3"
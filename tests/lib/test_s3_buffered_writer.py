@@ -1,3 +1,4 @@
+import hashlib
 from concurrent.futures import wait
 from io import UnsupportedOperation
 from threading import Event
@@ -132,6 +133,48 @@ def test_s3_buffered_writer_write_multipart(client, mocker):
     assert content_read == content + b"\n" + content
 
 
+def test_s3_buffered_writer_checksums(client):
+    with S3BufferedWriter(
+        BUCKET, KEY, s3_client=client, checksums=("md5", "sha256")
+    ) as writer:
+        writer.write(CONTENT)
+        assert writer.digests == {}
+
+    assert writer.digests == {
+        "md5": hashlib.md5(CONTENT).hexdigest(),
+        "sha256": hashlib.sha256(CONTENT).hexdigest(),
+    }
+    metadata = client.head_object(Bucket=BUCKET, Key=KEY)["Metadata"]
+    assert metadata == {
+        "megfile-content-md5": hashlib.md5(CONTENT).hexdigest(),
+        "megfile-content-sha256": hashlib.sha256(CONTENT).hexdigest(),
+    }
+
+
+def test_s3_buffered_writer_checksums_multipart(client, mocker):
+    content = b"a" * 10 * 2**20
+    copy_object_func = mocker.spy(client, "copy_object")
+
+    with S3BufferedWriter(
+        BUCKET,
+        KEY,
+        s3_client=client,
+        block_size=8 * 2**20,
+        max_workers=1,
+        checksums=("md5", "crc32c"),
+    ) as writer:
+        writer.write(content)
+        writer.write(content)
+
+    assert writer._is_multipart
+    assert writer.digests["md5"] == hashlib.md5(content * 2).hexdigest()
+    assert "crc32c" in writer.digests
+    # object is not rewritten to save digests
+    assert copy_object_func.call_count == 0
+    assert client.head_object(Bucket=BUCKET, Key=KEY).get("Metadata", {}) == {}
+    assert client.get_object(Bucket=BUCKET, Key=KEY)["Body"].read() == content * 2
+
+
 def test_s3_buffered_writer_upload_part_retry_rewinds_body(s3_empty_client, mocker):
     client = s3_empty_client
     client.create_bucket(Bucket=BUCKET)
@@ -297,3 +340,32 @@ def test_s3_buffered_writer_non_r2_keeps_autoscale(client, mocker):
     assert writer._block_autoscale is True
 
     writer.close()
+
+
+def test_s3_buffered_writer_io_stats(client, caplog):
+    with S3BufferedWriter(BUCKET, KEY, s3_client=client) as writer:
+        assert writer.io_stats is None
+
+    block_size = 8 * 2**20
+    with caplog.at_level("INFO", logger="megfile.lib.s3_buffered_writer"):
+        with S3BufferedWriter(
+            BUCKET,
+            KEY,
+            s3_client=client,
+            block_size=block_size,
+            block_autoscale=False,
+            max_buffer_size=block_size,
+            max_workers=2,
+            io_profile=True,
+        ) as writer:
+            for _ in range(3):
+                writer.write(b"a" * block_size)
+            assert writer.io_stats.parts == 3
+            assert writer.io_stats.waits == 3
+
+    stats = writer.io_stats
+    assert stats.bytes_uploaded == 3 * block_size
+    assert stats.max_queue_depth == 1
+    assert stats.queue_depth == 0
+    assert stats.wait_time > 0
+    assert "io stats of 's3://bucket/key': parts=3" in caplog.text
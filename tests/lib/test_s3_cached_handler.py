@@ -1,3 +1,4 @@
+import mmap
 import os
 
 import pytest
@@ -334,3 +335,143 @@ def test_s3_cached_handler_mode_rbp(client):
         assert_write(fp1, fp2, CONTENT)
         assert_seek(fp1, fp2, 0, 2)
         assert_read(fp1, fp2, 5)
+
+
+@pytest.fixture
+def lazy_client(s3_empty_client):
+    s3_empty_client.create_bucket(Bucket=BUCKET)
+    s3_empty_client.put_object(Bucket=BUCKET, Key=KEY, Body=CONTENT)
+    return s3_empty_client
+
+
+def test_s3_cached_handler_lazy_read(lazy_client, mocker, tmp_path):
+    get_object = mocker.spy(lazy_client, "get_object")
+    with S3CachedHandler(
+        BUCKET,
+        KEY,
+        "rb",
+        s3_client=lazy_client,
+        cache_path=str(tmp_path / "cache"),
+        lazy=True,
+        block_size=7,
+    ) as reader:
+        assert get_object.call_count == 0
+
+        reader.seek(8)
+        assert reader.read(3) == CONTENT[8:11]
+        # block 1 is read, and block 2 is prefetched
+        reader._wait_all_blocks()
+        assert reader._block_bitmap == bytearray([0, 1, 1, 0])
+
+        reader.seek(0)
+        assert reader.readline() == b"block0\n"
+        assert reader.readline() == b" block1\n"
+        assert reader.readlines() == [b" block2"]
+        reader.seek(0)
+        assert reader.read() == CONTENT
+
+    ranges = sorted(call.kwargs["Range"] for call in get_object.mock_calls)
+    assert ranges == ["bytes=0-6", "bytes=14-20", "bytes=21-21", "bytes=7-13"]
+
+
+def test_s3_cached_handler_lazy_mmap(lazy_client, tmp_path):
+    with S3CachedHandler(
+        BUCKET,
+        KEY,
+        "rb",
+        s3_client=lazy_client,
+        cache_path=str(tmp_path / "cache"),
+        lazy=True,
+        block_size=7,
+    ) as reader:
+        with reader.mmap(8, 3) as mapped:
+            # content out of the range downloaded is not mapped
+            assert len(mapped) == 3
+            assert mapped[:] == CONTENT[8:11]
+            assert mapped.readonly
+        assert reader._block_bitmap == bytearray([0, 1, 0, 0])
+
+        with reader.mmap(20, 100) as mapped:
+            assert mapped[:] == CONTENT[20:]
+        assert len(reader.mmap(len(CONTENT))) == 0
+
+        with reader.mmap() as mapped:
+            assert mapped[:] == CONTENT
+
+
+def test_s3_cached_handler_mmap_offset(lazy_client, tmp_path):
+    content = os.urandom(mmap.ALLOCATIONGRANULARITY * 3)
+    lazy_client.put_object(Bucket=BUCKET, Key="large", Body=content)
+    offset = mmap.ALLOCATIONGRANULARITY + 5
+    with S3CachedHandler(
+        BUCKET,
+        "large",
+        "rb",
+        s3_client=lazy_client,
+        cache_path=str(tmp_path / "cache"),
+        lazy=True,
+        block_size=mmap.ALLOCATIONGRANULARITY,
+    ) as reader:
+        with reader.mmap(offset, 10) as mapped:
+            assert mapped[:] == content[offset : offset + 10]
+        assert reader._block_bitmap == bytearray([0, 1, 0])
+
+
+def test_s3_cached_handler_mmap_empty(lazy_client, tmp_path):
+    lazy_client.put_object(Bucket=BUCKET, Key="empty", Body=b"")
+    for lazy in (True, False):
+        with S3CachedHandler(
+            BUCKET,
+            "empty",
+            "rb",
+            s3_client=lazy_client,
+            cache_path=str(tmp_path / "cache"),
+            lazy=lazy,
+        ) as reader:
+            with reader.mmap() as mapped:
+                assert len(mapped) == 0
+                assert mapped[:] == b""
+
+
+def test_s3_cached_handler_lazy_write(lazy_client, tmp_path):
+    with S3CachedHandler(
+        BUCKET,
+        KEY,
+        "rb+",
+        s3_client=lazy_client,
+        cache_path=str(tmp_path / "cache"),
+        lazy=True,
+        block_size=7,
+    ) as writer:
+        writer.seek(8)
+        writer.write(b"B")
+        writer.seek(15)
+        writer.write(b"!block2")
+        # blocks 1 and 2 are written partially, block 3 is overwritten
+        assert writer._block_bitmap == bytearray([0, 1, 1, 1])
+        writer.seek(0)
+        assert writer.read() == b"block0\n Block1\n!block2"
+
+    content = lazy_client.get_object(Bucket=BUCKET, Key=KEY)["Body"].read()
+    assert content == b"block0\n Block1\n!block2"
+
+
+def test_s3_cached_handler_lazy_append(lazy_client, tmp_path):
+    with S3CachedHandler(
+        BUCKET,
+        KEY,
+        "ab+",
+        s3_client=lazy_client,
+        cache_path=str(tmp_path / "cache"),
+        lazy=True,
+        block_size=7,
+    ) as writer:
+        writer.write(b"\n block3")
+        # content appended needs no block
+        assert writer._block_bitmap == bytearray([0, 0, 0, 0])
+        writer.seek(15)
+        assert writer.readline() == b" block2\n"
+        assert writer.readline() == b" block3"
+
+    content = lazy_client.get_object(Bucket=BUCKET, Key=KEY)["Body"].read()
+    assert content == CONTENT + b"\n block3"
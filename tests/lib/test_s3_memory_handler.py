@@ -1,6 +1,9 @@
+import moto
+import moto.s3
 import pytest
 
 from megfile.errors import S3ConfigError
+from megfile.lib.s3_buffered_writer import S3BufferedWriter
 from megfile.lib.s3_memory_handler import S3MemoryHandler
 from tests.test_s3 import s3_empty_client  # noqa: F401
 
@@ -105,7 +108,11 @@ def assert_write(fp1, fp2, buffer):
     def load_content(fp):
         fp.flush()
         if isinstance(fp, S3MemoryHandler):
-            return fp._fileobj.getvalue()
+            offset = fp._fileobj.tell()
+            fp._fileobj.seek(0)
+            content = fp._fileobj.read()
+            fp._fileobj.seek(offset)
+            return content
         with open(fp.name, "rb") as reader:
             return reader.read()
 
@@ -118,7 +125,11 @@ def assert_write_lines(fp1, fp2, buffer):
     def load_content(fp):
         fp.flush()
         if isinstance(fp, S3MemoryHandler):
-            return fp._fileobj.getvalue()
+            offset = fp._fileobj.tell()
+            fp._fileobj.seek(0)
+            content = fp._fileobj.read()
+            fp._fileobj.seek(offset)
+            return content
         with open(fp.name, "rb") as reader:
             return reader.read()
 
@@ -267,6 +278,52 @@ def test_s3_memory_handler_mode_rbp(client):
         assert_read(fp1, fp2, 5)
 
 
+def test_s3_memory_handler_spill(client):
+    client.put_object(Bucket=BUCKET, Key=KEY, Body=CONTENT)
+
+    with S3MemoryHandler(BUCKET, KEY, "rb+", s3_client=client, spill_size=8) as fp:
+        assert fp._fileobj._rolled is True
+        assert fp.read() == CONTENT
+        fp.write(b"!")
+
+    assert client.get_object(Bucket=BUCKET, Key=KEY)["Body"].read() == CONTENT + b"!"
+
+
+def test_s3_memory_handler_copy_unmodified_parts(client, mocker):
+    mocker.patch.object(moto.s3.models, "S3_UPLOAD_PART_MIN_SIZE", 4)
+    mocker.patch.object(S3BufferedWriter, "MIN_BLOCK_SIZE", 8)
+    mocker.patch("megfile.lib.s3_memory_handler.WRITER_BLOCK_SIZE", 8)
+    client.put_object(Bucket=BUCKET, Key=KEY, Body=CONTENT)
+    upload_part = mocker.spy(client, "upload_part")
+    upload_part_copy = mocker.spy(client, "upload_part_copy")
+
+    with S3MemoryHandler(BUCKET, KEY, "rb+", s3_client=client) as fp:
+        fp.seek(8)
+        fp.write(b"B")
+
+    # parts of 8 bytes, only the second one is modified
+    assert [call.kwargs["PartNumber"] for call in upload_part.mock_calls] == [2]
+    assert [call.kwargs["CopySourceRange"] for call in upload_part_copy.mock_calls] == [
+        "bytes=0-7",
+        "bytes=16-21",
+    ]
+    content = client.get_object(Bucket=BUCKET, Key=KEY)["Body"].read()
+    assert content == b"block0\n Block1\n block2"
+
+
+def test_s3_memory_handler_not_modified(client, mocker):
+    mocker.patch.object(S3BufferedWriter, "MIN_BLOCK_SIZE", 8)
+    client.put_object(Bucket=BUCKET, Key=KEY, Body=CONTENT)
+    put_object = mocker.spy(client, "put_object")
+    create_multipart_upload = mocker.spy(client, "create_multipart_upload")
+
+    with S3MemoryHandler(BUCKET, KEY, "rb+", s3_client=client) as fp:
+        assert fp.read() == CONTENT
+
+    assert put_object.call_count == 0
+    assert create_multipart_upload.call_count == 0
+
+
 @pytest.fixture
 def error_client(s3_empty_client, fs):
     s3_empty_client.create_bucket(Bucket=BUCKET)
@@ -1,11 +1,13 @@
 import os
+import threading
 import time
-from io import BytesIO
+from io import BytesIO, TextIOWrapper
 
 import pytest
 
 from megfile.config import READER_BLOCK_SIZE
 from megfile.errors import S3FileChangedError, S3InvalidRangeError
+from megfile.lib.hedge_policy import HedgePolicy
 from megfile.lib.s3_prefetch_reader import S3PrefetchReader
 from tests.test_s3 import s3_empty_client  # noqa: F401
 
@@ -121,6 +123,111 @@ def test_s3_prefetch_reader_readline(s3_empty_client):
         reader.readline()
 
 
+@pytest.mark.parametrize("max_buffer_size", [0, 6, 16])
+def test_s3_prefetch_reader_iter_lines(s3_empty_client, max_buffer_size):
+    content = b"1\n2\n3\n\n4444\n5"
+    s3_empty_client.create_bucket(Bucket=BUCKET)
+    s3_empty_client.put_object(Bucket=BUCKET, Key=KEY, Body=content)
+    with S3PrefetchReader(
+        BUCKET,
+        KEY,
+        s3_client=s3_empty_client,
+        max_workers=2,
+        block_size=3,
+        max_buffer_size=max_buffer_size,
+    ) as reader:
+        assert list(reader.iter_lines()) == BytesIO(content).readlines()
+        assert reader.tell() == len(content)
+        assert list(reader.iter_lines()) == []
+
+        reader.seek(1)
+        lines = reader.iter_lines()
+        assert next(lines) == b"\n"
+        assert next(lines) == b"2\n"
+        lines.close()
+        # position is the end of the last line
+        assert reader.tell() == 4
+        assert reader.read(3) == b"3\n\n"
+        assert reader.readline() == b"4444\n"
+
+        reader.seek(0)
+        assert list(reader.iter_lines(encoding="utf-8")) == [
+            "1\n",
+            "2\n",
+            "3\n",
+            "\n",
+            "4444\n",
+            "5",
+        ]
+        assert reader.tell() == len(content)
+
+    with pytest.raises(IOError):
+        list(reader.iter_lines())
+
+
+@pytest.mark.parametrize(
+    "max_lines, max_bytes",
+    [(1, None), (2, None), (100, None), (100, 1), (3, 5), (100, 6), (100, 100)],
+)
+def test_s3_prefetch_reader_iter_lines_batched(s3_empty_client, max_lines, max_bytes):
+    content = b"1\n22\n333\n\n4444\n5\n666666\n7"
+    lines = BytesIO(content).readlines()
+    s3_empty_client.create_bucket(Bucket=BUCKET)
+    s3_empty_client.put_object(Bucket=BUCKET, Key=KEY, Body=content)
+    with S3PrefetchReader(
+        BUCKET, KEY, s3_client=s3_empty_client, max_workers=2, block_size=4
+    ) as reader:
+        batches = list(reader.iter_lines_batched(max_lines, max_bytes))
+        assert [line for batch in batches for line in batch] == lines
+        assert reader.tell() == len(content)
+        for index, batch in enumerate(batches):
+            assert 0 < len(batch) <= max_lines
+            if max_bytes is not None and len(batch) > 1:
+                assert sum(map(len, batch)) <= max_bytes
+            # batches are as large as possible
+            if index + 1 < len(batches):
+                next_line = batches[index + 1][0]
+                assert len(batch) == max_lines or (
+                    max_bytes is not None
+                    and sum(map(len, batch)) + len(next_line) > max_bytes
+                )
+
+
+def test_s3_prefetch_reader_iter_lines_batched_partially(s3_empty_client):
+    content = b"1\n22\n333\n\n4444\n5"
+    s3_empty_client.create_bucket(Bucket=BUCKET)
+    s3_empty_client.put_object(Bucket=BUCKET, Key=KEY, Body=content)
+    with S3PrefetchReader(
+        BUCKET, KEY, s3_client=s3_empty_client, max_workers=2, block_size=4
+    ) as reader:
+        batches = reader.iter_lines_batched(2)
+        assert next(batches) == [b"1\n", b"22\n"]
+        batches.close()
+        assert reader.tell() == 5
+        assert reader.readline() == b"333\n"
+
+        with pytest.raises(ValueError):
+            reader.iter_lines_batched(0)
+        with pytest.raises(ValueError):
+            reader.iter_lines_batched(1, 0)
+
+
+def test_s3_prefetch_reader_iter_text_lines(s3_empty_client):
+    content = "行一\r\n行二\r行三\n".encode("utf-8")
+    s3_empty_client.create_bucket(Bucket=BUCKET)
+    s3_empty_client.put_object(Bucket=BUCKET, Key=KEY, Body=content)
+    with S3PrefetchReader(
+        BUCKET, KEY, s3_client=s3_empty_client, max_workers=2, block_size=4
+    ) as reader:
+        # newlines are translated, and characters across blocks are decoded
+        assert list(reader.iter_lines(encoding="utf-8")) == list(
+            TextIOWrapper(BytesIO(content), encoding="utf-8")
+        )
+
+        with pytest.raises(ValueError):
+            reader.iter_lines(encoding="utf-16")
+
+
 def test_s3_prefetch_reader_readline_without_line_break_at_all(client):
     with S3PrefetchReader(
         BUCKET, KEY, s3_client=client, max_workers=2, block_size=40
@@ -698,3 +805,199 @@ def test_no_prefetch_readline_binary(client):  # noqa: ARG002
         assert line2 == b"line2\n"
         line3 = reader.readline()
         assert line3 == b"line3"
+
+
+def test_s3_prefetch_reader_io_stats(client, caplog):
+    with S3PrefetchReader(
+        BUCKET, KEY, s3_client=client, max_workers=2, block_size=7
+    ) as reader:
+        assert reader.io_stats is None
+
+    with caplog.at_level("INFO", logger="megfile.lib.base_prefetch_reader"):
+        with S3PrefetchReader(
+            BUCKET,
+            KEY,
+            s3_client=client,
+            max_workers=2,
+            block_size=7,
+            max_buffer_size=14,
+            io_profile=True,
+        ) as reader:
+            assert reader.read(10) == CONTENT[:10]
+            assert reader.readline() == b"ck1 block2 block3 block4 "
+            reader.seek(7)
+            assert reader.read(3) == b"blo"
+            reader.seek(28)
+            assert list(reader.iter_lines()) == [b"block4 "]
+            stats = reader.io_stats
+
+    assert stats.hits + stats.waits + stats.misses == 7
+    assert stats.evictions == 6
+    assert stats.blocked_time > 0
+    # block 1 is fetched again after seeking backward
+    assert stats.bytes_fetched >= 42
+    assert stats.bytes_consumed == 45
+    assert stats.wasted_bytes == stats.bytes_fetched - 45
+    assert stats.seeks == 2
+    assert stats.backward_seeks == 1
+    assert stats.seek_distance == 28 + 18
+    assert stats.to_dict()["seeks"] == 2
+    assert "io stats of 's3://bucket/key': hits=" in caplog.text
+
+
+def test_s3_prefetch_reader_io_stats_no_buffer(client):
+    with S3PrefetchReader(
+        BUCKET,
+        KEY,
+        s3_client=client,
+        block_size=7,
+        max_buffer_size=0,
+        io_profile=True,
+    ) as reader:
+        assert reader.read(10) == CONTENT[:10]
+        reader.seek(0)
+        assert reader.readline() == CONTENT
+
+    stats = reader.io_stats
+    assert stats.seeks == 1
+    assert stats.bytes_fetched == 10 + 35
+    assert stats.bytes_consumed == 10 + 35
+
+
+def test_s3_prefetch_reader_hedge(client, mocker):
+    reader = S3PrefetchReader(
+        BUCKET,
+        KEY,
+        s3_client=client,
+        max_workers=2,
+        block_size=7,
+        block_forward=1,
+        max_buffer_size=14,
+        io_profile=True,
+        hedge_percentile=0.5,
+    )
+    reader._hedge_policy = HedgePolicy(percentile=0.5, max_ratio=1, min_samples=1)
+    reader._hedge_policy.record(0.01)
+
+    fetch_buffer = reader._fetch_buffer
+    slow_indexes = {1}
+
+    def slow_fetch_buffer(index):
+        if index in slow_indexes:
+            slow_indexes.remove(index)
+            time.sleep(1)
+        return fetch_buffer(index)
+
+    mocker.patch.object(reader, "_fetch_buffer", side_effect=slow_fetch_buffer)
+    with reader:
+        start = time.perf_counter()
+        assert reader.read() == CONTENT
+        # the slow request is still running
+        assert time.perf_counter() - start < 0.9
+    assert reader.io_stats.hedges == 1
+
+
+def test_s3_prefetch_reader_stream(client, mocker):
+    get_object = mocker.spy(client, "get_object")
+    with S3PrefetchReader(
+        BUCKET,
+        KEY,
+        s3_client=client,
+        max_workers=2,
+        block_size=7,
+        max_buffer_size=21,
+        stream_min_size=1,
+    ) as reader:
+        # threads of executor never fetch blocks in stream
+        fetch_buffer = mocker.spy(reader, "_fetch_buffer")
+        assert reader.read() == CONTENT
+        assert fetch_buffer.call_count == 0
+        stream_thread = reader._stream_thread
+    if stream_thread is not None:
+        stream_thread.join(timeout=5)
+
+    # the first block, and the stream of others
+    assert get_object.call_count == 2
+    assert get_object.call_args_list[1].kwargs["Range"] == "bytes=7-"
+    assert reader._stream is None
+    assert reader._stream_thread is None
+
+
+def test_s3_prefetch_reader_stream_seek(client, mocker):
+    get_object = mocker.spy(client, "get_object")
+    with S3PrefetchReader(
+        BUCKET,
+        KEY,
+        s3_client=client,
+        max_workers=1,
+        block_size=7,
+        block_forward=1,
+        max_buffer_size=21,
+        stream_min_size=1,
+    ) as reader:
+        assert reader.read(10) == CONTENT[:10]
+        reader.seek(21)
+        assert reader._is_streaming is False
+        assert reader.read() == CONTENT[21:]
+
+    ranges = [call.kwargs["Range"] for call in get_object.call_args_list]
+    assert ranges[:2] == ["bytes=0-6", "bytes=7-"]
+    assert "bytes=21-27" in ranges
+    assert "bytes=28-34" in ranges
+
+
+def test_s3_prefetch_reader_stream_seek_not_blocked(client, mocker):
+    with S3PrefetchReader(
+        BUCKET,
+        KEY,
+        s3_client=client,
+        max_workers=1,
+        block_size=7,
+        block_forward=2,
+        max_buffer_size=21,
+        stream_min_size=1,
+    ) as reader:
+        assert reader.read(10) == CONTENT[:10]
+        stream = reader._stream
+        reading, release = threading.Event(), threading.Event()
+        read = stream.read
+
+        def slow_read(size):
+            reading.set()
+            release.wait(5)
+            return read(size)
+
+        mocker.patch.object(stream, "read", side_effect=slow_read)
+        # the last block is submitted, and read from stream slowly
+        assert reader.read(7) == CONTENT[10:17]
+        assert reading.wait(5)
+        start = time.perf_counter()
+        reader.seek(0)
+        assert time.perf_counter() - start < 1
+        assert reader.read(7) == CONTENT[:7]
+        release.set()
+        reader.seek(14)
+        assert reader.read() == CONTENT[14:]
+
+
+def test_s3_prefetch_reader_stream_error(client, mocker):
+    with S3PrefetchReader(
+        BUCKET,
+        KEY,
+        s3_client=client,
+        max_workers=1,
+        block_size=7,
+        block_forward=1,
+        max_buffer_size=21,
+        stream_min_size=1,
+    ) as reader:
+        assert reader.read(10) == CONTENT[:10]
+        mocker.patch.object(
+            reader._stream, "read", side_effect=IOError("connection reset")
+        )
+        get_object = mocker.spy(client, "get_object")
+        assert reader.read() == CONTENT[10:]
+
+    # blocks waiting for the failed stream are fetched by range
+    ranges = [call.kwargs["Range"] for call in get_object.call_args_list]
+    assert not ranges[0].endswith("-")
@@ -0,0 +1,148 @@
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import pytest
+
+from megfile.lib.shared_cache import SharedCache, get_cache_key
+from megfile.pathlike import StatResult
+
+
+def _writer(content: bytes, calls: list):
+    def download(path: str):
+        calls.append(path)
+        with open(path, "wb") as f:
+            f.write(content)
+
+    return download
+
+
+def test_shared_cache_acquire(tmp_path):
+    cache = SharedCache(str(tmp_path), max_size=100)
+    calls = []
+
+    entry = cache.acquire("key", _writer(b"content", calls), suffix=".txt")
+    assert entry.path == cache.get_path("key", ".txt")
+    assert entry.path.endswith(".txt")
+    with open(entry.path, "rb") as f:
+        assert f.read() == b"content"
+    entry.release()
+    entry.release()
+
+    # cached file is reused after released
+    entry = cache.acquire("key", _writer(b"other", calls), suffix=".txt")
+    with open(entry.path, "rb") as f:
+        assert f.read() == b"content"
+    entry.release()
+    assert len(calls) == 1
+    assert cache.get_size() == 7
+    assert not any(name.endswith(".tmp") for name in os.listdir(str(tmp_path)))
+
+    assert cache.get_path("key", ".lock") == cache.get_path("key")
+
+
+def test_shared_cache_download_error(tmp_path):
+    cache = SharedCache(str(tmp_path), max_size=100)
+
+    def download(path: str):
+        with open(path, "wb") as f:
+            f.write(b"partial")
+        raise OSError("error")
+
+    with pytest.raises(OSError):
+        cache.acquire("key", download)
+    assert not os.path.exists(cache.get_path("key"))
+    assert cache.get_size() == 0
+
+    entry = cache.acquire("key", _writer(b"content", []))
+    with open(entry.path, "rb") as f:
+        assert f.read() == b"content"
+    entry.release()
+
+
+def test_shared_cache_single_flight(tmp_path):
+    cache = SharedCache(str(tmp_path), max_size=100)
+    calls = []
+
+    def download(path: str):
+        time.sleep(0.1)
+        _writer(b"content", calls)(path)
+
+    def acquire(_):
+        entry = cache.acquire("key", download)
+        with open(entry.path, "rb") as f:
+            content = f.read()
+        entry.release()
+        return content
+
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        results = list(executor.map(acquire, range(8)))
+    assert results == [b"content"] * 8
+    assert len(calls) == 1
+
+
+def test_shared_cache_evict(tmp_path):
+    cache = SharedCache(str(tmp_path), max_size=10)
+
+    entry_a = cache.acquire("a", _writer(b"a" * 4, []))
+    entry_a.release()
+    entry_b = cache.acquire("b", _writer(b"b" * 4, []))
+    os.utime(entry_a.path, (0, 0))
+
+    # a is least recently used
+    entry_c = cache.acquire("c", _writer(b"c" * 4, []))
+    assert not os.path.exists(entry_a.path)
+    assert os.path.exists(entry_b.path)
+    assert cache.get_size() == 8
+
+    # files in use are never evicted, even if the cache is full
+    entry_d = cache.acquire("d", _writer(b"d" * 4, []))
+    assert os.path.exists(entry_b.path)
+    assert os.path.exists(entry_c.path)
+    assert os.path.exists(entry_d.path)
+    assert cache.get_size() == 12
+
+    entry_b.release()
+    entry_c.release()
+    entry_d.release()
+    entry_e = cache.acquire("e", _writer(b"e" * 4, []))
+    assert cache.get_size() <= 10
+    assert os.path.exists(entry_e.path)
+    entry_e.release()
+
+
+def _acquire_shared(args):
+    directory, index = args
+    cache = SharedCache(directory, max_size=100)
+
+    def download(path: str):
+        with open(os.path.join(directory, "calls"), "a") as f:
+            f.write("%d\n" % index)
+        time.sleep(0.2)
+        with open(path, "wb") as f:
+            f.write(b"content")
+
+    entry = cache.acquire("key", download)
+    with open(entry.path, "rb") as f:
+        content = f.read()
+    entry.release()
+    return content
+
+
+def test_shared_cache_between_processes(tmp_path):
+    directory = str(tmp_path / "cache")
+    with ProcessPoolExecutor(max_workers=3) as executor:
+        results = list(
+            executor.map(_acquire_shared, [(directory, i) for i in range(3)])
+        )
+    assert results == [b"content"] * 3
+    with open(os.path.join(directory, "calls")) as f:
+        assert len(f.read().splitlines()) == 1
+
+
+def test_get_cache_key():
+    stat = StatResult(size=1, mtime=2.0, extra={"ETag": '"etag"'})
+    assert get_cache_key("s3://a/b", stat) == 's3://a/b\0etag:"etag"'
+    stat = StatResult(size=1, mtime=2.0)
+    assert get_cache_key("s3://a/b", stat) == "s3://a/b\0size:1,mtime:2.0"
+    assert get_cache_key("s3://a/c", stat) != get_cache_key("s3://a/b", stat)
@@ -0,0 +1,191 @@
+from typing import Iterator
+
+import pytest
+from webdav3.exceptions import ResponseErrorCode
+
+from megfile.lib.webdav_buffered_writer import (
+    WebdavBufferedWriter,
+    get_chunk_upload_root,
+)
+
+NAME = "webdav://host/tmp/testfile"
+CHUNK_PATH = "/remote.php/dav/files/user/tmp/testfile"
+CHUNK_NAME = "webdav://host/remote.php/dav/files/user/tmp/testfile"
+CONTENT = b"block0 block1 block2 block3"
+
+
+class RecordClient:
+    """Record WebDAV requests, consume streamed bodies"""
+
+    def __init__(self, fail_stream: bool = False):
+        self.requests = []
+        self.uploaded = {}
+        self.fail_stream = fail_stream
+
+    def get_url(self, path):
+        return "http://host" + path
+
+    def execute_request(self, action, path, data=None, headers_ext=None):
+        if isinstance(data, Iterator):
+            chunks = []
+            for chunk in data:
+                if self.fail_stream:
+                    raise ResponseErrorCode(url=path, code=507, message=b"")
+                chunks.append(chunk)
+            data = b"".join(chunks)
+        self.requests.append((action, path, data, headers_ext))
+
+    def upload_to(self, buff, remote_path):
+        self.uploaded[remote_path] = buff.read()
+
+
+def test_get_chunk_upload_root():
+    assert get_chunk_upload_root("/tmp/testfile") is None
+    assert get_chunk_upload_root(CHUNK_PATH) == "/remote.php/dav/uploads/user"
+    assert (
+        get_chunk_upload_root("/nextcloud/remote.php/dav/files/user/a")
+        == "/nextcloud/remote.php/dav/uploads/user"
+    )
+
+
+def test_webdav_buffered_writer_small_file():
+    client = RecordClient()
+    with WebdavBufferedWriter(
+        "/tmp/testfile", webdav_client=client, name=NAME
+    ) as writer:
+        assert writer.name == NAME
+        assert writer.mode == "wb"
+        writer.write(CONTENT)
+        assert writer.tell() == len(CONTENT)
+
+    assert client.uploaded == {"/tmp/testfile": CONTENT}
+    assert client.requests == []
+
+
+def test_webdav_buffered_writer_stream():
+    client = RecordClient()
+    with WebdavBufferedWriter(
+        "/tmp/testfile",
+        webdav_client=client,
+        name=NAME,
+        block_size=4,
+        max_buffer_size=8,
+    ) as writer:
+        for i in range(0, len(CONTENT), 3):
+            writer.write(CONTENT[i : i + 3])
+
+    assert client.uploaded == {}
+    assert client.requests == [("upload", "/tmp/testfile", CONTENT, None)]
+
+
+def test_webdav_buffered_writer_stream_error():
+    client = RecordClient(fail_stream=True)
+    writer = WebdavBufferedWriter(
+        "/tmp/testfile", webdav_client=client, name=NAME, block_size=4
+    )
+    with pytest.raises(ResponseErrorCode):
+        for _ in range(100):
+            writer.write(CONTENT)
+        writer.close()
+    writer.abort()
+
+
+def test_webdav_buffered_writer_stream_abort():
+    client = RecordClient()
+    with pytest.raises(ValueError):
+        with WebdavBufferedWriter(
+            "/tmp/testfile",
+            webdav_client=client,
+            name=NAME,
+            block_size=4,
+            atomic=True,
+        ) as writer:
+            writer.write(CONTENT)
+            raise ValueError("test")
+
+    # the partial stream only ever reached a temporary file, which is removed
+    assert [request[:3] for request in client.requests] == [
+        ("clean", client.requests[0][1], None)
+    ]
+    assert client.requests[0][1].startswith("/tmp/.testfile.megfile-")
+    assert client.uploaded == {}
+
+
+def test_webdav_buffered_writer_stream_atomic():
+    client = RecordClient()
+    with WebdavBufferedWriter(
+        "/tmp/testfile",
+        webdav_client=client,
+        name=NAME,
+        block_size=4,
+        max_buffer_size=8,
+        atomic=True,
+    ) as writer:
+        writer.write(CONTENT)
+
+    upload, move = client.requests
+    assert upload[0] == "upload"
+    assert upload[1].startswith("/tmp/.testfile.megfile-")
+    assert upload[2] == CONTENT
+    assert move == (
+        "move",
+        upload[1],
+        None,
+        ["Destination: http://host/tmp/testfile", "Overwrite: T"],
+    )
+
+
+def test_webdav_buffered_writer_chunked_upload(mocker):
+    mocker.patch.object(WebdavBufferedWriter, "MIN_CHUNK_SIZE", 4)
+    client = RecordClient()
+    with WebdavBufferedWriter(
+        CHUNK_PATH,
+        webdav_client=client,
+        name=CHUNK_NAME,
+        block_size=8,
+        max_buffer_size=16,
+        max_workers=2,
+    ) as writer:
+        writer.write(CONTENT)
+        writer.write(CONTENT)
+
+    destination = "Destination: http://host" + CHUNK_PATH
+    mkdir, *chunks, move = client.requests
+    upload_dir = mkdir[1].rstrip("/")
+    assert mkdir[0] == "mkdir"
+    assert upload_dir.startswith("/remote.php/dav/uploads/user/megfile-")
+    assert mkdir[3] == [destination]
+    assert sorted((chunk[1], chunk[2]) for chunk in chunks) == [
+        (upload_dir + "/00001", CONTENT),
+        (upload_dir + "/00002", CONTENT),
+    ]
+    assert move == (
+        "move",
+        upload_dir + "/.file",
+        None,
+        [destination, "Overwrite: T", "OC-Total-Length: %d" % (len(CONTENT) * 2)],
+    )
+
+
+def test_webdav_buffered_writer_chunked_upload_abort(mocker):
+    mocker.patch.object(WebdavBufferedWriter, "MIN_CHUNK_SIZE", 4)
+    client = RecordClient()
+    writer = WebdavBufferedWriter(
+        CHUNK_PATH, webdav_client=client, name=CHUNK_NAME, block_size=8, atomic=True
+    )
+    writer.write(CONTENT)
+    assert writer.abort() is True
+
+    actions = [request[0] for request in client.requests]
+    assert actions == ["mkdir", "upload", "clean"]
+    assert client.requests[-1][1] == client.requests[0][1]
+
+
+def test_webdav_buffered_writer_write_after_close():
+    writer = WebdavBufferedWriter(
+        "/tmp/testfile", webdav_client=RecordClient(), name=NAME
+    )
+    writer.close()
+    with pytest.raises(IOError):
+        writer.write(b"test")
+    assert writer.closed is True
@@ -5,9 +5,14 @@ from io import BytesIO
 
 import pytest
 import requests
+from webdav3.client import Client as WebdavClient
+from webdav3.exceptions import ResponseErrorCode
 
 from megfile.config import READER_BLOCK_SIZE
-from megfile.lib.webdav_prefetch_reader import WebdavPrefetchReader
+from megfile.lib.webdav_prefetch_reader import (
+    WebdavPrefetchReader,
+    _webdav_fetch_first_block,
+)
 
 PATH = "/test"
 CONTENT = b"block0 block1 block2 block3 block4 "
@@ -591,3 +596,95 @@ def test_webdav_prefetch_reader_retry(mocker, caplog):
         ) as f:
             f.read()
         assert "The downloaded content is incomplete" in caplog.text
+
+
+class FakeResponse206(FakeResponse200):
+    status_code = 206
+
+    def __init__(self, content=CONTENT, start=0) -> None:
+        super().__init__(content)
+        self._start = start
+
+    @property
+    def headers(self):
+        headers = super().headers
+        headers["Content-Range"] = "bytes %d-%d/%d" % (
+            self._start,
+            self._start + len(self._content) - 1,
+            CONTENT_SIZE,
+        )
+        return headers
+
+
+def _fake_execute_request_206(*args, headers_ext=None, **kwargs):
+    header_range = headers_ext and next(
+        (h[7:] for h in headers_ext if h.startswith("Range:")), None
+    )
+    start, end = list(map(int, header_range[6:].split("-")))
+    return FakeResponse206(CONTENT[start : end + 1], start)
+
+
+def test_webdav_fetch_first_block(mocker):
+    client = WebdavClient({})
+    mocker.patch.object(
+        client, "execute_request", side_effect=_fake_execute_request_206
+    )
+    response = _webdav_fetch_first_block(client, PATH, 7)
+    assert response["ContentSize"] == CONTENT_SIZE
+    assert response["Body"].read() == CONTENT[:7]
+
+    mocker.patch.object(client, "execute_request", return_value=FakeResponse200())
+    assert _webdav_fetch_first_block(client, PATH, 7) is None
+
+    mocker.patch.object(
+        client,
+        "execute_request",
+        side_effect=ResponseErrorCode(url=PATH, code=416, message=b""),
+    )
+    assert _webdav_fetch_first_block(client, PATH, 7) is None
+
+    mocker.patch.object(
+        client,
+        "execute_request",
+        side_effect=ResponseErrorCode(url=PATH, code=403, message=b""),
+    )
+    with pytest.raises(ResponseErrorCode):
+        _webdav_fetch_first_block(client, PATH, 7)
+
+
+def test_webdav_prefetch_reader_first_block(mocker):
+    execute_request = mocker.patch(
+        "megfile.lib.webdav_prefetch_reader.WebdavClient.execute_request",
+        side_effect=_fake_execute_request_206,
+    )
+    webdav_stat = mocker.patch("megfile.lib.webdav_prefetch_reader._webdav_stat")
+
+    with WebdavPrefetchReader(
+        PATH, max_workers=2, block_size=7, block_forward=0
+    ) as reader:
+        assert reader._content_size == CONTENT_SIZE
+        assert execute_request.call_count == 1
+        assert reader.read(7) == CONTENT[:7]
+        assert execute_request.call_count == 1
+        assert reader.read() == CONTENT[7:]
+
+    webdav_stat.assert_not_called()
+
+
+def test_webdav_prefetch_reader_first_index_response(mocker):
+    execute_request = mocker.patch(
+        "megfile.lib.webdav_prefetch_reader.WebdavClient.execute_request",
+        side_effect=_fake_execute_request_206,
+    )
+    first_index_response = {"Body": BytesIO(CONTENT[:7]), "ContentSize": CONTENT_SIZE}
+
+    with WebdavPrefetchReader(
+        PATH,
+        max_workers=2,
+        block_size=7,
+        block_forward=0,
+        first_index_response=first_index_response,
+    ) as reader:
+        assert reader.read(7) == CONTENT[:7]
+        execute_request.assert_not_called()
+        assert reader.read() == CONTENT[7:]
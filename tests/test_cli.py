@@ -36,6 +36,7 @@ from megfile.cli import (
     version,
 )
 from megfile.config import CaseSensitiveConfigParser
+from megfile.smart import smart_load_content
 
 from .test_smart import s3_empty_client  # noqa: F401
 
@@ -448,6 +449,84 @@ def test_tail2(runner, tmpdir, mocker):
     assert result.output == "6\n7\n8\n9\n"
 
 
+def test_head_and_tail_with_ranges(runner, tmpdir, mocker):
+    path = str(tmpdir / "text")
+    with open(path, "w") as f:
+        for i in range(1000):
+            f.write("%03d\n" % i)
+
+    mocker.patch("megfile.cli.LINES_BLOCK_SIZE", 8)
+    load_content = mocker.patch(
+        "megfile.cli.smart_load_content", side_effect=smart_load_content
+    )
+    result = runner.invoke(head, ["-n", "3", path])
+    assert result.exit_code == 0
+    assert result.output == "000\n001\n002\n"
+    assert [call.args[1:] for call in load_content.call_args_list] == [
+        (0, 8),
+        (8, 24),
+    ]
+
+    load_content.reset_mock()
+    result = runner.invoke(tail, ["-n", "4", path])
+    assert result.exit_code == 0
+    assert result.output == "997\n998\n999\n"
+    assert [call.args[1:] for call in load_content.call_args_list] == [
+        (3992, 4000),
+        (3976, 3992),
+    ]
+
+    result = runner.invoke(head, ["-n", "2000", path])
+    assert result.exit_code == 0
+    assert result.output == "".join("%03d\n" % i for i in range(1000))
+
+    result = runner.invoke(tail, ["-n", "2000", path])
+    assert result.exit_code == 0
+    assert result.output == "".join("%03d\n" % i for i in range(1000))
+
+
+def test_head_s3_without_getsize(runner, s3_empty_client, mocker):
+    s3_empty_client.put_object(Bucket="bucket", Key="empty", Body=b"")
+    s3_empty_client.put_object(Bucket="bucket", Key="text", Body=b"0\n1\n2\n3\n")
+
+    mocker.patch("megfile.cli.LINES_BLOCK_SIZE", 4)
+    mocker.patch("megfile.cli.smart_getsize", side_effect=AssertionError)
+    load_content = mocker.patch(
+        "megfile.cli.smart_load_content", side_effect=smart_load_content
+    )
+    result = runner.invoke(head, ["-n", "1", "s3://bucket/text"])
+    assert result.exit_code == 0
+    assert result.output == "0\n"
+    assert load_content.call_count == 1
+
+    result = runner.invoke(head, ["-n", "10", "s3://bucket/text"])
+    assert result.exit_code == 0
+    assert result.output == "0\n1\n2\n3\n"
+
+    result = runner.invoke(head, ["s3://bucket/empty"])
+    assert result.exit_code == 0
+    assert result.output == ""
+
+
+def test_tail_follow_content(runner, tmpdir, mocker):
+    path = str(tmpdir / "text")
+    with open(path, "wb") as f:
+        f.write(b"0\n1\n")
+
+    echo = mocker.patch("click.echo")
+    assert _tail_follow_content(path, 2) == 4
+    echo.assert_called_once_with(b"1\n", nl=False)
+
+    echo.reset_mock()
+    assert _tail_follow_content(path, 4) == 4
+    echo.assert_not_called()
+
+    with open(path, "wb") as f:
+        f.write(b"2\n")
+    assert _tail_follow_content(path, 4) == 2
+    echo.assert_called_once_with(b"2\n", nl=False)
+
+
 @pytest.mark.skipif(
     sys.version_info >= (3, 14),
     reason="Skip on Python 3.14 because of python 3.14 on github not stabilize",
@@ -775,3 +854,19 @@ def test__tail_follow_content(tmpdir, mocker):
     assert _tail_follow_content(str(tmpdir / "text"), 6) == 12
 
     assert _tail_follow_content(str(tmpdir / "text"), 12) == 12
+
+
+def test_md5sum_algorithms(runner, testdir):
+    result = runner.invoke(
+        md5sum, [str(testdir / "text"), "-a", "md5", "-a", "sha256", "-a", "crc32c"]
+    )
+
+    assert result.exit_code == 0
+    assert result.output == (
+        "md5: 5d41402abc4b2a76b9719d911017c592\n"
+        "sha256: 2cf24dba5fb0a30e26e83b2ac5b9e29e1b161e5c1fa7425e73043362938b9824\n"
+        "crc32c: 9a71bb4c\n"
+    )
+
+    result = runner.invoke(md5sum, [str(testdir), "-a", "sha256"])
+    assert result.exit_code != 0
@@ -7,6 +7,7 @@ import pytest
 import urllib3.exceptions
 
 from megfile.errors import (
+    CircuitOpenError,
     ClientError,
     HTTPError,
     HttpException,
@@ -40,6 +41,7 @@ from megfile.errors import (
     translate_http_error,
     translate_s3_error,
 )
+from megfile.lib.retry_policy import reset_retry_policies
 
 
 def test_megfile_max_retries_exceeded_error():
@@ -481,6 +483,104 @@ def test_patch_method(caplog):
         assert "Error already fixed by retry" in caplog.text
 
 
+def make_slow_down_error(retry_after=None):
+    headers = {} if retry_after is None else {"retry-after": retry_after}
+    return botocore.exceptions.ClientError(
+        {"Error": {"Code": "SlowDown"}, "ResponseMetadata": {"HTTPHeaders": headers}},
+        "GetObject",
+    )
+
+
+def test_patch_method_retry_interval(mocker):
+    sleep = mocker.patch("megfile.errors.time.sleep")
+    errors = [make_slow_down_error(), make_slow_down_error("7"), None]
+
+    def test():
+        error = errors.pop(0)
+        if error is not None:
+            raise error
+        return "ok"
+
+    assert patch_method(test, max_retries=3, should_retry=s3_should_retry)() == "ok"
+    intervals = [call.args[0] for call in sleep.call_args_list]
+    assert 0.1 <= intervals[0] <= 0.3
+    assert intervals[1] == 7
+
+
+@pytest.fixture
+def retry_policies():
+    reset_retry_policies()
+    yield
+    reset_retry_policies()
+
+
+def test_patch_method_retry_budget(mocker, retry_policies):
+    mocker.patch("megfile.errors.time.sleep")
+    mocker.patch("megfile.lib.retry_policy.RETRY_BUDGET", 3)
+    mocker.patch("megfile.lib.retry_policy.RETRY_BUDGET_REFILL_RATE", 0)
+    calls = 0
+
+    def test():
+        nonlocal calls
+        calls += 1
+        raise make_slow_down_error()
+
+    patched_test = patch_method(
+        test, max_retries=10, should_retry=s3_should_retry, endpoint="endpoint"
+    )
+    with pytest.raises(MaxRetriesExceededError):
+        patched_test()
+    assert calls == 4
+
+    # no more retries
+    with pytest.raises(MaxRetriesExceededError):
+        patched_test()
+    assert calls == 5
+
+    # budget is per endpoint
+    with pytest.raises(MaxRetriesExceededError):
+        patch_method(
+            test, max_retries=2, should_retry=s3_should_retry, endpoint=lambda: "other"
+        )()
+    assert calls == 7
+
+
+def test_patch_method_circuit_breaker(mocker, retry_policies):
+    mocker.patch("megfile.errors.time.sleep")
+    mocker.patch("megfile.lib.retry_policy.CIRCUIT_BREAKER_THRESHOLD", 3)
+    mocker.patch("megfile.lib.retry_policy.CIRCUIT_BREAKER_COOLDOWN", 10)
+    now = mocker.patch("time.monotonic", return_value=100.0)
+    errors = []
+
+    def test():
+        if errors:
+            raise errors.pop(0)
+        return "ok"
+
+    patched_test = patch_method(
+        test, max_retries=10, should_retry=s3_should_retry, endpoint="endpoint"
+    )
+
+    # errors not retried mean the endpoint is available
+    errors.extend([make_slow_down_error(), make_slow_down_error(), KeyError()])
+    with pytest.raises(KeyError):
+        patched_test()
+    errors.extend([make_slow_down_error(), make_slow_down_error()])
+    assert patched_test() == "ok"
+
+    errors.extend([make_slow_down_error()] * 3)
+    with pytest.raises(CircuitOpenError) as error:
+        patched_test()
+    assert error.value.endpoint == "endpoint"
+    assert errors == []
+    with pytest.raises(CircuitOpenError):
+        patched_test()
+    pickle.loads(pickle.dumps(error.value))
+
+    now.return_value = 110.0
+    assert patched_test() == "ok"
+
+
 def test_pickle_error():
     e = S3UnknownError(Exception(), "")
     d = pickle.dumps(e)
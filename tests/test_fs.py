@@ -730,6 +730,21 @@ def test_fs_walk_with_nested_subdirs(filesystem):
     ]
 
 
+def test_fs_walk_prune(filesystem):
+    os.makedirs("/A/folder1/sub1")
+    os.makedirs("/A/folder2/sub2")
+    result = []
+    for root, dirs, files in fs.fs_walk("A"):
+        result.append((root, list(dirs), files))
+        if "folder1" in dirs:
+            dirs.remove("folder1")
+    assert result == [
+        ("A", ["folder1", "folder2"], []),
+        ("A/folder2", ["sub2"], []),
+        ("A/folder2/sub2", [], []),
+    ]
+
+
 def test_fs_walk_with_nested_subdirs_symlink(filesystem):
     """
     /A/
@@ -1,9 +1,11 @@
+import hashlib
 import os
 
 import pytest
 
-from megfile.fs_path import FSPath
+from megfile.fs_path import FSPath, copy_fd, fs_concat
 from megfile.lib.compat import fspath
+from megfile.smart import smart_concat
 
 FS_PROTOCOL_PREFIX = FSPath.protocol + "://"
 TEST_PATH = "/test/dir/file"
@@ -105,3 +107,159 @@ def test_sync(fs):
 
     with open("dir2/test1", "r") as f:
         assert f.read() == "test2"
+
+
+def test_open_checksums(fs):
+    with FSPath("dir/test").open("wb", checksums=("md5",), atomic=True) as f:
+        f.write(b"test")
+    assert f.digests == {"md5": hashlib.md5(b"test").hexdigest()}
+
+    with open("dir/test", "rb") as f:
+        assert f.read() == b"test"
+
+    with pytest.raises(ValueError):
+        FSPath("dir/test").open("ab", checksums=("md5",))
+
+
+@pytest.mark.parametrize("zero_copy", [True, False])
+def test_fs_concat(tmpdir, mocker, zero_copy):
+    if not zero_copy:
+        mocker.patch("megfile.fs_path._zero_copy_fd", return_value=False)
+    src_paths = []
+    for i in range(3):
+        src_path = str(tmpdir / ("src%d" % i))
+        with open(src_path, "wb") as f:
+            f.write(b"content%d" % i * (i + 1))
+        src_paths.append(src_path)
+
+    dst_path = str(tmpdir / "dir" / "dst")
+    fs_concat(src_paths, dst_path)
+    with open(dst_path, "rb") as f:
+        assert f.read() == b"content0content1content1content2content2content2"
+
+
+def test_fs_concat_with_protocol(tmpdir, monkeypatch):
+    monkeypatch.chdir(str(tmpdir))
+    src_paths = []
+    for i in range(2):
+        src_path = str(tmpdir / ("src%d" % i))
+        with open(src_path, "wb") as f:
+            f.write(b"content%d" % i)
+        src_paths.append("file://" + src_path)
+
+    dst_path = str(tmpdir / "dir" / "dst")
+    smart_concat(src_paths, "file://" + dst_path)
+    with open(dst_path, "rb") as f:
+        assert f.read() == b"content0content1"
+    assert not os.path.exists(str(tmpdir / "file:"))
+
+
+def test_copy_fd_fallback(tmpdir, mocker):
+    mocker.patch("os.copy_file_range", side_effect=OSError(18, "EXDEV"))
+    sendfile = mocker.patch("os.sendfile", side_effect=OSError(22, "EINVAL"))
+    src_path, dst_path = str(tmpdir / "src"), str(tmpdir / "dst")
+    with open(src_path, "wb") as f:
+        f.write(b"test")
+
+    sizes = []
+    with open(src_path, "rb") as fsrc, open(dst_path, "wb") as fdst:
+        copy_fd(fsrc.fileno(), fdst.fileno(), callback=sizes.append)
+    with open(dst_path, "rb") as f:
+        assert f.read() == b"test"
+    assert sizes == [4]
+    assert sendfile.call_count == 1
+
+
+def test_copy_fd_copy_nothing(tmpdir, mocker):
+    copy_file_range = mocker.patch("os.copy_file_range", return_value=0)
+    sendfile = mocker.patch("os.sendfile", return_value=0)
+    src_path, dst_path = str(tmpdir / "src"), str(tmpdir / "dst")
+    with open(src_path, "wb") as f:
+        f.write(b"test")
+
+    sizes = []
+    with open(src_path, "rb") as fsrc, open(dst_path, "wb") as fdst:
+        copy_fd(fsrc.fileno(), fdst.fileno(), callback=sizes.append)
+    with open(dst_path, "rb") as f:
+        assert f.read() == b"test"
+    assert sizes == [4]
+    assert copy_file_range.call_count == 1
+    assert sendfile.call_count == 1
+
+
+def test_copy_reflink(tmpdir, mocker):
+    src_path, dst_path = str(tmpdir / "src"), str(tmpdir / "dst")
+    with open(src_path, "wb") as f:
+        f.write(b"test")
+
+    ioctl = mocker.patch("fcntl.ioctl", side_effect=OSError(95, "EOPNOTSUPP"))
+    sizes = []
+    FSPath(src_path).copy(dst_path, callback=sizes.append)
+    assert ioctl.call_count == 1
+    with open(dst_path, "rb") as f:
+        assert f.read() == b"test"
+    assert sizes == [4]
+    assert os.stat(src_path).st_mtime == os.stat(dst_path).st_mtime
+
+    ioctl = mocker.patch("fcntl.ioctl")
+    copy_fd = mocker.patch("megfile.fs_path.copy_fd")
+    sizes = []
+    FSPath(src_path).copy(dst_path, callback=sizes.append)
+    assert ioctl.call_count == 1
+    assert copy_fd.call_count == 0
+    assert sizes == [4]
+
+    with pytest.raises(IsADirectoryError):
+        FSPath(str(tmpdir)).copy(dst_path)
+
+
+def test_sync_concurrently(tmpdir):
+    src_dir, dst_dir = str(tmpdir / "src"), str(tmpdir / "dst")
+    for name in ("a", "b/c", "b/d/e", "f/g"):
+        path = os.path.join(src_dir, name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w") as f:
+            f.write(name)
+    os.makedirs(os.path.join(src_dir, "empty"))
+
+    sizes = {}
+    FSPath(src_dir).sync(
+        dst_dir,
+        callback=lambda path, size: sizes.update({path: sizes.get(path, 0) + size}),
+        max_workers=2,
+    )
+    for name in ("a", "b/c", "b/d/e", "f/g"):
+        with open(os.path.join(dst_dir, name)) as f:
+            assert f.read() == name
+        assert sizes[os.path.join(src_dir, name)] == len(name)
+    assert os.path.isdir(os.path.join(dst_dir, "empty"))
+
+    with open(os.path.join(dst_dir, "b/c"), "w") as f:
+        f.write("changed")
+    FSPath(src_dir).sync(dst_dir, overwrite=False)
+    with open(os.path.join(dst_dir, "b/c")) as f:
+        assert f.read() == "changed"
+    FSPath(src_dir).sync(dst_dir, force=True)
+    with open(os.path.join(dst_dir, "b/c")) as f:
+        assert f.read() == "b/c"
+
+
+def test_walk_and_scan_unordered(tmpdir):
+    root = str(tmpdir)
+    for name in ("a", "b/c", "b/d/e", "f/g"):
+        path = os.path.join(root, name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w") as f:
+            f.write(name)
+
+    ordered = list(FSPath(root).walk())
+    assert ordered[0] == (root, ["b", "f"], ["a"])
+    assert sorted(FSPath(root).walk(ordered=False, max_workers=2)) == sorted(ordered)
+
+    paths = list(FSPath(root).scan())
+    assert paths == [os.path.join(root, name) for name in ("a", "b/c", "b/d/e", "f/g")]
+    assert sorted(FSPath(root).scan(ordered=False, max_workers=2)) == paths
+
+    entries = sorted(FSPath(root).scan_stat(ordered=False), key=lambda e: e.path)
+    assert [entry.path for entry in entries] == paths
+    assert [entry.stat.size for entry in entries] == [1, 3, 5, 3]
@@ -1,3 +1,4 @@
+import os
 import pickle
 import time
 from functools import cached_property
@@ -13,6 +14,8 @@ from megfile.errors import (
     MaxRetriesExceededError,
     UnknownError,
 )
+from megfile.http_path import http_download
+from megfile.smart import smart_copy, smart_open
 from tests.compat.http import (
     get_http_session,
     http_exists,
@@ -155,17 +158,24 @@ def test_http_open_pickle(mocker):
 
 def test_http_open_range(mocker):
     requests_get_func = mocker.patch("requests.Session.get")
-    requests_get_mocker = mocker.patch("requests.get")
 
-    class FakeResponse200Range(FakeResponse):
+    class FakeResponse206(FakeResponse):
         status_code = 200
 
         def __init__(self, headers=None):
             self._content = b"test"
+            self._content_range = None
             if headers and headers.get("Range"):
                 start, end = list(
                     map(int, headers["Range"].replace("bytes=", "").split("-"))
                 )
+                end = min(end, len(self._content) - 1)
+                self.status_code = 206
+                self._content_range = "bytes %d-%d/%d" % (
+                    start,
+                    end,
+                    len(self._content),
+                )
                 self._content = self._content[start : end + 1]
 
         @property
@@ -174,12 +184,15 @@ def test_http_open_range(mocker):
 
         @property
         def headers(self):
-            return {
+            headers = {
                 "Content-Length": str(len(self._content)),
                 "Content-Type": "test/test",
                 "Last-Modified": "Wed, 24 Nov 2021 07:18:41 GMT",
                 "Accept-Ranges": "bytes",
             }
+            if self._content_range:
+                headers["Content-Range"] = self._content_range
+            return headers
 
         @property
         def content(self):
@@ -190,12 +203,51 @@ def test_http_open_range(mocker):
             return {}
 
     def fake_get(*args, headers=None, **kwargs):
-        return FakeResponse200Range(headers)
+        return FakeResponse206(headers)
 
-    requests_get_func.return_value = FakeResponse200Range()
-    requests_get_mocker.side_effect = fake_get
+    requests_get_func.side_effect = fake_get
     with http_open("http://test", "rb", block_size=1) as f:
-        f.read() == b"test"
+        assert requests_get_func.call_count == 1
+        assert f.read() == b"test"
+    assert http_stat("http://test").size == 4
+
+    requests_get_func.reset_mock()
+    with http_open("http://test", "rb", block_size=8) as f:
+        assert f.read() == b"test"
+    assert requests_get_func.call_count == 1
+
+    with smart_open("http://test", "rb", block_size=1, io_profile=True) as f:
+        assert f.read() == b"test"
+    assert f.io_stats is not None
+    assert f.io_stats.bytes_consumed == 4
+
+
+def test_http_open_range_fallback(mocker):
+    requests_get_func = mocker.patch("requests.Session.get")
+
+    class FakeResponse416(FakeResponse):
+        status_code = 416
+
+    class FakeResponse206Encoded(FakeResponse):
+        status_code = 206
+
+        @property
+        def headers(self):
+            return {
+                "Content-Encoding": "gzip",
+                "Content-Range": "bytes 0-1/4",
+            }
+
+    class FakeResponse200(FakeResponse):
+        status_code = 200
+
+    for first_response in (FakeResponse416(), FakeResponse206Encoded()):
+        requests_get_func.reset_mock()
+        requests_get_func.side_effect = [first_response, FakeResponse200()]
+        with http_open("http://test", "rb", block_size=2) as f:
+            assert f.read() == b"test"
+        assert requests_get_func.call_count == 2
+        assert "headers" not in requests_get_func.call_args.kwargs
 
 
 def test_http_getsize(mocker):
@@ -308,3 +360,38 @@ def test_http_exists(mocker):
         "requests.Session.get", side_effect=requests.exceptions.ConnectionError()
     )
     assert http_exists("http://test") is False
+
+
+def test_http_download(mocker, tmpdir):
+    requests_get_func = mocker.patch("requests.Session.get")
+
+    class FakeResponse200(FakeResponse):
+        status_code = 200
+
+    requests_get_func.return_value = FakeResponse200()
+    dst_path = str(tmpdir / "dir" / "file")
+    sizes = []
+    smart_copy("http://test", dst_path, callback=sizes.append)
+
+    with open(dst_path, "rb") as f:
+        assert f.read() == b"test"
+    assert sum(sizes) == 4
+    assert os.path.getmtime(dst_path) == http_getmtime("http://test")
+
+    with open(dst_path, "wb") as f:
+        f.write(b"old")
+    http_download("http://test", dst_path, overwrite=False)
+    with open(dst_path, "rb") as f:
+        assert f.read() == b"old"
+
+    with pytest.raises(IsADirectoryError):
+        http_download("http://test", str(tmpdir) + "/")
+    with pytest.raises(OSError):
+        http_download("http://test", "s3://bucket/key")
+
+    class FakeResponse404(FakeResponse):
+        status_code = 404
+
+    requests_get_func.return_value = FakeResponse404()
+    with pytest.raises(HttpFileNotFoundError):
+        http_download("http://test", dst_path)
@@ -310,5 +310,14 @@ def test_open_with_headers(requests_mock):
         assert requests_mock.request_history[0].headers[key] == value
 
 
+def test_http_session_shared():
+    assert HttpPath("http://a").session is HttpPath("http://b").session
+
+    path = HttpPath("http://a")
+    path.request_kwargs = {"headers": {"A": "a"}}
+    assert path.session is not HttpPath("http://a").session
+    assert path.session.headers["A"] == "a"
+
+
 def test_https_path():
     assert HttpPath("https://foo").protocol == "https"
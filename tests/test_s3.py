@@ -21,6 +21,7 @@ from moto import mock_aws
 from megfile import s3_path, smart
 from megfile.config import (
     GLOBAL_MAX_WORKERS,
+    READER_BLOCK_SIZE,
 )
 from megfile.errors import (
     MaxRetriesExceededError,
@@ -37,6 +38,7 @@ from megfile.errors import (
     translate_s3_error,
 )
 from megfile.interfaces import Access, FileEntry, StatResult
+from megfile.lib.s3_append_writer import S3AppendWriter
 from megfile.s3_path import (
     S3CachedHandler,
     S3MemoryHandler,
@@ -974,6 +976,27 @@ def test_s3_upload2(s3_empty_client, fs):
     assert body == "value"
 
 
+def test_s3_upload_checksums(s3_empty_client, fs):
+    fs.create_file("/path/to/file", contents="value")
+    s3_empty_client.create_bucket(Bucket="bucket")
+
+    sizes = []
+    s3.s3_upload(
+        "/path/to/file",
+        "s3://bucket/result",
+        callback=sizes.append,
+        checksums=("md5", "sha256"),
+    )
+
+    response = s3_empty_client.get_object(Bucket="bucket", Key="result")
+    assert response["Body"].read() == b"value"
+    assert response["Metadata"] == {
+        "megfile-content-md5": hashlib.md5(b"value").hexdigest(),
+        "megfile-content-sha256": hashlib.sha256(b"value").hexdigest(),
+    }
+    assert sum(sizes) == 5
+
+
 def test_s3_upload_invalid(s3_empty_client, fs):
     s3_empty_client.create_bucket(Bucket="bucket")
 
@@ -1635,6 +1658,35 @@ def test_s3_scan_stat(truncating_client, mocker):
         s3.s3_scan_stat("s3://")
 
 
+def test_s3_scan_stat_followlinks(s3_empty_client, mocker):
+    s3_empty_client.create_bucket(Bucket="bucket")
+    s3_empty_client.put_object(Bucket="bucket", Key="dir/a", Body=b"a")
+    s3_empty_client.put_object(Bucket="bucket", Key="target", Body=b"target")
+    s3_empty_client.put_object(Bucket="bucket", Key="dir/empty", Body=b"")
+    for name in ("b", "c", "d"):
+        s3.s3_symlink("s3://bucket/target", "s3://bucket/dir/%s" % name)
+
+    expected = [
+        ("a", "s3://bucket/dir/a", 1),
+        ("target", "s3://bucket/target", 6),
+        ("target", "s3://bucket/target", 6),
+        ("target", "s3://bucket/target", 6),
+        ("empty", "s3://bucket/dir/empty", 0),
+    ]
+    head_object = mocker.spy(s3_empty_client, "head_object")
+    entries = list(S3Path("s3://bucket/dir").scan_stat(followlinks=True, max_workers=2))
+    assert [(e.name, e.path, e.stat.size) for e in entries] == expected
+    # "dir" itself, each object, and stat of the target only once
+    assert head_object.call_count == 1 + 5 + 2
+
+    mocker.patch("megfile.s3_path.S3_SYMLINK_EMPTY_ONLY", True)
+    head_object.reset_mock()
+    entries = list(S3Path("s3://bucket/dir").scan_stat(followlinks=True))
+    assert [(e.name, e.path, e.stat.size) for e in entries] == expected
+    # object "dir/a" is not empty, no need to check
+    assert head_object.call_count == 1 + 4 + 2
+
+
 def test_s3_path_join():
     assert s3_path._s3_path_join("s3://") == "s3://"
     assert s3_path._s3_path_join("s3://", "bucket/key") == "s3://bucket/key"
@@ -3033,6 +3085,8 @@ def test_s3_buffered_open(mocker, s3_empty_client, fs):
     reader = s3.s3_buffered_open("s3://bucket/key", "rb", block_forward=1)
     assert isinstance(reader, s3_path.S3PrefetchReader)
     assert reader._block_forward == 1
+    # large sequential reads are streamed by default
+    assert reader._stream_min_size == 4 * READER_BLOCK_SIZE
 
     reader = s3.s3_buffered_open("s3://bucket/key", "rb", share_cache_key="share")
     assert isinstance(reader, s3_path.S3ShareCacheReader)
@@ -3092,6 +3146,90 @@ def test_s3_buffered_open_raises_exceptions(mocker, s3_empty_client, fs):
     assert "s3://bucket/keyy" in str(error.value)
 
 
+def test_s3_buffered_open_io_profile(s3_empty_client):
+    content = b"test data for s3_buffered_open"
+    s3_empty_client.create_bucket(Bucket="bucket")
+
+    with smart.smart_open("s3://bucket/key", "wb", io_profile=True) as writer:
+        assert isinstance(writer, s3_path.S3BufferedWriter)
+        writer.write(content)
+    assert writer.io_stats is not None
+
+    with smart.smart_open("s3://bucket/key", "rb", io_profile=True) as reader:
+        assert isinstance(reader, s3_path.S3PrefetchReader)
+        assert reader.read() == content
+    assert reader.io_stats is not None
+    assert reader.io_stats.bytes_consumed == len(content)
+
+    with smart.smart_open("s3://bucket/key", "rb") as reader:
+        assert reader.io_stats is None
+
+    reader = s3.s3_buffered_open(
+        "s3://bucket/key", "rb", share_cache_key="share", io_profile=True
+    )
+    assert reader.io_stats is not None
+    reader.close()
+
+    writer = s3.s3_buffered_open(
+        "s3://bucket/key", "wb", limited_seekable=True, io_profile=True
+    )
+    assert writer.io_stats is not None
+    writer.close()
+
+
+def test_s3_buffered_open_access(mocker, s3_empty_client):
+    content = b"test data for s3_buffered_open"
+    s3_empty_client.create_bucket(Bucket="bucket")
+    s3_empty_client.put_object(Bucket="bucket", Key="key", Body=content)
+    stat = s3.s3_stat("s3://bucket/key")
+
+    head_object = mocker.spy(s3_empty_client, "head_object")
+    get_object = mocker.spy(s3_empty_client, "get_object")
+    with s3.s3_buffered_open("s3://bucket/key", "rb", stat=stat) as reader:
+        assert isinstance(reader, S3MemoryHandler)
+        assert reader.read() == content
+    assert head_object.call_count == 0
+    assert get_object.call_count == 1
+
+    entry = next(smart.smart_scandir("s3://bucket/"))
+    with smart.smart_open(entry, "rb") as reader:
+        assert isinstance(reader, S3MemoryHandler)
+        assert reader.read() == content
+    assert head_object.call_count == 0
+
+    with s3.s3_buffered_open("s3://bucket/key", "rb", access="whole") as reader:
+        assert isinstance(reader, S3MemoryHandler)
+        assert reader.read() == content
+
+    with s3.s3_buffered_open("s3://bucket/key", "rb", access="random") as reader:
+        assert isinstance(reader, s3_path.S3PrefetchReader)
+        assert reader._block_size == 2**20
+        assert reader._block_forward == 0
+        assert reader._stream_min_size == 0
+        assert reader.read() == content
+
+    with s3.s3_buffered_open("s3://bucket/key", "rb", access="sequential") as reader:
+        assert isinstance(reader, s3_path.S3PrefetchReader)
+        assert reader._is_streaming
+        assert reader.read() == content
+
+    with s3.s3_buffered_open(
+        "s3://bucket/key", "rb", access="once", block_size=4
+    ) as reader:
+        assert reader._is_streaming
+        assert reader._block_capacity == 4
+        assert reader.read() == content
+
+    head_object.reset_mock()
+    with s3.s3_buffered_open("s3://bucket/key", "ab", stat=stat) as writer:
+        writer.write(b"!")
+    assert head_object.call_count == 0
+    assert s3.s3_load_content("s3://bucket/key") == content + b"!"
+
+    with pytest.raises(ValueError):
+        s3.s3_buffered_open("s3://bucket/key", "rb", access="unknown")
+
+
 def test_s3_memory_open(s3_empty_client):
     content = b"test data for s3_memory_open"
     s3_empty_client.create_bucket(Bucket="bucket")
@@ -3136,7 +3274,7 @@ def test_s3_open(s3_empty_client):
     assert isinstance(reader, s3_path.S3PrefetchReader)
 
     writer = s3.s3_open("s3://bucket/key", "ab")
-    assert isinstance(writer, S3MemoryHandler)
+    assert isinstance(writer, S3AppendWriter)
 
     writer = s3.s3_open("s3://bucket/key", "wb+")
     assert isinstance(writer, S3MemoryHandler)
@@ -3170,6 +3308,42 @@ def test_s3_getmd5(s3_empty_client):
     )
 
 
+def test_s3_getmd5_dir_requests(s3_empty_client, mocker):
+    s3_empty_client.create_bucket(Bucket="bucket")
+    for key in ("dir/a", "dir/b", "dir/sub/c"):
+        s3_empty_client.put_object(Bucket="bucket", Key=key, Body=key.encode())
+
+    def md5(content: bytes) -> str:
+        return hashlib.md5(content).hexdigest()  # nosec
+
+    stat = mocker.spy(S3Path, "stat")
+    expected = md5(
+        (md5(b"dir/a") + md5(b"dir/b") + md5(md5(b"dir/sub/c").encode())).encode()
+    )
+    assert s3.s3_getmd5("s3://bucket/dir") == expected
+    # members are told by listing, only the directory and files are stated
+    assert sorted(call.args[0].path_with_protocol for call in stat.call_args_list) == [
+        "s3://bucket/dir",
+        "s3://bucket/dir/a",
+        "s3://bucket/dir/b",
+        "s3://bucket/dir/sub/c",
+    ]
+
+
+def test_s3_getmd5_from_metadata(s3_empty_client):
+    s3_url = "s3://bucket/key"
+    s3_empty_client.create_bucket(Bucket="bucket")
+    s3_empty_client.put_object(
+        Bucket="bucket",
+        Key="key",
+        Body=b"bytes",
+        Metadata={"megfile-content-md5": "0" * 32},
+    )
+
+    assert s3.s3_getmd5(s3_url) == "0" * 32
+    assert s3.s3_getmd5(s3_url, recalculate=True) == hashlib.md5(b"bytes").hexdigest()
+
+
 def test_s3_getmd5_None(s3_empty_client):
     s3_url = "s3://bucket/key"
     s3_empty_client.create_bucket(Bucket="bucket")
@@ -3200,6 +3374,20 @@ def test_s3_load_content(s3_empty_client):
         s3.s3_load_content("s3://bucket/key", 5, 2)
 
 
+def test_s3_load_content_without_head(s3_empty_client, mocker):
+    content = b"test data for s3_load_content"
+    s3_empty_client.create_bucket(Bucket="bucket")
+    s3_empty_client.put_object(Bucket="bucket", Key="key", Body=content)
+
+    head_object = mocker.spy(s3_empty_client, "head_object")
+    get_object = mocker.spy(s3_empty_client, "get_object")
+    assert s3.s3_load_content("s3://bucket/key", 4, 7) == content[4:7]
+    assert s3.s3_load_content("s3://bucket/key", 4, 100) == content[4:]
+    assert s3.s3_load_content("s3://bucket/key", 4, 4) == b""
+    assert head_object.call_count == 0
+    assert get_object.call_count == 2
+
+
 def test_s3_load_content_retry(s3_empty_client, mocker):
     content = b"test data for s3_load_content"
     s3_empty_client.create_bucket(Bucket="bucket")
@@ -3871,3 +4059,36 @@ def test_s3_retry(error_client, mocker):
     with pytest.raises(S3FileNotFoundError):
         with raise_s3_error("s3://bucket/key"):
             error_client.head_object(Bucket="bucket", Key="key")
+
+
+def test_s3_rate_limit(s3_empty_client, mocker):
+    from megfile.lib.rate_limiter import RateLimiter, reset_rate_limiters
+
+    mocker.patch("megfile.s3_path.S3_MAX_REQUESTS_PER_SECOND", 1000)
+    mocker.patch("megfile.s3_path.S3_MAX_BYTES_PER_SECOND", 2**30)
+    acquire_request = mocker.spy(RateLimiter, "acquire_request")
+    acquire_bytes = mocker.spy(RateLimiter, "acquire_bytes")
+    reset_rate_limiters()
+
+    client = _patch_make_request(make_moto_s3_client(), profile_name="test")
+    client.create_bucket(Bucket="bucket")
+    client.put_object(Bucket="bucket", Key="key", Body=b"content")
+    client.head_object(Bucket="bucket", Key="key")
+    assert client.get_object(Bucket="bucket", Key="key")["Body"].read() == b"content"
+
+    assert acquire_request.call_count == 4
+    assert acquire_request.call_args_list[1].args[1] == len(b"content")
+    # body of HEAD response is empty
+    assert [call.args[1] for call in acquire_bytes.call_args_list if call.args[1]] == [
+        len(b"content"),
+        len(b"content"),
+    ]
+    limiters = set(call.args[0] for call in acquire_request.call_args_list)
+    assert len(limiters) == 1
+
+    mocker.patch("megfile.s3_path.S3_RATE_LIMIT_SCOPE", "profile")
+    assert s3_path._get_rate_limit_key("e", "b", "test") == "s3+profile:test"
+    assert s3_path._get_rate_limit_key("e", "b", None) == "s3+profile:default"
+    mocker.patch("megfile.s3_path.S3_RATE_LIMIT_SCOPE", "endpoint")
+    assert s3_path._get_rate_limit_key("e", "b", "test") == "s3+endpoint:e"
+    reset_rate_limiters()
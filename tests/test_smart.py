@@ -1,3 +1,4 @@
+import hashlib
 import os
 from io import BytesIO, StringIO
 from pathlib import Path
@@ -308,6 +309,36 @@ def test_smart_copy_raise_error(mocker):
             smart.smart_copy("/data/a", "s3://a/b")
 
 
+def test_smart_copy_checksums(s3_empty_client, fs):
+    content = b"test"
+    md5 = hashlib.md5(content).hexdigest()
+    with open("/file", "wb") as f:
+        f.write(content)
+    s3_empty_client.create_bucket(Bucket="bucket")
+
+    sizes = []
+    digests = smart.smart_copy(
+        "/file", "s3://bucket/key", callback=sizes.append, checksums=("md5",)
+    )
+    assert digests == {"md5": md5}
+    assert sum(sizes) == len(content)
+    response = s3_empty_client.head_object(Bucket="bucket", Key="key")
+    assert response["Metadata"] == {"megfile-content-md5": md5}
+    assert smart.smart_getmd5("s3://bucket/key") == md5
+
+    # server-side copy doesn't pass content through, so it is streamed
+    digests = smart.smart_copy("s3://bucket/key", "s3://bucket/key2", checksums=["md5"])
+    assert digests == {"md5": md5}
+    assert smart.smart_getmd5("s3://bucket/key2") == md5
+
+    digests = smart.smart_copy("s3://bucket/key", "/file2", checksums=("sha256",))
+    assert digests == {"sha256": hashlib.sha256(content).hexdigest()}
+    with open("/file2", "rb") as f:
+        assert f.read() == content
+
+    assert smart.smart_copy("/file", "/file3") is None
+
+
 def test_smart_copy_overwrite(fs, mocker):
     with open("file", "wb") as f:
         f.write(b"")
@@ -1016,6 +1047,42 @@ def test_smart_cache(mocker, s3_empty_client):
         megfile.smart_cache("s3://path/to/file", mode="x")
 
 
+def test_smart_cache_shared(mocker, s3_empty_client, tmp_path):
+    mocker.patch("megfile.smart.SMART_CACHE_DIR", str(tmp_path))
+    smart_copy = mocker.patch("megfile.smart.smart_copy", side_effect=smart.smart_copy)
+    path = "s3://%s/file.txt" % BUCKET
+    s3_empty_client.put_object(Bucket=BUCKET, Key="file.txt", Body=b"content")
+
+    with megfile.smart_cache(path, shared=True) as cache_path:
+        assert cache_path.startswith(str(tmp_path))
+        assert cache_path.endswith(".txt")
+        with open(cache_path, "rb") as f:
+            assert f.read() == b"content"
+        # files in use are shared
+        with megfile.smart_cache(path, shared=True) as other_cache_path:
+            assert other_cache_path == cache_path
+    # cache file is kept for later use
+    assert os.path.exists(cache_path)
+    with megfile.smart_cache(path, shared=True) as other_cache_path:
+        assert other_cache_path == cache_path
+    assert smart_copy.call_count == 1
+
+    # cache file of changed file is another one
+    s3_empty_client.put_object(Bucket=BUCKET, Key="file.txt", Body=b"changed")
+    with megfile.smart_cache(path, shared=True) as other_cache_path:
+        assert other_cache_path != cache_path
+        with open(other_cache_path, "rb") as f:
+            assert f.read() == b"changed"
+    assert smart_copy.call_count == 2
+
+    # shared cache is only used in read mode without cache_path
+    with megfile.smart_cache(path, shared=True, mode="a") as other_cache_path:
+        assert not other_cache_path.startswith(str(tmp_path))
+    with megfile.smart_cache(path) as other_cache_path:
+        assert not other_cache_path.startswith(str(tmp_path))
+    assert not os.path.exists(other_cache_path)
+
+
 def test_smart_symlink(mocker, s3_empty_client, filesystem):
     src_path = "/tmp/src_file"
     dst_path = "/tmp/dst_file"
@@ -1076,10 +1143,24 @@ def test_default_copy_func(filesystem):
 
 @patch.object(smart, "combine")
 def test_smart_combine_open(funcA, mocker):
-    mocker.patch("megfile.smart.smart_glob", return_value=[])
+    mocker.patch("megfile.smart.smart_glob_stat", return_value=[])
     smart.smart_combine_open("test path")
     funcA.assert_called_once()
 
+    mocker.patch("megfile.smart.smart_glob", return_value=[])
+    smart.smart_combine_open("test path", "r")
+    assert funcA.call_count == 2
+
+
+def test_smart_combine_open_lazy(fs):
+    for i in range(5):
+        with open("part-%d" % i, "wb") as f:
+            f.write(b"block%d\n" % i)
+
+    with smart.smart_combine_open("part-*", block_forward=1) as reader:
+        assert reader.readline() == b"block0\n"
+        assert reader.read() == b"block1\nblock2\nblock3\nblock4\n"
+
 
 @patch.object(smart, "smart_open")
 def test_smart_save_content(funcA):
@@ -1114,6 +1195,22 @@ def test_smart_concat(s3_empty_client, fs):
     smart.smart_concat([], "c.txt")
 
 
+def test_smart_concat_prefetch(s3_empty_client, fs):
+    s3_empty_client.create_bucket(Bucket="bucket")
+    src_paths = []
+    for i in range(10):
+        src_path = "s3://bucket/%d.txt" % i
+        smart.smart_save_content(src_path, b"content-%d " % i * i)
+        src_paths.append(src_path)
+
+    smart._default_concat_func(
+        src_paths, "result.txt", block_forward=3, max_buffer_size=40
+    )
+    assert smart.smart_load_content("result.txt") == b"".join(
+        b"content-%d " % i * i for i in range(10)
+    )
+
+
 def test__get_copy_func():
     assert smart._get_copy_func("s3+a", "s3+a") == smart._copy_funcs["s3"]["s3"]
     assert smart._get_copy_func("s3", "s3+a") == smart._default_copy_func
@@ -6,13 +6,14 @@ from typing import Dict, Iterator, List
 
 import pytest
 from webdav3.exceptions import (
+    MethodNotSupported,
     RemoteResourceNotFound,
     ResponseErrorCode,
 )
 
 from megfile import smart_copy
 from megfile.errors import SameFileError
-from megfile.webdav_path import _patch_execute_request
+from megfile.webdav_path import _patch_execute_request, _webdav_scan
 from tests.compat import webdav
 
 from .test_http import FakeResponse  # noqa: F401
@@ -34,7 +35,7 @@ class FakeWebdavClient:
             return f".{path}"
         return path
 
-    def execute_request(self, action: str, path: str):
+    def execute_request(self, action: str, path: str, data=None, headers_ext=None):
         """Mock execute_request method"""
         return FakeResponse()
 
@@ -469,6 +470,98 @@ def test_webdav_scan(webdav_mocker):
         list(webdav.webdav_scan_stat("webdav://host/B", missing_ok=False))
 
 
+class PropfindClient:
+    """Answer PROPFIND requests with multistatus xml built from a path list"""
+
+    def __init__(self, paths: List[str], reject_infinity: bool = False):
+        self.paths = paths
+        self.reject_infinity = reject_infinity
+        self.requests = []
+
+    def get_full_path(self, urn):
+        return urn.path()
+
+    def execute_request(self, action, path, data=None, headers_ext=None):
+        depth = headers_ext[-1].split(":")[1].strip()
+        self.requests.append((path, depth))
+        if depth == "infinity" and self.reject_infinity:
+            raise ResponseErrorCode(url=path, code=403, message=b"")
+
+        root = path.rstrip("/") + "/"
+        responses = [self._response(root, True)]
+        for child in self.paths:
+            if not child.startswith(root) or child == root:
+                continue
+            relative = child[len(root) :].rstrip("/")
+            if depth == "1" and "/" in relative:
+                continue
+            responses.append(self._response(child, child.endswith("/")))
+
+        response = FakeResponse()
+        response.raw = io.BytesIO(
+            (
+                '<?xml version="1.0"?><d:multistatus xmlns:d="DAV:">'
+                + "".join(responses)
+                + "</d:multistatus>"
+            ).encode()
+        )
+        return response
+
+    @staticmethod
+    def _response(path: str, isdir: bool) -> str:
+        resource_type = "<d:collection/>" if isdir else ""
+        return (
+            f"<d:response><d:href>{path}</d:href><d:propstat><d:prop>"
+            f"<d:getcontentlength>{0 if isdir else 4}</d:getcontentlength>"
+            f"<d:resourcetype>{resource_type}</d:resourcetype>"
+            "</d:prop></d:propstat></d:response>"
+        )
+
+
+def test_webdav_scan_streaming():
+    client = PropfindClient(["/A/1.json", "/A/b/", "/A/b/file.json"])
+
+    infos = list(_webdav_scan(client, "/A"))
+
+    assert [(info["path"], info["isdir"]) for info in infos] == [
+        ("/A/1.json", False),
+        ("/A/b/", True),
+        ("/A/b/file.json", False),
+    ]
+    assert infos[0]["size"] == "4"
+    assert client.requests == [("/A/", "infinity")]
+
+
+def test_webdav_scan_depth_infinity_rejected():
+    client = PropfindClient(
+        ["/A/1.json", "/A/b/", "/A/b/c/", "/A/b/c/file.json"], reject_infinity=True
+    )
+
+    infos = list(_webdav_scan(client, "/A"))
+
+    assert sorted(info["path"] for info in infos) == [
+        "/A/1.json",
+        "/A/b/",
+        "/A/b/c/",
+        "/A/b/c/file.json",
+    ]
+    assert client.requests[0] == ("/A/", "infinity")
+    assert sorted(client.requests[1:]) == [
+        ("/A/", "1"),
+        ("/A/b/", "1"),
+        ("/A/b/c/", "1"),
+    ]
+
+
+def test_webdav_scan_error():
+    class Client(PropfindClient):
+        def execute_request(self, action, path, data=None, headers_ext=None):
+            raise ResponseErrorCode(url=path, code=401, message=b"")
+
+    with pytest.raises(ResponseErrorCode):
+        list(_webdav_scan(Client([]), "/A"))
+
+
 def test_webdav_scan_stat_file_reuses_stat(webdav_mocker):
     webdav.webdav_makedirs("webdav://host/A")
     with webdav.webdav_open("webdav://host/A/1.json", "w") as f:
@@ -516,6 +609,96 @@ def test_webdav_open_read_reuses_stat(webdav_mocker):
     assert client.check_calls == []
 
 
+def test_webdav_open_read_with_ranged_get(webdav_mocker, mocker):
+    content = b"0123456789"
+
+    class FakeResponse206(FakeResponse):
+        status_code = 206
+
+        def __init__(self, start, end):
+            self.content = content[start : end + 1]
+            self.cookies = {}
+            self._range = "bytes %d-%d/%d" % (start, end, len(content))
+
+        @property
+        def headers(self):
+            return {
+                "Content-Length": str(len(self.content)),
+                "Content-Range": self._range,
+                "Last-Modified": "Wed, 24 Nov 2021 07:18:41 GMT",
+            }
+
+    def execute_request(action, path, data=None, headers_ext=None):
+        start, end = map(int, headers_ext[0].split("=")[1].split("-"))
+        return FakeResponse206(start, min(end, len(content) - 1))
+
+    path = webdav.WebdavPath("webdav://host/A/1.bin")
+    client = path._client
+    client.info_calls.clear()
+    client.check_calls.clear()
+    execute_request = mocker.patch.object(
+        client, "execute_request", side_effect=execute_request
+    )
+
+    with path.open("rb", block_size=4, max_workers=1) as f:
+        assert execute_request.call_count == 1
+        assert f.read() == content
+
+    assert client.info_calls == []
+    assert client.check_calls == []
+
+
+@pytest.mark.parametrize(
+    "error",
+    [
+        ResponseErrorCode(url="https://host/A", code=403, message=b"Forbidden"),
+        ResponseErrorCode(url="https://host/A", code=501, message=b""),
+        MethodNotSupported(name="download", server="host"),
+    ],
+)
+def test_webdav_open_directory_get_rejected(webdav_mocker, mocker, error):
+    webdav.webdav_makedirs("webdav://host/A")
+    path = webdav.WebdavPath("webdav://host/A")
+    mocker.patch.object(path._client, "execute_request", side_effect=error)
+
+    with pytest.raises(IsADirectoryError):
+        path.open("rb")
+
+
+def test_webdav_open_read_without_buffer(webdav_mocker, mocker):
+    content = b"0123456789"
+    webdav.webdav_makedirs("webdav://host/A")
+    with open("./A/1.bin", "wb") as f:
+        f.write(content)
+
+    class FakeResponse206(FakeResponse):
+        status_code = 206
+
+        def __init__(self, start, end):
+            self.content = content[start : end + 1]
+            self.cookies = {}
+
+        @property
+        def headers(self):
+            return {"Content-Length": str(len(self.content))}
+
+    def execute_request(action, path, data=None, headers_ext=None):
+        start, end = map(int, headers_ext[0].split("=")[1].split("-"))
+        return FakeResponse206(start, end)
+
+    path = webdav.WebdavPath("webdav://host/A/1.bin")
+    execute_request = mocker.patch.object(
+        path._client, "execute_request", side_effect=execute_request
+    )
+
+    with path.open("rb", block_size=4, max_buffer_size=0) as f:
+        # no block is fetched before reading
+        assert execute_request.call_count == 0
+        assert f.read(4) == content[:4]
+        assert f.read() == content[4:]
+    assert execute_request.call_count == 2
+
+
 def test_webdav_scan_stat_directory_skips_extra_check(webdav_mocker):
     webdav.webdav_makedirs("webdav://host/A")
     with webdav.webdav_open("webdav://host/A/1.json", "w") as f:
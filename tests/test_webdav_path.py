@@ -737,3 +737,19 @@ def test_webdav_walk_with_directories(webdav_mocker):
     results = list(WebdavPath("webdav://host/root").walk())
     # Should have at least 3 entries (root, dir1, dir1/subdir, dir2)
     assert len(results) >= 3
+
+
+def test_webdav_walk_prune(webdav_mocker):
+    webdav.webdav_makedirs("webdav://host/root/dir1/subdir", parents=True)
+    webdav.webdav_makedirs("webdav://host/root/dir2/subdir", parents=True)
+
+    roots = []
+    for root, dirs, _ in WebdavPath("webdav://host/root").walk():
+        roots.append(root)
+        if "dir1" in dirs:
+            dirs.remove("dir1")
+    assert roots == [
+        "webdav://host/root",
+        "webdav://host/root/dir2",
+        "webdav://host/root/dir2/subdir",
+    ]